@@ -1,10 +1,27 @@
 # File Path: employee_wellness_project/analysis.py
 # This file contains all data analysis and plotting functions for the web app.
 
-import pandas as pd
-import plotly.express as px
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+
+from chart_api import create_template_defaults
+from instrumentation import phase
+from lazy_loading import lazy_import, once
+
+# pandas, Plotly and the dataset are loaded on first use (see lazy_loading.py)
+pd = lazy_import('pandas')
+px = lazy_import('plotly.express', setup=create_template_defaults)
+go = lazy_import('plotly.graph_objects', setup=create_template_defaults)
+subplots = lazy_import('plotly.subplots', setup=create_template_defaults)
+factor_ranking = lazy_import('factor_ranking')
+
+if TYPE_CHECKING:
+    from dataset import Dataset, DatasetView
+
 # Define our custom color palette
 THEME_COLORS = {
     'primary': '#4A5568',
@@ -12,21 +29,107 @@ THEME_COLORS = {
     'accent2': '#A0AEC0', # Gray
     'accent3': '#E53E3E', # Red for contrast if needed
 }
-# Load the cleaned dataset, our single source of truth for all functions.
-df = pd.read_csv('cleaned_employee_data.csv')
+
+# The cleaned dataset, our single source of truth for all functions.
+# A fresh columnar snapshot (see snapshot.py) is used when present, else the CSV.
+# The Dataset also holds the crosstab engine: every '<column> x treatment' table,
+# value counts and the Age histogram, kept up to date as responses are appended.
+# With MEMORY_MAP the snapshot's columns are memory-mapped instead of copied, so
+# all worker processes of a prefork server share one copy of the data. (Windows
+# can't replace a file that is mapped, so it is off there.) The path is the CSV next
+# to this file, whatever the working directory; app.create_app() can load another.
+# It is loaded when analysis.dataset is first read, not on import.
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cleaned_employee_data.csv')
+MEMORY_MAP = os.name == 'posix'
+
+
+def load_dataset(path: str) -> Dataset:
+    """Loads a cleaned CSV the way the main dataset is loaded (see MEMORY_MAP)."""
+    from dataset import Dataset  # imported here so importing this module doesn't load pandas
+    return Dataset.load(path, mmap=MEMORY_MAP)
+
+
+@once
+def _load_default_dataset() -> None:
+    global dataset
+    if 'dataset' not in globals():  # unless one was installed before the first read
+        dataset = load_dataset(DATA_PATH)
+
+
+def default_dataset() -> Dataset:
+    """
+    The default dataset, loaded from DATA_PATH on first use. A hot reload (see
+    reloader.py) rebinds analysis.dataset to the refreshed version; code that
+    must see one version throughout holds on to current() instead.
+    """
+    _load_default_dataset()
+    return dataset
+
+
+def loaded_dataset() -> Dataset | None:
+    """The default dataset if it has been loaded (or installed), else None; never loads it."""
+    return globals().get('dataset')
+
+
+def __getattr__(name: str):
+    # analysis.dataset loads the default dataset on first use
+    if name == 'dataset':
+        return default_dataset()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# The data the current request is looking at (a segment, or the whole dataset)
+_active: ContextVar[Dataset | DatasetView | None] = ContextVar('active_dataset', default=None)
+
+
+def current() -> Dataset | DatasetView:
+    """Returns the dataset (or segment) the plotting and KPI functions read from."""
+    return _active.get() or default_dataset()
+
+
+@contextmanager
+def use(data: Dataset | DatasetView):
+    """Makes every plotting and KPI function read from data inside the with-block."""
+    token = _active.set(data)
+    try:
+        yield data
+    finally:
+        _active.reset(token)
+
+
+def segment(filters: dict[str, list[str]]) -> Dataset | DatasetView:
+    """Selects a segment of the active dataset's respondents (see Dataset.select) using the bitmap index."""
+    return current().select(filters)
+
+
+def data_fingerprint() -> str:
+    """Returns a fingerprint of the dataset, used to key the chart cache."""
+    return current().fingerprint()
+
+
+def append_responses(rows: list[dict]) -> int:
+    """Appends new survey responses to the active dataset; aggregates are updated in O(batch)."""
+    return current().append(rows)
 
 
 # -------------------------------------------------------------------- #
 # --- PRESENTER 1: THE HR GENERALIST ---
 # -------------------------------------------------------------------- #
 
+AGE_BINS = 10
+
+
 def plot_q1_demographics() -> tuple[go.Figure, go.Figure]:
     """
     Answers Q1: What is the overall demographic profile (Age & Gender)?
     Generates an age histogram and a gender pie chart.
     """
+    data = current()
     # Gender Distribution
-    gender_counts = df['Gender'].value_counts()
+    gender_counts = data.engine.value_counts('Gender')
+    # Age Distribution: binned from the engine's Age histogram, so the figure
+    # holds one bar per bin rather than every respondent's age
+    age_bins = data.engine.binned_histogram('Age', AGE_BINS)
+    phase('figure')
     fig_gender = px.pie(
         names=gender_counts.index,
         values=gender_counts.values,
@@ -34,15 +137,14 @@ def plot_q1_demographics() -> tuple[go.Figure, go.Figure]:
         hole=0.3
     )
     
-    # Age Distribution
-    fig_age = px.histogram(
-        df,
-        x='Age',
-        title='Age Distribution of Workforce',
-        labels={'Age': 'Employee Age'},
-        nbins=10
-    )
-    fig_age.update_layout(bargap=0.1)
+    fig_age = go.Figure(go.Bar(
+        x=(age_bins['start'] + age_bins['end']) / 2,
+        y=age_bins['count'],
+        customdata=age_bins[['start', 'end']],
+        hovertemplate='Employee Age=%{customdata[0]}-%{customdata[1]}<br>count=%{y}<extra></extra>'
+    ))
+    fig_age.update_layout(title='Age Distribution of Workforce', xaxis_title='Employee Age',
+                          yaxis_title='count', bargap=0.1)
     
     return fig_gender, fig_age
 
@@ -51,9 +153,11 @@ def plot_q2_workplace_landscape() -> tuple[go.Figure, go.Figure]:
     Answers Q2: What is the workplace landscape?
     Generates charts for company size and tech company split.
     """
+    engine = current().engine
     # Company Size
     order = ['5-Jan', '25-Jun', '26-100', '100-500', '500-1000', 'More than 1000']
-    size_counts = df['no_employees'].value_counts().reindex(order)
+    size_counts = engine.value_counts('no_employees').reindex(order)
+    phase('figure')
     fig_size = px.bar(
         x=size_counts.index,
         y=size_counts.values,
@@ -62,7 +166,9 @@ def plot_q2_workplace_landscape() -> tuple[go.Figure, go.Figure]:
     )
     
     # Tech Company Split
-    tech_counts = df['tech_company'].value_counts()
+    phase('aggregation')
+    tech_counts = engine.value_counts('tech_company')
+    phase('figure')
     fig_tech = px.pie(
         names=tech_counts.index,
         values=tech_counts.values,
@@ -77,7 +183,9 @@ def plot_q3_family_history() -> go.Figure:
     Answers Q3: Is there a baseline mental health risk based on family history?
     Generates a pie chart for family history of mental illness.
     """
-    history_counts = df['family_history'].value_counts()
+    engine = current().engine
+    history_counts = engine.value_counts('family_history')
+    phase('figure')
     fig_history = px.pie(
         names=history_counts.index,
         values=history_counts.values,
@@ -97,16 +205,22 @@ def plot_q4_formal_support() -> go.Figure:
     Answers Q4: How comprehensive is our formal support (Benefits vs. Wellness Programs)?
     Generates side-by-side pie charts for benefits and wellness programs.
     """
-    fig = make_subplots(
+    engine = current().engine
+    phase('figure')
+    fig = subplots.make_subplots(
         rows=1, cols=2,
         subplot_titles=('Does Employer Provide<br>Mental Health Benefits?', 'Is There a Formal<br>Wellness Program?'),
         specs=[[{'type':'domain'}, {'type':'domain'}]]
     )
     
-    benefits_counts = df['benefits'].value_counts()
+    phase('aggregation')
+    benefits_counts = engine.value_counts('benefits')
+    phase('figure')
     fig.add_trace(go.Pie(labels=benefits_counts.index, values=benefits_counts.values, name="Benefits"), 1, 1)
     
-    wellness_counts = df['wellness_program'].value_counts()
+    phase('aggregation')
+    wellness_counts = engine.value_counts('wellness_program')
+    phase('figure')
     fig.add_trace(go.Pie(labels=wellness_counts.index, values=wellness_counts.values, name="Wellness"), 1, 2)
 
     fig.update_traces(hole=.4, hoverinfo="label+percent+name")
@@ -118,7 +232,9 @@ def plot_q5_care_options_by_size() -> go.Figure:
     Answers Q5: Are employees aware of care options, and how does this vary by company size?
     Generates a grouped bar chart of care options awareness by company size.
     """
-    grouped = df.groupby('no_employees')['care_options'].value_counts(normalize=True).mul(100).rename('percentage').reset_index()
+    engine = current().engine
+    grouped = engine.grouped_value_counts('no_employees', 'care_options').mul(100).rename('percentage').reset_index()
+    phase('figure')
     fig = px.bar(
         grouped,
         x='no_employees', y='percentage', color='care_options',
@@ -134,8 +250,10 @@ def plot_q6_leave_vs_treatment() -> go.Figure:
     Answers Q6: How accessible is taking medical leave, and does this impact treatment rates?
     Generates a chart showing treatment rates based on ease of taking medical leave.
     """
-    leave_treatment_dist = pd.crosstab(df['leave'], df['treatment'], normalize='index').mul(100).reset_index()
+    engine = current().engine
+    leave_treatment_dist = engine.crosstab('leave', 'treatment', normalize='index').mul(100).reset_index()
     leave_treatment_dist = leave_treatment_dist.sort_values(by='Yes', ascending=False)
+    phase('figure')
     fig = px.bar(
         leave_treatment_dist,
         x='leave', y='Yes',
@@ -154,15 +272,21 @@ def plot_q7_treatment_vs_family_history() -> go.Figure:
     Answers Q7: What is the overall treatment rate, and how does family_history amplify this?
     Generates a pie chart for the overall rate and a bar chart for the comparison.
     """
-    fig = make_subplots(
+    engine = current().engine
+    phase('figure')
+    fig = subplots.make_subplots(
         rows=1, cols=2,
         subplot_titles=('Overall Treatment Rate', 'Treatment Rate by Family History'),
         specs=[[{'type':'domain'}, {'type':'bar'}]]
     )
-    treatment_counts = df['treatment'].value_counts()
+    phase('aggregation')
+    treatment_counts = engine.value_counts('treatment')
+    phase('figure')
     fig.add_trace(go.Pie(labels=treatment_counts.index, values=treatment_counts.values, name="Overall"), 1, 1)
     
-    fh_dist = pd.crosstab(df['family_history'], df['treatment'], normalize='index').mul(100)
+    phase('aggregation')
+    fh_dist = engine.crosstab('family_history', 'treatment', normalize='index').mul(100)
+    phase('figure')
     fig.add_trace(go.Bar(x=fh_dist.index, y=fh_dist['Yes'], name='Sought Treatment'), 1, 2)
     
     fig.update_traces(hole=.4, selector=dict(type='pie'))
@@ -175,8 +299,10 @@ def plot_q8_work_interference_vs_treatment() -> go.Figure:
     Answers Q8: How strongly does work_interference predict who gets help?
     Generates a bar chart showing treatment rate by level of work interference.
     """
-    wi_dist = pd.crosstab(df['work_interfere'], df['treatment'], normalize='index').mul(100)
+    engine = current().engine
+    wi_dist = engine.crosstab('work_interfere', 'treatment', normalize='index').mul(100)
     wi_dist = wi_dist.sort_values(by='Yes', ascending=False)
+    phase('figure')
     fig = px.bar(
         wi_dist,
         x=wi_dist.index, y='Yes',
@@ -190,9 +316,12 @@ def plot_q9_gender_disparity_under_interference() -> go.Figure:
     Answers Q9: Is there a gender disparity in treatment among those whose work is affected?
     Generates a bar chart of treatment rates by gender for a filtered subset.
     """
-    affected_df = df[df['work_interfere'] != 'Never']
-    gender_dist = pd.crosstab(affected_df['Gender'], affected_df['treatment'], normalize='index').mul(100)
+    data = current()
+    engine = data.engine
+    affected = ~data.mask({'work_interfere': ['Never']})
+    gender_dist = engine.crosstab('Gender', 'treatment', normalize='index', mask=affected).mul(100)
     gender_dist = gender_dist.sort_values(by='Yes', ascending=False)
+    phase('figure')
     fig = px.bar(
         gender_dist,
         x=gender_dist.index, y='Yes', color=gender_dist.index,
@@ -211,15 +340,21 @@ def plot_q10_mental_vs_physical_consequences() -> go.Figure:
     Answers Q10: Do employees expect more negative consequences for mental vs. physical health?
     Generates side-by-side pie charts for comparison.
     """
-    fig = make_subplots(
+    engine = current().engine
+    phase('figure')
+    fig = subplots.make_subplots(
         rows=1, cols=2,
         subplot_titles=('Consequences for<br>Mental Health', 'Consequences for<br>Physical Health'),
         specs=[[{'type':'domain'}, {'type':'domain'}]]
     )
-    mental_counts = df['mental_health_consequence'].value_counts()
+    phase('aggregation')
+    mental_counts = engine.value_counts('mental_health_consequence')
+    phase('figure')
     fig.add_trace(go.Pie(labels=mental_counts.index, values=mental_counts.values, name="Mental"), 1, 1)
     
-    phys_counts = df['phys_health_consequence'].value_counts()
+    phase('aggregation')
+    phys_counts = engine.value_counts('phys_health_consequence')
+    phase('figure')
     fig.add_trace(go.Pie(labels=phys_counts.index, values=phys_counts.values, name="Physical"), 1, 2)
 
     fig.update_traces(hole=.4, hoverinfo="label+percent+name")
@@ -231,8 +366,10 @@ def plot_q11_fear_vs_treatment() -> go.Figure:
     Answers Q11: Does fear of consequences stop people from getting treatment?
     Generates a bar chart comparing treatment rates.
     """
-    fear_dist = pd.crosstab(df['mental_health_consequence'], df['treatment'], normalize='index').mul(100)
+    engine = current().engine
+    fear_dist = engine.crosstab('mental_health_consequence', 'treatment', normalize='index').mul(100)
     fear_dist = fear_dist.sort_values(by='Yes', ascending=False)
+    phase('figure')
     fig = px.bar(
         fear_dist,
         x=fear_dist.index, y='Yes',
@@ -246,15 +383,21 @@ def plot_q12_trust_circle() -> go.Figure:
     Answers Q12: Who do employees trust? (Coworkers vs. Supervisors).
     Generates side-by-side bar charts for comparison.
     """
+    engine = current().engine
     category_order = ['Yes', 'Some of them', 'No']
-    fig = make_subplots(
+    phase('figure')
+    fig = subplots.make_subplots(
         rows=1, cols=2,
         subplot_titles=('Willingness to Discuss<br>with Coworkers', 'Willingness to Discuss<br>with Supervisor')
     )
-    coworker_counts = df['coworkers'].value_counts().reindex(category_order)
+    phase('aggregation')
+    coworker_counts = engine.value_counts('coworkers').reindex(category_order)
+    phase('figure')
     fig.add_trace(go.Bar(x=coworker_counts.index, y=coworker_counts.values, name='Coworkers'), 1, 1)
     
-    supervisor_counts = df['supervisor'].value_counts().reindex(category_order)
+    phase('aggregation')
+    supervisor_counts = engine.value_counts('supervisor').reindex(category_order)
+    phase('figure')
     fig.add_trace(go.Bar(x=supervisor_counts.index, y=supervisor_counts.values, name='Supervisor'), 1, 2)
     
     fig.update_layout(title_text="Whom Do Employees Trust with Mental Health Discussions?", showlegend=False)
@@ -270,7 +413,9 @@ def plot_q13_seriousness_perception() -> go.Figure:
     Answers Q13: Do employees feel their company takes mental health as seriously as physical health?
     Generates a pie chart to show the distribution of opinions.
     """
-    seriousness_counts = df['mental_vs_physical'].value_counts()
+    engine = current().engine
+    seriousness_counts = engine.value_counts('mental_vs_physical')
+    phase('figure')
     fig = px.pie(
         names=seriousness_counts.index,
         values=seriousness_counts.values,
@@ -284,7 +429,9 @@ def plot_q14_witnessed_consequences_by_tech() -> go.Figure:
     Answers Q14: Have employees witnessed negative consequences for others,
     and is this more common in tech companies?
     """
-    witness_dist = pd.crosstab(df['tech_company'], df['obs_consequence'], normalize='index').mul(100)
+    engine = current().engine
+    witness_dist = engine.crosstab('tech_company', 'obs_consequence', normalize='index').mul(100)
+    phase('figure')
     fig = px.bar(
         witness_dist,
         x=witness_dist.index, y='Yes',
@@ -298,7 +445,9 @@ def plot_q15_witnessing_vs_treatment() -> go.Figure:
     """
     Answers Q15: Does witnessing negative events correlate with a lower personal treatment rate?
     """
-    witness_treatment_dist = pd.crosstab(df['obs_consequence'], df['treatment'], normalize='index').mul(100)
+    engine = current().engine
+    witness_treatment_dist = engine.crosstab('obs_consequence', 'treatment', normalize='index').mul(100)
+    phase('figure')
     fig = px.bar(
         witness_treatment_dist,
         x=witness_treatment_dist.index, y='Yes',
@@ -317,7 +466,9 @@ def plot_q16_remote_work_vs_treatment() -> go.Figure:
     """
     Answers Q16: How does remote work affect the likelihood of seeking treatment?
     """
-    remote_dist = pd.crosstab(df['remote_work'], df['treatment'], normalize='index').mul(100)
+    engine = current().engine
+    remote_dist = engine.crosstab('remote_work', 'treatment', normalize='index').mul(100)
+    phase('figure')
     fig = px.bar(
         remote_dist,
         x=remote_dist.index, y='Yes',
@@ -331,7 +482,9 @@ def plot_q17_remote_work_vs_leave() -> go.Figure:
     """
     Answers Q17: Do remote workers find it easier or harder to take medical leave?
     """
-    leave_dist = df.groupby('remote_work')['leave'].value_counts(normalize=True).mul(100).rename('percentage').reset_index()
+    engine = current().engine
+    leave_dist = engine.grouped_value_counts('remote_work', 'leave').mul(100).rename('percentage').reset_index()
+    phase('figure')
     fig = px.bar(
         leave_dist,
         x='leave', y='percentage', color='remote_work', barmode='group',
@@ -340,31 +493,36 @@ def plot_q17_remote_work_vs_leave() -> go.Figure:
     )
     return fig
 
+# Number of answers shown on the Q18 top factors chart
+TOP_FACTORS = 5
+
+
 def plot_q18_summary_top_factors() -> go.Figure:
     """
-    Answers Q18: What are the top 3 most significant factors?
-    Calculates and plots the factors with the highest impact on seeking treatment.
+    Answers Q18: What are the most significant factors?
+    Ranks every answer to every question by its chi-square association with
+    seeking treatment (see factor_ranking.py) and plots the top ones' lift in
+    the treatment rate, with 95% bootstrap confidence intervals.
     """
-    factors = {}
-    
-    fh_crosstab = pd.crosstab(df['family_history'], df['treatment'], normalize='index')
-    factors['Family History'] = fh_crosstab.loc['Yes', 'Yes'] - fh_crosstab.loc['No', 'Yes']
-    
-    wi_crosstab = pd.crosstab(df['work_interfere'], df['treatment'], normalize='index')
-    factors['Work Interference (Often vs. Never)'] = wi_crosstab.loc['Often', 'Yes'] - wi_crosstab.loc['Never', 'Yes']
-    
-    fc_crosstab = pd.crosstab(df['mental_health_consequence'], df['treatment'], normalize='index')
-    factors['Fearing Consequences'] = fc_crosstab.loc['Yes', 'Yes'] - fc_crosstab.loc['No', 'Yes']
+    ranking = factor_ranking.rank_factors(current(), top_n=TOP_FACTORS)
 
-    summary_df = pd.DataFrame.from_dict(factors, orient='index', columns=['ImpactScore'])
-    summary_df = summary_df.sort_values('ImpactScore', ascending=True)
-    summary_df['ImpactScore'] = summary_df['ImpactScore'] * 100
+    summary_df = pd.DataFrame({
+        'Factor': ranking['column'] + ': ' + ranking['level'],
+        'ImpactScore': ranking['lift'] * 100,
+        'ErrorPlus': (ranking['ci_high'] - ranking['lift']) * 100,
+        'ErrorMinus': (ranking['lift'] - ranking['ci_low']) * 100,
+        'Respondents': ranking['count'],
+        'ChiSquare': ranking['chi2'].round(1),
+    }).iloc[::-1]  # strongest at the top
 
+    phase('figure')
     fig = px.bar(
         summary_df,
-        x='ImpactScore', y=summary_df.index, orientation='h',
+        x='ImpactScore', y='Factor', orientation='h',
+        error_x='ErrorPlus', error_x_minus='ErrorMinus',
+        hover_data=['Respondents', 'ChiSquare'],
         title='Most Influential Factors on Seeking Treatment',
-        labels={'ImpactScore': 'Increase in Likelihood of Seeking Treatment (%)', 'y': 'Factor'}
+        labels={'ImpactScore': 'Change in Likelihood of Seeking Treatment (%)'}
     )
     return fig
 
@@ -378,17 +536,17 @@ def plot_q18_summary_top_factors() -> go.Figure:
 
 def get_kpi_treatment_rate() -> str:
     """Calculates the overall treatment rate as a formatted string."""
-    rate = df['treatment'].value_counts(normalize=True).loc['Yes'] * 100
+    rate = current().engine.value_counts('treatment', normalize=True).loc['Yes'] * 100
     return f"{rate:.1f}%"
 
 def get_kpi_family_history() -> str:
     """Calculates the percentage of employees with a family history."""
-    rate = df['family_history'].value_counts(normalize=True).loc['Yes'] * 100
+    rate = current().engine.value_counts('family_history', normalize=True).loc['Yes'] * 100
     return f"{rate:.1f}%"
 
 def get_kpi_fear_consequences() -> str:
     """Calculates the percentage of employees who fear negative consequences."""
-    rate = df['mental_health_consequence'].value_counts(normalize=True).loc['Yes'] * 100
+    rate = current().engine.value_counts('mental_health_consequence', normalize=True).loc['Yes'] * 100
     return f"{rate:.1f}%"
 
 # -------------------------------------------------------------------- #
@@ -400,9 +558,11 @@ def plot_summary_benefits_vs_treatment() -> go.Figure:
     Answers: Does offering benefits correlate with higher treatment rates?
     Generates a bar chart comparing treatment rates for employees with/without benefits.
     """
+    engine = current().engine
     # Calculate treatment rate based on whether the employer provides benefits
-    benefits_dist = pd.crosstab(df['benefits'], df['treatment'], normalize='index').mul(100)
+    benefits_dist = engine.crosstab('benefits', 'treatment', normalize='index').mul(100)
     
+    phase('figure')
     fig = px.bar(
         benefits_dist,
         x=benefits_dist.index,
@@ -418,6 +578,79 @@ def plot_summary_benefits_vs_treatment() -> go.Figure:
     )
     return fig
 
+# The KPI trend chart has about TREND_POINTS points, each a rolling window of
+# TREND_SMOOTHING steps (e.g. a 4-hour window every hour over two days)
+TREND_POINTS = 48
+TREND_SMOOTHING = 4
+TREND_LABELS = {
+    'treatment': 'Sought Treatment',
+    'family_history': 'Family History',
+    'fear_consequences': 'Fear Consequences',
+}
+
+
+def plot_summary_kpi_trend() -> go.Figure:
+    """
+    Answers: How do the treatment rate and the other KPIs move across survey waves?
+    Plots each summary KPI over rolling windows of the response timestamps,
+    read from the dataset's timeline (see timeline.py) without a pass over the rows.
+    """
+    timeline = getattr(current(), 'timeline', None)
+    if timeline is None or not timeline.n_buckets:
+        phase('figure')
+        fig = go.Figure()
+        fig.add_annotation(text="No response timestamps for this data (rebuild it with python ingest.py --full)",
+                           showarrow=False, font={'color': THEME_COLORS['primary']})
+        fig.update_layout(title='KPI Trend Across Survey Waves', xaxis_visible=False, yaxis_visible=False)
+        return fig
+    step = timeline.nice_width(TREND_POINTS)
+    trend = timeline.series(step * TREND_SMOOTHING, step)
+    trend = trend[trend['responses'] > 0]
+    trend_long = trend.melt(id_vars=['end', 'responses'], value_vars=list(TREND_LABELS),
+                            var_name='KPI', value_name='Rate')
+    trend_long['KPI'] = trend_long['KPI'].map(TREND_LABELS)
+
+    phase('figure')
+    fig = px.line(
+        trend_long,
+        x='end', y='Rate', color='KPI', markers=True,
+        hover_data=['responses'],
+        title='KPI Trend Across Survey Waves',
+        labels={'end': 'Responses Up To', 'Rate': 'Share of Respondents (%)', 'responses': 'Responses in Window'},
+        color_discrete_sequence=[THEME_COLORS['accent1'], THEME_COLORS['primary'], THEME_COLORS['accent3']]
+    )
+    return fig
+
+# -------------------------------------------------------------------- #
+# --- CHART REGISTRY ---
+# --- Maps a stable chart id to a function returning a single figure ---
+# -------------------------------------------------------------------- #
+
+CHARTS = {
+    'q1_gender': lambda: plot_q1_demographics()[0],
+    'q1_age': lambda: plot_q1_demographics()[1],
+    'q2_size': lambda: plot_q2_workplace_landscape()[0],
+    'q2_tech': lambda: plot_q2_workplace_landscape()[1],
+    'q3_family_history': plot_q3_family_history,
+    'q4_formal_support': plot_q4_formal_support,
+    'q5_care_options': plot_q5_care_options_by_size,
+    'q6_leave_treatment': plot_q6_leave_vs_treatment,
+    'q7_family_treatment': plot_q7_treatment_vs_family_history,
+    'q8_interference_treatment': plot_q8_work_interference_vs_treatment,
+    'q9_gender_disparity': plot_q9_gender_disparity_under_interference,
+    'q10_consequences': plot_q10_mental_vs_physical_consequences,
+    'q11_fear_treatment': plot_q11_fear_vs_treatment,
+    'q12_trust_circle': plot_q12_trust_circle,
+    'q13_seriousness': plot_q13_seriousness_perception,
+    'q14_witnessed_by_tech': plot_q14_witnessed_consequences_by_tech,
+    'q15_witnessing_treatment': plot_q15_witnessing_vs_treatment,
+    'q16_remote_treatment': plot_q16_remote_work_vs_treatment,
+    'q17_remote_leave': plot_q17_remote_work_vs_leave,
+    'q18_top_factors': plot_q18_summary_top_factors,
+    'summary_benefits': plot_summary_benefits_vs_treatment,
+    'summary_trend': plot_summary_kpi_trend,
+}
+
 # -------------------------------------------------------------------- #
 # --- CONSOLIDATED TEST BLOCK ---
 # --- Uncomment the functions you want to test ---
@@ -1,11 +1,524 @@
 # File Path: employee_wellness_project/app.py
 # This is the main Flask application file.
 
-from flask import Flask, render_template, url_for
+from __future__ import annotations
+
+import functools
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import Future, as_completed
+from typing import TYPE_CHECKING, Callable
+
+from flask import (Flask, Response, abort, g, has_request_context, jsonify, make_response, render_template,
+                   request, stream_with_context, url_for)
+from flask import before_render_template, template_rendered
 import analysis as an # We import our analysis file and give it a shorter name 'an'
+from chart_api import (ENCODINGS, chart_embed, chart_etag, chart_fragment, chart_message, chart_slot,
+                       choose_encoding, compress, figure_json, figure_version, plotlyjs_tag, template_json,
+                       template_script, template_version)
+from chart_cache import ChartCache
+from chart_executor import ChartExecutor, default_workers
+from lazy_loading import lazy_import
+from registry import DatasetRegistry
+from reloader import DatasetReloader, ReloadRefused
+from instrumentation import (REQUEST_SECONDS, RENDER_SECONDS, SamplingProfiler, chart_timer, end_request,
+                             phase, record, render_metrics, server_timing, start_request)
+
+# Loaded on first use, like the dataset (see lazy_loading.py): the index page
+# and /api/ready are served without pandas or Plotly
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+if TYPE_CHECKING:
+    from dataset import Dataset
+    from sql_backend import SqlDataset
 
 # Initialize the Flask application
 app = Flask(__name__)
+# 'api': pages embed a placeholder that fetches /api/chart/<id> (cacheable, 304-able)
+# 'inline': pages embed the full figure HTML, as fig.to_html() produces it
+# 'static': pages fetch pre-built files from STATIC_CHART_URL (see export_static.py)
+# 'stream': the page shell and KPIs are sent at once; each chart follows in the
+#           same response as soon as its figure is built
+app.config['CHART_EMBED'] = 'api'
+app.config['STATIC_CHART_URL'] = '/charts/{chart_id}.json'
+# Figure JSON leaves out the layout template every chart shares; pages load it once
+# from /api/chart-template (from STATIC_TEMPLATE_URL in 'static' mode)
+app.config['STATIC_TEMPLATE_URL'] = '/charts/template.json'
+# A page's charts and KPIs are built concurrently by CHART_WORKERS threads; anything
+# not ready after CHART_TIMEOUT seconds is replaced by a placeholder. With
+# CHART_PROCESSES > 0, inline figure HTML is built in that many worker processes,
+# which load the data from its file (scripts using this need an `if __name__ == '__main__':` guard).
+app.config['CHART_WORKERS'] = default_workers()
+app.config['CHART_TIMEOUT'] = 10.0
+app.config['CHART_PROCESSES'] = 0
+# Requests slower than PROFILE_SLOW_REQUESTS seconds (None: profiler off) have their
+# sampled stacks written to PROFILE_DIR as flamegraph-ready .folded files
+app.config['PROFILE_SLOW_REQUESTS'] = None
+app.config['PROFILE_DIR'] = 'profiles'
+app.config['PROFILE_INTERVAL'] = 0.005
+# Extra datasets (one per business unit / survey wave) served under /d/<dataset>/...:
+# ids mapped to cleaned CSV paths, plus every <id>.csv in DATASET_DIR. They load on
+# first use; the least recently used are dropped beyond DATASET_MEMORY_BUDGET bytes.
+app.config['DATASETS'] = {}
+app.config['DATASET_DIR'] = 'datasets'
+app.config['DATASET_MEMORY_BUDGET'] = 2 * 1024 ** 3
+# 'memory': those datasets are loaded into memory (Dataset)
+# 'mmap':   their snapshot columns are memory-mapped, shared by all worker processes
+# 'sqlite': they are queried in place from an SQLite file built next to the CSV
+#           (SqlDataset, see sql_backend.py), for datasets larger than RAM
+app.config['DATASET_BACKEND'] = 'memory'
+# A refreshed cleaned CSV is loaded in the background and swapped in while the old
+# version keeps serving (see reloader.py): on POST /api/admin/reload, or when the
+# watcher, polling every DATA_RELOAD_INTERVAL seconds (None: off), sees the file
+# change. With RELOAD_WARM_CHARTS the new version's charts are rendered before the swap.
+app.config['DATA_RELOAD_INTERVAL'] = None
+app.config['RELOAD_WARM_CHARTS'] = True
+# With RELOAD_ALLOW_FORCE, POST /api/admin/reload?force=1 also reloads a dataset
+# holding responses appended in memory, dropping them
+app.config['RELOAD_ALLOW_FORCE'] = False
+# Routes that change data answer only requests carrying ADMIN_TOKEN in an
+# X-Admin-Token header (and none while it is unset). POST /api/responses is also
+# off unless ALLOW_APPENDS is set. Request bodies over MAX_CONTENT_LENGTH bytes are refused (413).
+app.config['ADMIN_TOKEN'] = None
+app.config['ALLOW_APPENDS'] = False
+app.config['MAX_CONTENT_LENGTH'] = 1024 * 1024
+# The default dataset's cleaned CSV, loaded by create_app(). With PRELOAD it then
+# builds the dataset's aggregates and renders every chart before serving, for the
+# extra datasets listed in PRELOAD_DATASETS too. PRELOAD_BACKGROUND does that on a
+# thread instead (for servers that don't fork), with /api/ready answering 503 until done.
+app.config['DATA_PATH'] = an.DATA_PATH
+app.config['PRELOAD'] = True
+app.config['PRELOAD_DATASETS'] = []
+app.config['PRELOAD_BACKGROUND'] = False
+
+# Rendered chart HTML/JSON, keyed on chart id and the dataset fingerprint
+# (plus the segment, when the page is filtered); the current and previous
+# version of each source file are kept
+chart_cache = ChartCache(maxsize=256)
+
+# Shown in place of a chart that a small segment doesn't have the answers for
+EMPTY_SEGMENT_HTML = '<p class="text-muted">Not enough responses in this segment for this chart.</p>'
+
+# Shown in place of a chart that took longer than CHART_TIMEOUT to build
+TIMEOUT_HTML = '<p class="text-muted">This chart is taking longer than usual; reload the page to see it.</p>'
+
+# Shown in place of a streamed chart whose build failed (the page is already on its way)
+ERROR_HTML = '<p class="text-muted">This chart could not be built.</p>'
+
+_executor = None
+_registry = None
+_reloader = None
+# 'cold' until create_app() runs, then 'loading' and 'ready' (or 'failed')
+_startup = {'state': 'cold'}
+
+
+def executor() -> ChartExecutor:
+    """Returns the shared page executor, created from app.config on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ChartExecutor(app.config['CHART_WORKERS'], app.config['CHART_TIMEOUT'],
+                                  app.config['CHART_PROCESSES'])
+    return _executor
+
+
+def _locate_dataset(dataset_id: str) -> str | None:
+    if dataset_id in app.config['DATASETS']:
+        return app.config['DATASETS'][dataset_id]
+    if dataset_id.startswith('.'):
+        return None
+    path = os.path.join(app.config['DATASET_DIR'], f'{dataset_id}.csv')
+    return path if os.path.isfile(path) else None
+
+
+def dataset_loader(backend: str | None = None) -> Callable[[str], Dataset | SqlDataset]:
+    """The loader of the extra datasets, for the given backend (default: app.config['DATASET_BACKEND'])."""
+    from dataset import Dataset  # imported here, as they load pandas
+    from sql_backend import SqlDataset
+    return {
+        'memory': Dataset.load,
+        'mmap': functools.partial(Dataset.load, mmap=True),
+        'sqlite': SqlDataset.load,
+    }[backend or app.config['DATASET_BACKEND']]
+
+
+def dataset_registry() -> DatasetRegistry:
+    """Returns the registry of datasets served under /d/<dataset>/ ('default' is analysis.dataset)."""
+    global _registry
+    if _registry is None:
+        _registry = DatasetRegistry(_locate_dataset, app.config['DATASET_MEMORY_BUDGET'], dataset_loader())
+        _registry.pin('default', an.dataset)
+    return _registry
+
+
+def prepare_snapshot(dataset_id: str, path: str) -> None:
+    """
+    Builds a dataset's columnar snapshot, if it is stale, before it is loaded
+    memory-mapped; loading never builds one (see snapshot.ensure_snapshot).
+    """
+    from snapshot import ensure_snapshot  # imported here, as it loads pandas
+    if (an.MEMORY_MAP if dataset_id == 'default' else app.config['DATASET_BACKEND'] == 'mmap'):
+        ensure_snapshot(path)
+
+
+def _reload_dataset(dataset_id: str, path: str) -> Dataset | SqlDataset:
+    prepare_snapshot(dataset_id, path)
+    return an.load_dataset(path) if dataset_id == 'default' else dataset_loader()(path)
+
+
+def _install_dataset(dataset_id: str, data: Dataset | SqlDataset) -> None:
+    if dataset_id == 'default':
+        an.dataset = data  # first, so a registry created here pins it rather than loading DATA_PATH
+    dataset_registry().replace(dataset_id, data)
+
+
+def render_charts(dataset_id: str, data: Dataset | SqlDataset) -> int:
+    """
+    Renders every chart of a dataset version into the chart cache, as the
+    pages will ask for it: HTML when embedded inline, otherwise JSON (and, for
+    /api/chart, its payload in the preferred encoding). Runs on the calling
+    thread, one chart at a time. Returns the number of charts rendered.
+    """
+    if app.config['CHART_EMBED'] == 'inline':
+        render = chart_html
+    elif app.config['CHART_EMBED'] == 'api':
+        render = functools.partial(chart_payload, encoding=ENCODINGS[0])
+    else:
+        render = chart_json
+    rendered = 0
+    with an.use(data):
+        for chart_id in an.CHARTS:
+            try:
+                render(chart_id)
+                rendered += 1
+            except Exception:
+                app.logger.exception("rendering chart %s of dataset %r failed", chart_id, dataset_id)
+    return rendered
+
+
+def warm_charts(dataset_id: str, data: Dataset | SqlDataset) -> None:
+    """Renders a reloaded dataset's charts before it is swapped in (on the reload thread), if RELOAD_WARM_CHARTS."""
+    if app.config['RELOAD_WARM_CHARTS']:
+        render_charts(dataset_id, data)
+
+
+def dataset_reloader() -> DatasetReloader:
+    """Returns the hot reloader of the registry's datasets, created on first use."""
+    global _reloader
+    if _reloader is None:
+        _reloader = DatasetReloader(dataset_registry(), _reload_dataset, warm_charts, _install_dataset)
+    return _reloader
+
+
+def routed_dataset():
+    """The dataset named in the URL (/d/<dataset>/...), or the default dataset."""
+    dataset_id = g.get('dataset_id')
+    if dataset_id is None:
+        return an.dataset
+    try:
+        return dataset_registry().get(dataset_id)
+    except KeyError:
+        abort(make_response(jsonify(error=f"unknown dataset: {dataset_id}"), 404))
+
+
+def _cache_name(chart_id: str) -> str:
+    segment_key = an.current().segment_key
+    return f'{chart_id}?{segment_key}' if segment_key else chart_id
+
+
+def _cache_kind(kind: str) -> str:
+    # Cached output is keyed on the code that wrote it too, as the ETags are
+    return f'{kind}@{figure_version()}'
+
+
+def _cache_scope() -> str:
+    return an.current().path or ''
+
+
+def _render_html(chart_id: str) -> str:
+    try:
+        with chart_timer(chart_id):
+            fig = an.CHARTS[chart_id]()
+            phase('to_html')
+            return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    except (KeyError, IndexError, ValueError):
+        if not an.current().segment_key:
+            raise
+        return EMPTY_SEGMENT_HTML
+
+
+class WorkerDataMismatch(Exception):
+    """Raised in a chart worker process that can't load the version of the data a request asked for."""
+
+
+# Datasets loaded by this chart worker process, by (path, backend)
+_worker_datasets: dict[tuple[str, str], Dataset | SqlDataset] = {}
+
+
+def _render_html_in_worker(chart_id: str, path: str, backend: str, fingerprint: str,
+                           filters: dict[str, list[str]], query: str | None = None) -> str:
+    """
+    Process-pool entry point: renders a chart of the dataset at path (loaded
+    with the given backend, 'default' for analysis.load_dataset) and segment.
+    The worker keeps the dataset loaded and reloads it when the request asks
+    for another version; raises WorkerDataMismatch if the file doesn't hold it.
+    """
+    data = _worker_datasets.get((path, backend))
+    if data is None or data.fingerprint() != fingerprint:
+        data = an.load_dataset(path) if backend == 'default' else dataset_loader(backend)(path)
+        _worker_datasets[(path, backend)] = data
+    if data.fingerprint() != fingerprint:
+        raise WorkerDataMismatch(f"{path} holds {data.fingerprint()}, not {fingerprint}")
+    with an.use(data.select(filters, query) if filters or query else data):
+        return _render_html(chart_id)
+
+
+def _render_html_in_process(chart_id: str) -> str:
+    """
+    Renders a chart in the process pool, which loads the data from its file;
+    on this thread when the workers can't load this version of it (appends
+    kept only in memory, or a file that changed since it was loaded).
+    """
+    data = an.current()
+    root = getattr(data, 'parent', data)
+    if root.path is None or (root.revision and not root.appends_persist):
+        return _render_html(chart_id)
+    dataset_id = g.get('dataset_id')
+    backend = 'default' if dataset_id in (None, 'default') else app.config['DATASET_BACKEND']
+    try:
+        return executor().run_in_process(_render_html_in_worker, chart_id, root.path, backend,
+                                         root.fingerprint(), getattr(data, 'filters', {}),
+                                         getattr(data, 'query', None))
+    except WorkerDataMismatch:
+        return _render_html(chart_id)
+
+
+def chart_html(chart_id: str) -> str:
+    """Returns the embeddable HTML for a registered chart, served from the cache."""
+    def render():
+        # Warm-ups (outside a request) render here, so no pool is started before a prefork server forks
+        if not app.config['CHART_PROCESSES'] or not has_request_context():
+            return _render_html(chart_id)
+        return _render_html_in_process(chart_id)
+    return chart_cache.get(_cache_name(chart_id), _cache_kind('html'), an.data_fingerprint(), render, _cache_scope())
+
+
+def chart_json(chart_id: str) -> str:
+    """Returns the Plotly JSON for a registered chart, served from the cache."""
+    def render():
+        with chart_timer(chart_id):
+            fig = an.CHARTS[chart_id]()
+            phase('to_json')
+            return figure_json(fig)
+    return chart_cache.get(_cache_name(chart_id), _cache_kind('json'), an.data_fingerprint(), render, _cache_scope())
+
+
+def chart_payload(chart_id: str, encoding: str) -> bytes:
+    """Returns the chart JSON compressed for the given Content-Encoding, served from the cache."""
+    def render():
+        body = chart_json(chart_id).encode('utf-8')
+        with chart_timer(chart_id, 'compress'):
+            return compress(body, encoding)
+    return chart_cache.get(_cache_name(chart_id), _cache_kind(f'json.{encoding}'), an.data_fingerprint(), render,
+                           _cache_scope())
+
+
+def chart_block(chart_id: str) -> str:
+    """
+    Returns what a template embeds for a chart, according to app.config['CHART_EMBED'].
+    The pre-built 'static' files only hold the whole default dataset, so a
+    segment or another dataset is embedded as in 'api' mode.
+    """
+    segment_key = an.current().segment_key
+    if app.config['CHART_EMBED'] == 'inline':
+        return chart_html(chart_id)
+    if app.config['CHART_EMBED'] == 'stream':
+        return chart_slot(chart_id)
+    if app.config['CHART_EMBED'] == 'static' and not segment_key and g.get('dataset_id') in (None, 'default'):
+        return chart_embed(chart_id, app.config['STATIC_CHART_URL'].format(chart_id=chart_id),
+                           app.config['STATIC_TEMPLATE_URL'])
+    src = url_for('chart_api', chart_id=chart_id)
+    return chart_embed(chart_id, f'{src}?{segment_key}' if segment_key else src,
+                       url_for('chart_template', v=template_version()))
+
+
+def _timed_kpi(name: str, fn: Callable[[], str]) -> str:
+    with chart_timer(f'kpi_{name}'):
+        return fn()
+
+
+def build_page(chart_ids: list[str], kpis: dict[str, Callable[[], str]] | None = None) -> tuple[list[str], dict[str, str]]:
+    """
+    Builds a page's chart blocks and KPIs concurrently. Returns the blocks in
+    the order of chart_ids and the KPI values by name; whatever misses the
+    page timeout is replaced by a placeholder ('n/a' for a KPI).
+
+    In 'stream' mode only the KPIs are waited for: the charts are started in
+    the background and render_page() streams them after the page shell.
+    """
+    kpis = kpis or {}
+    tasks = {f'kpi:{name}': functools.partial(_timed_kpi, name, fn) for name, fn in kpis.items()}
+    if app.config['CHART_EMBED'] != 'stream':
+        tasks.update({f'chart:{chart_id}': functools.partial(chart_block, chart_id) for chart_id in chart_ids})
+
+    def fallback(name, error):
+        if not isinstance(error, TimeoutError):
+            raise error
+        app.logger.warning("%s timed out after %ss", name, executor().timeout)
+        return 'n/a' if name.startswith('kpi:') else TIMEOUT_HTML
+
+    # Flask keeps the request context in context variables too, so url_for()
+    # works inside the tasks just like the active segment does.
+    results = executor().map(tasks, fallback)
+    if app.config['CHART_EMBED'] == 'stream':
+        g.pending_charts = {executor().submit(functools.partial(_streamed_chart, chart_id)): chart_id
+                            for chart_id in chart_ids}
+        return [chart_block(chart_id) for chart_id in chart_ids], {name: results[f'kpi:{name}'] for name in kpis}
+    return ([results[f'chart:{chart_id}'] for chart_id in chart_ids],
+            {name: results[f'kpi:{name}'] for name in kpis})
+
+
+def _streamed_chart(chart_id: str) -> str | None:
+    """Builds a chart's figure JSON for streaming; None when the segment can't support it."""
+    try:
+        return chart_json(chart_id)
+    except (KeyError, IndexError, ValueError):
+        if not an.current().segment_key:
+            raise
+        return None
+
+
+def _stream_charts(head: str, pending: dict[Future, str], tail: str):
+    """Yields the page shell, then one fragment per chart in the order they finish."""
+    yield head
+    yield plotlyjs_tag()
+    yield template_script()
+    remaining = dict(pending)
+    try:
+        for future in as_completed(pending, timeout=executor().timeout):
+            chart_id = remaining.pop(future)
+            try:
+                figure = future.result()
+            except Exception:
+                app.logger.exception("streamed chart %s failed", chart_id)
+                yield chart_message(chart_id, ERROR_HTML)
+                continue
+            yield chart_fragment(chart_id, figure) if figure is not None \
+                else chart_message(chart_id, EMPTY_SEGMENT_HTML)
+    except TimeoutError:
+        for chart_id in remaining.values():
+            app.logger.warning("chart:%s timed out after %ss", chart_id, executor().timeout)
+            yield chart_message(chart_id, TIMEOUT_HTML)
+    yield tail
+
+
+def render_page(template: str, **context):
+    """
+    Renders a dashboard template. In 'stream' mode the rendered shell (with
+    empty chart slots) is flushed right away and the charts started by
+    build_page() follow, each as soon as it is ready, before </body>.
+    """
+    html = render_template(template, **context)
+    pending = g.pop('pending_charts', None)
+    if not pending:
+        return html
+    split = html.rfind('</body>')
+    head, tail = (html[:split], html[split:]) if split >= 0 else (html, '')
+    response = Response(stream_with_context(_stream_charts(head, pending, tail)), mimetype='text/html')
+    response.headers['X-Accel-Buffering'] = 'no'  # ask proxies (nginx) not to buffer the stream
+    return response
+
+
+def segmented(view):
+    """
+    Points every chart and KPI of a route at the routed dataset (see
+    routed_dataset) and applies query-string segment filters to it,
+    e.g. /presenter/3?Country=United States&tech_company=Yes. Repeat a key to
+    allow several values for one column. q=<keywords> keeps the respondents
+    whose comment matches (see comment_index.py), e.g. /summary?q="on site"+stigma.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        data = routed_dataset()
+        filters = {col: request.args.getlist(col) for col in request.args if col != 'q'}
+        query = request.args.get('q')
+        if filters or query:
+            try:
+                data = data.select(filters, query)
+            except ValueError as exc:
+                return jsonify(error=str(exc)), 400
+            if data.n_rows == 0:
+                return jsonify(error="no responses match this segment"), 404
+        with an.use(data):
+            return view(*args, **kwargs)
+    return wrapper
+
+
+@app.url_value_preprocessor
+def pull_dataset_id(endpoint, values):
+    """Takes the dataset id out of /d/<dataset>/... URLs, so views don't need the argument."""
+    if values and 'dataset' in values:
+        g.dataset_id = values.pop('dataset')
+
+
+@app.url_defaults
+def add_dataset_id(endpoint, values):
+    """Keeps url_for() inside the routed dataset."""
+    if 'dataset_id' in g and app.url_map.is_endpoint_expecting(endpoint, 'dataset'):
+        values.setdefault('dataset', g.dataset_id)
+
+@app.before_request
+def start_watcher():
+    """Starts the data file watcher with the first request, if DATA_RELOAD_INTERVAL is set."""
+    if app.config['DATA_RELOAD_INTERVAL'] is not None:
+        dataset_reloader().watch(app.config['DATA_RELOAD_INTERVAL'])
+
+# --- Request instrumentation ---
+@app.before_request
+def start_timing():
+    """Starts collecting this request's chart/phase timings (and the profiler, if enabled)."""
+    g.timing_token = start_request()
+    g.started = time.perf_counter()
+    if app.config['PROFILE_SLOW_REQUESTS'] is not None:
+        g.profiler = SamplingProfiler(app.config['PROFILE_INTERVAL']).start()
+
+
+@app.after_request
+def finish_timing(response):
+    """
+    Reports the request's timings in a Server-Timing header, records its latency
+    for /metrics and, when it was slow, dumps its sampled profile.
+    """
+    if 'started' not in g:
+        return response
+    elapsed = time.perf_counter() - g.pop('started')
+    timings = end_request(g.pop('timing_token'))
+    response.headers['Server-Timing'] = server_timing([*timings, ('total', elapsed)])
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_SECONDS.observe(elapsed, route, request.method, str(response.status_code))
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        if elapsed >= app.config['PROFILE_SLOW_REQUESTS']:
+            name = route.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'index'
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            profiler.dump(os.path.join(app.config['PROFILE_DIR'], f'{stamp}-{name}-{elapsed * 1000:.0f}ms.folded'))
+    return response
+
+
+@before_render_template.connect_via(app)
+def _render_started(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def _render_finished(sender, template, context, **extra):
+    seconds = time.perf_counter() - g.pop('render_started', time.perf_counter())
+    RENDER_SECONDS.observe(seconds, template.name)
+    record('render', seconds)
 
 # --- Route for the Homepage / Presentation Lobby ---
 @app.route('/')
@@ -20,126 +533,97 @@ def index():
 # --- Routes for each Presenter's Dashboard ---
 
 @app.route('/presenter/1')
+@segmented
 def presenter_1():
     """Dashboard for Presenter 1: The HR Generalist"""
-    chart1, chart2 = an.plot_q1_demographics()
-    chart3 = an.plot_q3_family_history()
-    
-    # Convert plotly figures to HTML
-    chart1_html = chart1.to_html(full_html=False, include_plotlyjs='cdn')
-    chart2_html = chart2.to_html(full_html=False, include_plotlyjs='cdn')
-    chart3_html = chart3.to_html(full_html=False, include_plotlyjs='cdn')
-
-    return render_template('presenter_dashboard.html', 
-                           presenter_name="The HR Generalist",
-                           q1="What is our demographic profile?", 
-                           q2="What is our workplace landscape?", 
-                           q3="What is the baseline risk from family history?",
-                           chart1=chart1_html, 
-                           chart2=chart2_html, 
-                           chart3=chart3_html)
+    # Charts are built concurrently, once per dataset version, then served from the cache
+    (chart1_html, chart2_html, chart3_html), _ = build_page(['q1_gender', 'q1_age', 'q3_family_history'])
+
+    return render_page('presenter_dashboard.html', 
+                       presenter_name="The HR Generalist",
+                       q1="What is our demographic profile?", 
+                       q2="What is our workplace landscape?", 
+                       q3="What is the baseline risk from family history?",
+                       chart1=chart1_html, 
+                       chart2=chart2_html, 
+                       chart3=chart3_html)
 
 @app.route('/presenter/2')
+@segmented
 def presenter_2():
     """Dashboard for Presenter 2: The Benefits Specialist"""
-    chart1 = an.plot_q4_formal_support()
-    chart2 = an.plot_q5_care_options_by_size()
-    chart3 = an.plot_q6_leave_vs_treatment()
-    
-    chart1_html = chart1.to_html(full_html=False, include_plotlyjs='cdn')
-    chart2_html = chart2.to_html(full_html=False, include_plotlyjs='cdn')
-    chart3_html = chart3.to_html(full_html=False, include_plotlyjs='cdn')
-
-    return render_template('presenter_dashboard.html',
-                           presenter_name="The Benefits Specialist",
-                           q1="How comprehensive is our formal support?",
-                           q2="Are employees aware of care options?",
-                           q3="How does leave accessibility impact treatment?",
-                           chart1=chart1_html, 
-                           chart2=chart2_html, 
-                           chart3=chart3_html)
+    (chart1_html, chart2_html, chart3_html), _ = build_page(['q4_formal_support', 'q5_care_options', 'q6_leave_treatment'])
+
+    return render_page('presenter_dashboard.html',
+                       presenter_name="The Benefits Specialist",
+                       q1="How comprehensive is our formal support?",
+                       q2="Are employees aware of care options?",
+                       q3="How does leave accessibility impact treatment?",
+                       chart1=chart1_html, 
+                       chart2=chart2_html, 
+                       chart3=chart3_html)
 
 # We will continue this pattern for all 6 presenters...
 
 @app.route('/presenter/3')
+@segmented
 def presenter_3():
     """Dashboard for Presenter 3: The Lead Analyst"""
-    chart1 = an.plot_q7_treatment_vs_family_history()
-    chart2 = an.plot_q8_work_interference_vs_treatment()
-    chart3 = an.plot_q9_gender_disparity_under_interference()
+    (chart1_html, chart2_html, chart3_html), _ = build_page(['q7_family_treatment', 'q8_interference_treatment', 'q9_gender_disparity'])
 
-    chart1_html = chart1.to_html(full_html=False, include_plotlyjs='cdn')
-    chart2_html = chart2.to_html(full_html=False, include_plotlyjs='cdn')
-    chart3_html = chart3.to_html(full_html=False, include_plotlyjs='cdn')
-    
-    return render_template('presenter_dashboard.html',
-                           presenter_name="The Lead Analyst",
-                           q1="How does family history impact treatment?",
-                           q2="How does work interference predict treatment?",
-                           q3="Is there a gender disparity in seeking help?",
-                           chart1=chart1_html, 
-                           chart2=chart2_html, 
-                           chart3=chart3_html)
+    return render_page('presenter_dashboard.html',
+                       presenter_name="The Lead Analyst",
+                       q1="How does family history impact treatment?",
+                       q2="How does work interference predict treatment?",
+                       q3="Is there a gender disparity in seeking help?",
+                       chart1=chart1_html, 
+                       chart2=chart2_html, 
+                       chart3=chart3_html)
 
 @app.route('/presenter/4')
+@segmented
 def presenter_4():
     """Dashboard for Presenter 4: The Culture Officer"""
-    chart1 = an.plot_q10_mental_vs_physical_consequences()
-    chart2 = an.plot_q11_fear_vs_treatment()
-    chart3 = an.plot_q12_trust_circle()
-
-    chart1_html = chart1.to_html(full_html=False, include_plotlyjs='cdn')
-    chart2_html = chart2.to_html(full_html=False, include_plotlyjs='cdn')
-    chart3_html = chart3.to_html(full_html=False, include_plotlyjs='cdn')
-
-    return render_template('presenter_dashboard.html',
-                           presenter_name="The Culture Officer",
-                           q1="Is mental health stigma greater than physical?",
-                           q2="Does fear of consequences prevent treatment?",
-                           q3="Who do employees trust more: coworkers or supervisors?",
-                           chart1=chart1_html, 
-                           chart2=chart2_html, 
-                           chart3=chart3_html)
+    (chart1_html, chart2_html, chart3_html), _ = build_page(['q10_consequences', 'q11_fear_treatment', 'q12_trust_circle'])
+
+    return render_page('presenter_dashboard.html',
+                       presenter_name="The Culture Officer",
+                       q1="Is mental health stigma greater than physical?",
+                       q2="Does fear of consequences prevent treatment?",
+                       q3="Who do employees trust more: coworkers or supervisors?",
+                       chart1=chart1_html, 
+                       chart2=chart2_html, 
+                       chart3=chart3_html)
 
 @app.route('/presenter/5')
+@segmented
 def presenter_5():
     """Dashboard for Presenter 5: The Workplace Environment Analyst"""
-    chart1 = an.plot_q13_seriousness_perception()
-    chart2 = an.plot_q14_witnessed_consequences_by_tech()
-    chart3 = an.plot_q15_witnessing_vs_treatment()
-
-    chart1_html = chart1.to_html(full_html=False, include_plotlyjs='cdn')
-    chart2_html = chart2.to_html(full_html=False, include_plotlyjs='cdn')
-    chart3_html = chart3.to_html(full_html=False, include_plotlyjs='cdn')
-
-    return render_template('presenter_dashboard.html',
-                           presenter_name="The Workplace Environment Analyst",
-                           q1="Is mental health taken seriously?",
-                           q2="Are negative consequences witnessed more in tech?",
-                           q3="Does witnessing negativity reduce treatment rates?",
-                           chart1=chart1_html, 
-                           chart2=chart2_html, 
-                           chart3=chart3_html)
+    (chart1_html, chart2_html, chart3_html), _ = build_page(['q13_seriousness', 'q14_witnessed_by_tech', 'q15_witnessing_treatment'])
+
+    return render_page('presenter_dashboard.html',
+                       presenter_name="The Workplace Environment Analyst",
+                       q1="Is mental health taken seriously?",
+                       q2="Are negative consequences witnessed more in tech?",
+                       q3="Does witnessing negativity reduce treatment rates?",
+                       chart1=chart1_html, 
+                       chart2=chart2_html, 
+                       chart3=chart3_html)
 
 @app.route('/presenter/6')
+@segmented
 def presenter_6():
     """Dashboard for Presenter 6: The Modern Workplace Strategist"""
-    chart1 = an.plot_q16_remote_work_vs_treatment()
-    chart2 = an.plot_q17_remote_work_vs_leave()
-    chart3 = an.plot_q18_summary_top_factors()
-
-    chart1_html = chart1.to_html(full_html=False, include_plotlyjs='cdn')
-    chart2_html = chart2.to_html(full_html=False, include_plotlyjs='cdn')
-    chart3_html = chart3.to_html(full_html=False, include_plotlyjs='cdn')
-
-    return render_template('presenter_dashboard.html',
-                           presenter_name="The Modern Workplace Strategist",
-                           q1="How does remote work affect treatment rates?",
-                           q2="Does remote work impact taking leave?",
-                           q3="What are the top 3 summary factors?",
-                           chart1=chart1_html, 
-                           chart2=chart2_html, 
-                           chart3=chart3_html)
+    (chart1_html, chart2_html, chart3_html), _ = build_page(['q16_remote_treatment', 'q17_remote_leave', 'q18_top_factors'])
+
+    return render_page('presenter_dashboard.html',
+                       presenter_name="The Modern Workplace Strategist",
+                       q1="How does remote work affect treatment rates?",
+                       q2="Does remote work impact taking leave?",
+                       q3=f"What are the top {an.TOP_FACTORS} summary factors?",
+                       chart1=chart1_html, 
+                       chart2=chart2_html, 
+                       chart3=chart3_html)
 
 # File Path: employee_wellness_project/app.py
 # (Append this code before the final 'if' block)
@@ -147,40 +631,394 @@ def presenter_6():
 
 # --- Route for the Final Summary Dashboard ---
 @app.route('/summary')
+@segmented
 def summary():
     """Renders the comprehensive summary dashboard page."""
     
-    # 1. Fetch KPIs
-    kpi_treatment = an.get_kpi_treatment_rate()
-    kpi_family_history = an.get_kpi_family_history()
-    kpi_fear = an.get_kpi_fear_consequences()
-
-    # 2. Fetch the 5 selected charts for the dashboard
-    hero_chart = an.plot_q18_summary_top_factors()
-    stigma_chart_1 = an.plot_q10_mental_vs_physical_consequences()
-    stigma_chart_2 = an.plot_q15_witnessing_vs_treatment()
-    drivers_chart_1 = an.plot_q8_work_interference_vs_treatment()
-    drivers_chart_2 = an.plot_summary_benefits_vs_treatment() # Our new chart
-
-    # 3. Convert all charts to HTML
-    hero_html = hero_chart.to_html(full_html=False, include_plotlyjs='cdn')
-    stigma_1_html = stigma_chart_1.to_html(full_html=False, include_plotlyjs='cdn')
-    stigma_2_html = stigma_chart_2.to_html(full_html=False, include_plotlyjs='cdn')
-    drivers_1_html = drivers_chart_1.to_html(full_html=False, include_plotlyjs='cdn')
-    drivers_2_html = drivers_chart_2.to_html(full_html=False, include_plotlyjs='cdn')
+    # 1 & 2. Fetch the KPIs and the 5 selected charts for the dashboard, all at once
+    charts, kpis = build_page(
+        ['q18_top_factors', 'q10_consequences', 'q15_witnessing_treatment',
+         'q8_interference_treatment', 'summary_benefits', 'summary_trend'], # summary_benefits is our new chart
+        {'treatment': an.get_kpi_treatment_rate,
+         'family_history': an.get_kpi_family_history,
+         'fear': an.get_kpi_fear_consequences},
+    )
+    hero_html, stigma_1_html, stigma_2_html, drivers_1_html, drivers_2_html, trend_html = charts
     
     # 4. Render the template with all the necessary data
-    return render_template('summary_dashboard.html',
-                           kpi_treatment=kpi_treatment,
-                           kpi_family_history=kpi_family_history,
-                           kpi_fear=kpi_fear,
-                           hero_chart=hero_html,
-                           stigma_chart_1=stigma_1_html,
-                           stigma_chart_2=stigma_2_html,
-                           drivers_chart_1=drivers_1_html,
-                           drivers_chart_2=drivers_2_html
-                           )
+    return render_page('summary_dashboard.html',
+                       kpi_treatment=kpis['treatment'],
+                       kpi_family_history=kpis['family_history'],
+                       kpi_fear=kpis['fear'],
+                       hero_chart=hero_html,
+                       stigma_chart_1=stigma_1_html,
+                       stigma_chart_2=stigma_2_html,
+                       drivers_chart_1=drivers_1_html,
+                       drivers_chart_2=drivers_2_html,
+                       trend_chart=trend_html
+                       )
+
+# --- JSON chart API ---
+@app.route('/api/chart/<chart_id>')
+@segmented
+def chart_api(chart_id):
+    """
+    Returns a chart's figure JSON, compressed when the client allows it.
+    A strong ETag tied to the dataset version lets browsers revalidate with
+    If-None-Match and get an empty 304 while the data is unchanged.
+    """
+    if chart_id not in an.CHARTS:
+        return jsonify(error=f"unknown chart: {chart_id}"), 404
+    encoding = choose_encoding(request.accept_encodings)
+    etag = chart_etag(an.data_fingerprint(), chart_id, an.current().segment_key, encoding)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            body = chart_payload(chart_id, encoding)
+        except (KeyError, IndexError, ValueError):
+            if not an.current().segment_key:
+                raise
+            return jsonify(error="not enough responses in this segment for this chart"), 422
+        response = Response(body, mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@functools.cache
+def template_payload(encoding: str) -> bytes:
+    """The layout template JSON compressed for the given Content-Encoding (it never changes while running)."""
+    return compress(template_json().encode('utf-8'), encoding)
+
+
+@app.route('/api/chart-template')
+def chart_template():
+    """
+    Returns the layout template shared by every chart's figure JSON. Pages
+    request it with ?v=<template version>, so it can be cached for good.
+    """
+    encoding = choose_encoding(request.accept_encodings)
+    etag = f'{template_version()}-{encoding}'
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(template_payload(encoding), mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+# --- Chart cache statistics ---
+@app.route('/api/cache')
+def cache_stats():
+    """Reports the chart cache size and hit/miss counters."""
+    return jsonify(chart_cache.stats())
+
+def requires_token(switch: str | None = None):
+    """
+    Guards a route that changes data: it answers 403 while app.config[switch]
+    (if given) is off or no ADMIN_TOKEN is configured, and 401 unless the
+    request's X-Admin-Token header holds the token.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if switch is not None and not app.config[switch]:
+                return jsonify(error=f"this endpoint is disabled (set {switch} to enable it)"), 403
+            token = app.config['ADMIN_TOKEN']
+            if not token:
+                return jsonify(error="this endpoint is disabled (no ADMIN_TOKEN is configured)"), 403
+            if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+                return jsonify(error="missing or wrong X-Admin-Token"), 401
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# --- Prometheus metrics ---
+@app.route('/metrics')
+def metrics():
+    """Request, chart-phase and template-render latency histograms in the Prometheus text format."""
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# --- Append new survey responses ---
+@app.route('/api/responses', methods=['POST'])
+@requires_token('ALLOW_APPENDS')
+def append_responses():
+    """
+    Accepts a JSON list of response rows (or {"rows": [...]}) and folds them into
+    the live dataset. The new revision invalidates the chart cache. Off unless
+    ALLOW_APPENDS is set, and only with the ADMIN_TOKEN (see requires_token).
+    """
+    payload = request.get_json(silent=True)
+    rows = payload.get('rows') if isinstance(payload, dict) else payload
+    if not isinstance(rows, list) or not rows:
+        return jsonify(error="expected a non-empty JSON list of response rows"), 400
+    data = routed_dataset()
+    try:
+        with an.use(data):
+            appended = an.append_responses(rows)
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    return jsonify(appended=appended, n_rows=data.n_rows, revision=data.revision), 201
+
+# --- Comment search ---
+@app.route('/api/comments')
+def comment_search():
+    """
+    Searches the routed dataset's raw comments, e.g. /api/comments?q=stress -work&limit=20,
+    and returns the best matches with each respondent's structured answers.
+    Other query-string keys are segment filters, as on the dashboards.
+    """
+    data = routed_dataset()
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify(error="expected a search query in q"), 400
+    index = getattr(data, 'comments', None)
+    if index is None:
+        return jsonify(error="this dataset has no comment index (build it with python ingest.py --full)"), 404
+    try:
+        limit = min(int(request.args.get('limit', 20)), 1000)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify(error="limit and offset must be integers"), 400
+    filters = {col: request.args.getlist(col) for col in request.args if col not in ('q', 'limit', 'offset')}
+
+    rows, scores = index.search(query)
+    keep = rows < data.n_rows
+    if filters:
+        try:
+            keep &= data.mask(filters)[np.minimum(rows, data.n_rows - 1)]
+        except ValueError as exc:
+            return jsonify(error=str(exc)), 400
+    rows, scores = rows[keep], scores[keep]
+    page = slice(offset, offset + limit)
+    answers = data.frame.iloc[rows[page]]
+    answers = answers.astype(object).where(answers.notna(), None).to_dict('records')
+    return jsonify(query=query, total=len(rows), offset=offset, results=[
+        {'row': int(row), 'score': round(float(score), 4), 'comment': index.comment(int(row)), 'answers': answer}
+        for row, score, answer in zip(rows[page], scores[page], answers)
+    ])
+
+# --- KPI trends ---
+# Query-string keys of /api/trend that are not segment filters
+TREND_ARGS = ('q', 'width', 'step', 'start', 'end')
+MAX_TREND_WINDOWS = 10_000
+
+
+def _json_number(value: float) -> float | None:
+    return None if value != value else round(value, 2)  # NaN (no answers) -> null
+
+
+@app.route('/api/trend')
+def kpi_trend():
+    """
+    The summary KPIs over time, from the routed dataset's timeline (see timeline.py).
+    /api/trend?width=7d gives tumbling weekly windows; adding step=1d makes them
+    rolling (a 7-day window ending every day); start= and end= (dates or ISO
+    times, UTC) bound the range. Without width, returns the single window
+    start..end. Other query-string keys are segment filters, as on the dashboards.
+    """
+    data = routed_dataset()
+    filters = {col: request.args.getlist(col) for col in request.args if col not in TREND_ARGS}
+    try:
+        if filters or request.args.get('q'):
+            data = data.select(filters, request.args.get('q'))
+        start, end = (int(pd.Timestamp(request.args[key]).timestamp()) if key in request.args else None
+                      for key in ('start', 'end'))
+        width, step = (int(pd.Timedelta(request.args[key]).total_seconds()) if key in request.args else None
+                       for key in ('width', 'step'))
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    timeline = getattr(data, 'timeline', None)
+    if timeline is None:
+        return jsonify(error="this dataset has no response timestamps (build them with python ingest.py --full)"), 404
+    start = timeline.start if start is None else start
+    end = timeline.end if end is None else end
+    if width is None:
+        window = timeline.window(start, end)
+        return jsonify(start=pd.Timestamp(start, unit='s').isoformat(), end=pd.Timestamp(end, unit='s').isoformat(),
+                       **{name: value if name == 'responses' else _json_number(value) for name, value in window.items()})
+    try:
+        series = timeline.series(width, step, start, end)
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    if len(series) > MAX_TREND_WINDOWS:
+        return jsonify(error=f"more than {MAX_TREND_WINDOWS} windows; use a wider step or a shorter range"), 400
+    windows = [
+        {'start': row.start.isoformat(), 'end': row.end.isoformat(), 'responses': int(row.responses),
+         **{kpi: _json_number(getattr(row, kpi)) for kpi in timeline.kpis}}
+        for row in series.itertuples(index=False)
+    ]
+    return jsonify(width=width, step=step or width, kpis=timeline.kpis, windows=windows)
+
+# --- Count cube drill-down ---
+@app.route('/api/cube')
+def cube_query():
+    """
+    Drill-down / roll-up from the routed dataset's count cube (see count_cube.py):
+    e.g. /api/cube?measure=work_interfere&by=Country&by=Gender&tech_company=Yes
+    counts work_interfere x treatment per Country and Gender among tech company
+    respondents. Every other query-string key filters a dimension. Without a
+    measure, lists the dimensions, measures and materialized cuboids.
+    """
+    data = routed_dataset()
+    if not hasattr(data, 'cube'):
+        return jsonify(error="this dataset's backend has no count cube"), 501
+    cube = data.cube
+    measure = request.args.get('measure')
+    if measure is None:
+        return jsonify(dimensions=cube.dimensions, measures=cube.measures, **cube.stats())
+    by = request.args.getlist('by')
+    filters = {col: request.args.getlist(col) for col in request.args if col not in ('measure', 'by')}
+    try:
+        counts = cube.counts(measure, by, filters)
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    axes = [*by, measure] if measure == cube.target else [*by, measure, cube.target]
+    return jsonify(measure=measure, by=by, filters=filters, axes=axes,
+                   labels={axis: [str(label) for label in cube.labels(axis)] for axis in axes},
+                   counts=counts.tolist())
+
+# --- Loaded datasets ---
+@app.route('/api/datasets')
+def dataset_stats():
+    """Reports which datasets are loaded, their estimated memory and the load/eviction counters."""
+    return jsonify(dataset_registry().stats())
+
+# --- Hot reload ---
+@app.route('/api/admin/reload', methods=['POST'])
+@requires_token()
+def reload_dataset():
+    """
+    Reloads the routed dataset from its file in the background and swaps it
+    in once its charts are warm; ?wait=1 answers only after the swap. ?force=1
+    also reloads a dataset holding appended responses (dropping them), if
+    RELOAD_ALLOW_FORCE is set. Needs the ADMIN_TOKEN (see requires_token).
+    """
+    force = request.args.get('force') == '1'
+    if force and not app.config['RELOAD_ALLOW_FORCE']:
+        return jsonify(error="forced reloads are disabled (set RELOAD_ALLOW_FORCE to enable them)"), 403
+    dataset_id = g.get('dataset_id') or 'default'
+    try:
+        future = dataset_reloader().reload(dataset_id, force=force)
+    except ReloadRefused as exc:
+        return jsonify(error=str(exc)), 409
+    if request.args.get('wait') != '1':
+        return jsonify(dataset=dataset_id, status='reloading'), 202
+    try:
+        data = future.result()
+    except Exception as exc:
+        return jsonify(dataset=dataset_id, error=f"reload failed: {exc}"), 500
+    return jsonify(dataset=dataset_id, status='reloaded', fingerprint=data.fingerprint(), n_rows=data.n_rows)
+
+@app.route('/api/reloads')
+def reload_stats():
+    """Reports the hot reloader's state: running reloads, counters and the last reload of each dataset."""
+    return jsonify(dataset_reloader().stats())
+
+# --- Readiness ---
+@app.route('/api/ready')
+def readiness():
+    """
+    Readiness probe for load balancers: 200 once create_app() has loaded the
+    data (and, with PRELOAD, rendered its charts), 503 before that or if it failed.
+    """
+    state = dict(_startup)
+    return jsonify(ready=state['state'] == 'ready', **state), 200 if state['state'] == 'ready' else 503
+
+# --- Per-dataset routes ---
+# Every dashboard and API route is also served for a registered dataset under
+# /d/<dataset>/..., e.g. /d/sales-2024-wave2/presenter/2
+GLOBAL_ENDPOINTS = {'static', 'metrics', 'cache_stats', 'dataset_stats', 'reload_stats', 'readiness',
+                    'chart_template'}
+for rule in list(app.url_map.iter_rules()):
+    if rule.endpoint not in GLOBAL_ENDPOINTS:
+        app.add_url_rule(f'/d/<dataset>{rule.rule}', rule.endpoint, methods=rule.methods - {'HEAD', 'OPTIONS'})
+
+# -------------------------------------------------------------------- #
+# --- APPLICATION FACTORY ---
+# -------------------------------------------------------------------- #
+# Without a preload, the first request for each page builds the dataset's lazy
+# aggregates and renders its charts. Under a prefork server started with
+#     gunicorn --preload -w 4 'app:create_app()'
+# create_app() does all of it once, in the master: the workers are forked warm
+# and share the loaded data copy-on-write. (Threads and process pools are only
+# started by requests, so none is lost in the fork.)
+
+def build_aggregates(data: Dataset | SqlDataset) -> None:
+    """Builds what a Dataset otherwise builds on first use: its count cube, comment index and timeline."""
+    for name in ('cube', 'comments', 'timeline'):
+        getattr(data, name, None)
+
+
+def preload() -> None:
+    """
+    Loads app.config['DATA_PATH'] as the default dataset (unless it is the
+    one already loaded) and, with PRELOAD, builds the aggregates and renders
+    every chart of it and of the PRELOAD_DATASETS. Progress is reported by /api/ready.
+    """
+    started = time.perf_counter()
+    _startup.clear()
+    _startup.update(state='loading', warm=bool(app.config['PRELOAD']))
+    try:
+        path = app.config['DATA_PATH']
+        loaded = an.loaded_dataset()
+        if loaded is None or loaded.path is None or os.path.abspath(loaded.path) != os.path.abspath(path):
+            prepare_snapshot('default', path)
+        if loaded is None and os.path.abspath(path) == os.path.abspath(an.DATA_PATH):
+            an.default_dataset()
+        elif loaded is None or loaded.path is None or os.path.abspath(loaded.path) != os.path.abspath(path):
+            _install_dataset('default', an.load_dataset(path))
+        datasets = {'default': an.dataset}
+        if app.config['PRELOAD']:
+            for dataset_id in app.config['PRELOAD_DATASETS']:
+                if _locate_dataset(dataset_id):
+                    prepare_snapshot(dataset_id, _locate_dataset(dataset_id))
+                datasets[dataset_id] = dataset_registry().get(dataset_id)
+        report = {}
+        for dataset_id, data in datasets.items():
+            charts = 0
+            if app.config['PRELOAD']:
+                build_aggregates(data)
+                charts = render_charts(dataset_id, data)
+            report[dataset_id] = {'n_rows': data.n_rows, 'fingerprint': data.fingerprint(), 'charts': charts}
+    except Exception as exc:
+        _startup.update(state='failed', error=f'{type(exc).__name__}: {exc}')
+        raise
+    _startup.update(state='ready', datasets=report, seconds=round(time.perf_counter() - started, 3))
+    app.logger.info("preloaded %s in %.2fs", ', '.join(report), _startup['seconds'])
+
+
+def _preload_in_background() -> None:
+    try:
+        preload()
+    except Exception:
+        app.logger.exception("preload failed")
+
+
+def create_app(config: dict | None = None) -> Flask:
+    """
+    Configures the application and loads its data before it serves: config
+    overrides app.config, e.g. create_app({'DATA_PATH': '/srv/wellness/cleaned.csv'}),
+    and preload() runs (on a thread with PRELOAD_BACKGROUND). The routes and
+    caches of this module belong to its one app, so every call configures and
+    returns that same app.
+    """
+    app.config.update(config or {})
+    if app.config['PRELOAD_BACKGROUND']:
+        _startup.update(state='loading')
+        threading.Thread(target=_preload_in_background, name='preload', daemon=True).start()
+    else:
+        preload()
+    return app
+
 
 # This block allows us to run the app directly from the command line
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
@@ -0,0 +1,234 @@
+# File Path: employee_wellness_project/benchmark.py
+# This file times every analysis function and every route at scaled dataset sizes.
+#
+# Each size gets a synthetic dataset drawn (fixed seed) from a model of the cleaned
+# data (see synthetic.py), so every column keeps its distribution and its joint
+# with 'treatment'.
+# Per function the phases are: aggregation and figure build (as marked in
+# analysis.py, see instrumentation.py), to_html and to_json. Per route: the whole
+# request through Flask's test client (chart cache cleared first) and the template
+# render. Results are written as JSON; 'compare' flags regressions between two runs.
+#
+# Usage:
+#   python benchmark.py run [--sizes 1k,100k,1M,10M] [--repeat N] [--only TEXT] [--out FILE]
+#   python benchmark.py compare OLD.json NEW.json [--threshold 0.10]
+
+import fnmatch
+import inspect
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import plotly
+
+import analysis as an
+from chart_api import figure_json
+from dataset import Dataset
+from instrumentation import chart_timer, phase
+from synthetic import SurveyModel
+
+SIZES = ['1k', '100k', '1M', '10M']
+REPEAT = 3
+OUT_PATH = 'benchmark.json'
+
+# A phase only counts as a regression when it is this much slower, relatively and absolutely
+THRESHOLD = 0.10
+MIN_DELTA = 0.0005  # seconds
+
+PAGE_ROUTES = ['/', *[f'/presenter/{n}' for n in range(1, 7)], '/summary']
+
+
+def parse_size(text: str) -> int:
+    """Parses a row count such as '1000', '100k' or '10M'."""
+    units = {'k': 1_000, 'M': 1_000_000, 'G': 1_000_000_000}
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def scaled_dataset(n_rows: int, seed: int = 0) -> Dataset:
+    """Returns a dataset of n_rows synthetic responses modelled on the cleaned data."""
+    model = SurveyModel(an.dataset.frame)
+    return Dataset(model.sample(n_rows, np.random.default_rng(seed)), an.DATA_PATH)
+
+
+def analysis_functions() -> dict[str, Callable]:
+    """Every plot_* and get_kpi_* function in analysis.py, in source order."""
+    functions = [
+        (fn.__code__.co_firstlineno, name, fn)
+        for name, fn in inspect.getmembers(an, inspect.isfunction)
+        if fn.__module__ == an.__name__ and name.startswith(('plot_', 'get_kpi_'))
+    ]
+    return {name: fn for _, name, fn in sorted(functions)}
+
+
+# -------------------------------------------------------------------- #
+# --- PHASE TIMING ---
+# -------------------------------------------------------------------- #
+
+def time_function(fn) -> dict[str, float]:
+    """Runs one analysis function and returns the seconds spent in each phase."""
+    with chart_timer(fn.__name__) as stopwatch:
+        result = fn()
+        if not isinstance(result, str):  # a KPI has no figure to serialize
+            figures = result if isinstance(result, tuple) else (result,)
+            phase('to_html')
+            for fig in figures:
+                fig.to_html(full_html=False, include_plotlyjs='cdn')
+            phase('to_json')
+            for fig in figures:
+                figure_json(fig)
+    phases = ('aggregation', 'figure') if isinstance(result, str) else ('aggregation', 'figure', 'to_html', 'to_json')
+    timings = {name: stopwatch.phases.get(name, 0.0) for name in phases}
+    return {'total': sum(timings.values()), **timings}
+
+
+def time_route(client, path: str, web) -> dict[str, float]:
+    """Requests one route with a cold chart cache and returns its phase timings."""
+    rendered = []
+    original = web.render_template
+
+    def timed_render(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            rendered.append(time.perf_counter() - start)
+
+    web.chart_cache.clear()
+    web.render_template = timed_render
+    try:
+        start = time.perf_counter()
+        response = client.get(path)
+        total = time.perf_counter() - start
+    finally:
+        web.render_template = original
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}")
+    return {'total': total, 'render': sum(rendered)}
+
+
+# -------------------------------------------------------------------- #
+# --- RUN ---
+# -------------------------------------------------------------------- #
+
+def _collect(results: list, size: int, kind: str, name: str, runs: list[dict[str, float]]) -> None:
+    for phase in runs[0]:
+        seconds = [run[phase] for run in runs]
+        results.append({
+            'size': size, 'kind': kind, 'name': name, 'phase': phase,
+            'seconds': statistics.median(seconds), 'first': seconds[0], 'runs': seconds,
+        })
+
+
+def run(sizes: list[int], repeat: int = REPEAT, only: str | None = None) -> dict:
+    """Benchmarks every function and route at each size; returns the results document."""
+    import app as web  # imported here so 'compare' doesn't load Flask or the dataset
+
+    client = web.app.test_client()
+    routes = PAGE_ROUTES + [f'/api/chart/{chart_id}' for chart_id in an.CHARTS]
+    functions = analysis_functions()
+
+    def wanted(name: str) -> bool:
+        return only is None or fnmatch.fnmatch(name, f'*{only}*')
+
+    results = []
+    for size in sizes:
+        start = time.perf_counter()
+        data = scaled_dataset(size)
+        print(f"{size:>12,} rows: dataset built in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        with an.use(data):
+            for name, fn in functions.items():
+                if wanted(name):
+                    _collect(results, size, 'function', name, [time_function(fn) for _ in range(repeat)])
+            for path in routes:
+                if wanted(path):
+                    _collect(results, size, 'route', path, [time_route(client, path, web) for _ in range(repeat)])
+        del data
+
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plotly': plotly.__version__,
+            'repeat': repeat,
+            'sizes': sizes,
+            'embed': web.app.config['CHART_EMBED'],
+        },
+        'results': results,
+    }
+
+
+# -------------------------------------------------------------------- #
+# --- COMPARE ---
+# -------------------------------------------------------------------- #
+
+def compare(old: dict, new: dict, threshold: float = THRESHOLD) -> list[dict]:
+    """
+    Matches the two runs' results on (size, kind, name, phase) and returns the
+    rows whose median got slower by more than threshold (and MIN_DELTA).
+    """
+    key = lambda r: (r['size'], r['kind'], r['name'], r['phase'])
+    before = {key(r): r['seconds'] for r in old['results']}
+    rows = []
+    for result in new['results']:
+        if key(result) not in before:
+            continue
+        old_s, new_s = before[key(result)], result['seconds']
+        ratio = new_s / old_s if old_s else float('inf')
+        rows.append({
+            'size': result['size'], 'kind': result['kind'], 'name': result['name'],
+            'phase': result['phase'], 'old': old_s, 'new': new_s, 'ratio': ratio,
+            'regression': ratio > 1 + threshold and new_s - old_s > MIN_DELTA,
+        })
+    return rows
+
+
+def _print_comparison(rows: list[dict]) -> None:
+    print(f"{'size':>12}  {'name':<48}{'phase':<13}{'old (ms)':>10}{'new (ms)':>10}{'ratio':>8}")
+    for row in sorted(rows, key=lambda r: -r['ratio']):
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['size']:>12,}  {row['name']:<48}{row['phase']:<13}"
+              f"{row['old'] * 1000:>10.2f}{row['new'] * 1000:>10.2f}{row['ratio']:>8.2f}{flag}")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    command = args.pop(0) if args else 'run'
+    options = {}
+    for flag in ('--sizes', '--repeat', '--only', '--out', '--threshold'):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+
+    if command == 'run':
+        sizes = [parse_size(s) for s in options.get('--sizes', ','.join(SIZES)).split(',')]
+        document = run(sizes, int(options.get('--repeat', REPEAT)), options.get('--only'))
+        out = options.get('--out', OUT_PATH)
+        with open(out, 'w', encoding='utf-8') as fh:
+            json.dump(document, fh, indent=1)
+        print(f"Wrote {len(document['results'])} timings to {out}")
+    elif command == 'compare':
+        if len(args) != 2:
+            sys.exit("usage: python benchmark.py compare OLD.json NEW.json [--threshold 0.10]")
+        with open(args[0], encoding='utf-8') as fh:
+            old = json.load(fh)
+        with open(args[1], encoding='utf-8') as fh:
+            new = json.load(fh)
+        rows = compare(old, new, float(options.get('--threshold', THRESHOLD)))
+        _print_comparison(rows)
+        regressions = sum(row['regression'] for row in rows)
+        print(f"{regressions} regression(s) in {len(rows)} comparable timings")
+        sys.exit(1 if regressions else 0)
+    else:
+        sys.exit(f"unknown command: {command}")
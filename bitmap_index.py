@@ -0,0 +1,83 @@
+# File Path: employee_wellness_project/bitmap_index.py
+# This file contains the per-(column, value) bitmap index used for segment filters.
+
+import numpy as np
+
+# Rows are packed in chunks of this size (a multiple of 64) to bound the temporary buffers.
+CHUNK_ROWS = 1 << 18
+
+
+class BitmapIndex:
+    """
+    One packed bitset per (column, value): bit i is set when row i has that value.
+    A segment filter {column: [values]} is answered by OR-ing the bitsets of the
+    values within each column and AND-ing the columns together, 64 rows per
+    machine word, without touching the row-level data.
+
+    The index is built from a CrosstabEngine's integer codes and can be extended
+    in place as the engine grows. A column's bitsets are built the first time a
+    filter uses that column, so a process only holds the bitsets of the columns
+    it has actually filtered on.
+    """
+
+    def __init__(self, engine):
+        self.n_rows = engine.n_rows
+        self._bits: dict[str, np.ndarray] = {}  # column -> (n_labels, capacity_bytes) uint8
+
+    def extend(self, engine) -> None:
+        """Indexes the engine's rows that are not indexed yet (and any new labels)."""
+        for col in self._bits:
+            self._pack(engine, col, self.n_rows)
+        self.n_rows = engine.n_rows
+
+    def _pack(self, engine, col: str, start: int) -> None:
+        """Packs one column's rows from start on into its bitsets, growing them as needed."""
+        n_new = engine.n_rows
+        start -= start % 8  # re-pack the last partial byte
+        n_bytes = -(-n_new // 64) * 8  # whole uint64 words
+        codes, n_labels = engine.codes[col], len(engine.labels[col])
+        bits = self._bits.get(col)
+        if bits is None or bits.shape[0] < n_labels or bits.shape[1] < n_bytes:
+            capacity = n_bytes if bits is None else max(n_bytes, 2 * bits.shape[1])
+            grown = np.zeros((n_labels, capacity), dtype=np.uint8)
+            if bits is not None:
+                grown[:bits.shape[0], :bits.shape[1]] = bits
+            self._bits[col] = bits = grown
+        values = np.arange(n_labels)[:, None]
+        for lo in range(start, n_new, CHUNK_ROWS):
+            hi = min(lo + CHUNK_ROWS, n_new)
+            packed = np.packbits(codes[lo:hi][None, :] == values, axis=1, bitorder='little')
+            bits[:, lo // 8:lo // 8 + packed.shape[1]] = packed
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bits.nbytes for bits in self._bits.values())
+
+    def select(self, engine, filters: dict[str, list[str]]) -> np.ndarray:
+        """
+        Returns the packed bitset (as uint64 words) of the rows matching every
+        column filter; within a column, any of the listed values matches.
+        """
+        n_words = -(-self.n_rows // 64)
+        result = np.full(n_words, ~np.uint64(0), dtype=np.uint64)
+        for col, values in filters.items():
+            codes = engine.labels[col].get_indexer(values)
+            codes = codes[codes >= 0]
+            if col not in self._bits:
+                self._pack(engine, col, 0)
+            words = self._bits[col][:, :n_words * 8].view(np.uint64)
+            if len(codes):
+                result &= np.bitwise_or.reduce(words[codes], axis=0)
+            else:
+                result[:] = 0
+        return result
+
+    def mask(self, engine, filters: dict[str, list[str]]) -> np.ndarray:
+        """Returns the selection as a boolean row mask."""
+        packed = self.select(engine, filters).view(np.uint8)
+        return np.unpackbits(packed, count=self.n_rows, bitorder='little').astype(bool)
+
+    def count(self, engine, filters: dict[str, list[str]]) -> int:
+        """Counts the matching rows straight from the bitset."""
+        packed = self.select(engine, filters).view(np.uint8)
+        return int(np.unpackbits(packed, count=self.n_rows, bitorder='little').sum())
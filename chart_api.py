@@ -0,0 +1,285 @@
+# File Path: employee_wellness_project/chart_api.py
+# This file contains the helpers behind the /api/chart/<chart_id> endpoint:
+# fast, slim figure serialization, response compression, ETags and the lazy-loading embed.
+
+from __future__ import annotations
+
+import base64
+import gzip
+import hashlib
+import json
+import re
+
+from lazy_loading import lazy_import, once
+
+np = lazy_import('numpy')
+plotly = lazy_import('plotly')
+pio = lazy_import('plotly.io')
+
+
+@once
+def create_template_defaults() -> None:
+    """
+    Plotly creates the trace defaults of its shared default template lazily and
+    without a lock: two threads building their first charts at once can each
+    create them, and one build then fails with "Invalid value". Reading every
+    trace type once, before any chart is built, creates them up front. Runs
+    when Plotly's figure modules are first used (see lazy_import).
+    """
+    template = pio.templates[pio.templates.default]
+    for trace_type in template.data._valid_props:
+        template.data[trace_type]
+
+
+go = lazy_import('plotly.graph_objects', setup=create_template_defaults)
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # only gzip is offered
+    brotli = None
+
+# Content-Encodings we can produce, best first
+ENCODINGS = (['br'] if brotli else []) + ['gzip']
+
+JSON_ENGINE = 'orjson' if orjson else 'json'
+
+# Bumped whenever figure_json() changes what it writes (export_static.py rebuilds on it)
+FIGURE_FORMAT = 2
+
+
+def figure_json(fig: go.Figure) -> str:
+    """Serializes a figure to slim Plotly JSON (see slim_figure) with the fastest encoder available."""
+    return pio.to_json(slim_figure(fig), engine=JSON_ENGINE, validate=False)
+
+
+# -------------------------------------------------------------------- #
+# --- SLIM FIGURES ---
+# -------------------------------------------------------------------- #
+# A figure as Plotly serializes it carries the whole default layout template
+# (about 6.5KB, nearly all of a chart's JSON) and a handful of trace attributes
+# set to the values plotly.js falls back to anyway. slim_figure() leaves both
+# out - pages fetch the template once (template_json()) and apply it before
+# drawing - and stores whole-number and float32-exact arrays in the narrowest
+# typed array. Charts are built from aggregates, so what remains depends on the
+# number of categories and bins, not on the number of respondents.
+
+# Trace attributes plotly.js defaults to these values, by trace type ('*': every type)
+TRACE_DEFAULTS = {
+    '*': {'legendgroup': '', 'offsetgroup': '', 'xaxis': 'x', 'yaxis': 'y', 'marker': {'pattern': {'shape': ''}}},
+    'bar': {'textposition': 'auto'},
+    'pie': {'textposition': 'auto', 'domain': {'x': [0.0, 1.0], 'y': [0.0, 1.0]}},
+    'scatter': {'line': {'dash': 'solid'}, 'marker': {'symbol': 'circle'}},
+}
+
+LAYOUT_DEFAULTS = {
+    'xaxis': {'domain': [0.0, 1.0]},
+    'yaxis': {'domain': [0.0, 1.0]},
+}
+
+# numpy dtype -> plotly.js typed array code
+TYPED_ARRAYS = {'int8': 'i1', 'uint8': 'u1', 'int16': 'i2', 'uint16': 'u2', 'int32': 'i4', 'uint32': 'u4',
+                'float32': 'f4', 'float64': 'f8'}
+
+_template = _template_json = _figure_version = None
+
+
+def default_template() -> dict:
+    """The default layout template, as it appears in a serialized figure."""
+    global _template
+    if _template is None:
+        _template = go.Figure().to_dict()['layout']['template']
+    return _template
+
+
+def template_json() -> str:
+    """The default layout template as JSON, which pages apply to every slim figure."""
+    global _template_json
+    if _template_json is None:
+        _template_json = json.dumps(default_template(), separators=(',', ':'))
+    return _template_json
+
+
+def template_version() -> str:
+    """Changes whenever the default template does (e.g. with the Plotly version)."""
+    return hashlib.blake2b(template_json().encode('utf-8'), digest_size=8).hexdigest()
+
+
+def figure_version() -> str:
+    """
+    Identifies the code that writes a chart: the figure JSON format, the
+    default template and the Plotly version. Cached output and ETags include
+    it, so an upgrade never serves figures written the old way.
+    """
+    global _figure_version
+    if _figure_version is None:
+        _figure_version = f'{FIGURE_FORMAT}.{template_version()}.{plotly.__version__}'
+    return _figure_version
+
+
+def _strip_defaults(props: dict, defaults: dict) -> None:
+    """Removes the entries of props equal to defaults, recursing into nested attributes."""
+    for key, default in defaults.items():
+        if key not in props:
+            continue
+        if isinstance(default, dict) and isinstance(props[key], dict) and props[key] != default:
+            _strip_defaults(props[key], default)
+            if not props[key]:
+                del props[key]
+        elif props[key] == default:
+            del props[key]
+
+
+def _narrow(array: np.ndarray) -> np.ndarray:
+    """The array in the narrowest typed array dtype that holds its values exactly."""
+    if not len(array):
+        return array
+    if array.dtype.kind == 'f':
+        if not np.isfinite(array).all():
+            return array
+        if (array == np.round(array)).all() and np.abs(array).max() < 2 ** 31:
+            array = array.astype(np.int64)
+        elif array.dtype == np.float64 and (array.astype(np.float32) == array).all():
+            return array.astype(np.float32)
+        else:
+            return array
+    dtype = np.result_type(np.min_scalar_type(array.min()), np.min_scalar_type(array.max()))
+    return array.astype(dtype) if dtype.name in TYPED_ARRAYS else array
+
+
+def _compact(value):
+    """Re-encodes every typed array (Plotly's {'dtype', 'bdata'} form) in value as narrow as it goes."""
+    if isinstance(value, list):
+        return [_compact(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if 'bdata' in value and value.get('dtype') in TYPED_ARRAYS.values():
+        array = _narrow(np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype']))
+        return {**value, 'dtype': TYPED_ARRAYS[array.dtype.name],
+                'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+    return {key: _compact(item) for key, item in value.items()}
+
+
+def slim_figure(fig: go.Figure) -> dict:
+    """
+    The figure as the dict plotly.js needs to draw it, without the default
+    template and default-valued attributes, and with narrowed typed arrays.
+    A figure with a template of its own keeps it.
+    """
+    figure = fig.to_dict()
+    layout = figure.get('layout', {})
+    if layout.get('template') == default_template():
+        del layout['template']
+    _strip_defaults(layout, LAYOUT_DEFAULTS)
+    traces = []
+    for trace in figure.get('data', []):
+        _strip_defaults(trace, TRACE_DEFAULTS['*'])
+        _strip_defaults(trace, TRACE_DEFAULTS.get(trace.get('type', 'scatter'), {}))
+        # Bars with both x and y are vertical unless told otherwise
+        if trace.get('orientation') == 'v' and 'x' in trace and 'y' in trace:
+            del trace['orientation']
+        traces.append(_compact(trace))
+    figure['data'] = traces
+    return figure
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compresses a response body for the given Content-Encoding."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def choose_encoding(accept_encodings) -> str:
+    """Picks the best encoding the client accepts ('identity' if none)."""
+    for encoding in ENCODINGS:
+        if accept_encodings[encoding]:
+            return encoding
+    return 'identity'
+
+
+def chart_etag(fingerprint: str, chart_id: str, segment_key: str, encoding: str) -> str:
+    """
+    A strong ETag for one representation of a chart: it changes whenever the
+    dataset version, the segment, the content encoding or the code that writes
+    the figure (figure_version()) changes.
+    """
+    variant = hashlib.blake2b(f'{chart_id}?{segment_key}@{figure_version()}'.encode(), digest_size=6).hexdigest()
+    return f'{fingerprint}-{variant}-{encoding}'
+
+
+# -------------------------------------------------------------------- #
+# --- LAZY-LOADING EMBED ---
+# -------------------------------------------------------------------- #
+
+_plotlyjs_tag = None
+
+
+def plotlyjs_tag() -> str:
+    """The same plotly.js CDN <script> tag that fig.to_html(include_plotlyjs='cdn') emits."""
+    global _plotlyjs_tag
+    if _plotlyjs_tag is None:
+        html = go.Figure().to_html(full_html=False, include_plotlyjs='cdn')
+        _plotlyjs_tag = re.search(r'<script charset="utf-8" src="[^"]*"[^>]*></script>', html).group(0)
+    return _plotlyjs_tag
+
+
+def chart_slot(chart_id: str) -> str:
+    """The empty <div> a chart is drawn into."""
+    return f'<div id="chart-{chart_id}" class="plotly-graph-div" style="height:100%; width:100%;"></div>'
+
+
+def _draw(chart_id: str) -> str:
+    """JS function drawing a slim figure into its chart_slot() once the shared template is loaded."""
+    return (
+        f'function (fig) {{ window.chartTemplate.then(function (t) {{ '
+        f'fig.layout.template = fig.layout.template || t; '
+        f'Plotly.newPlot({json.dumps(f"chart-{chart_id}")}, fig.data, fig.layout, {{responsive: true}}); }}); }}'
+    )
+
+
+def chart_embed(chart_id: str, src: str, template_src: str) -> str:
+    """
+    Returns a placeholder <div> plus a small script that fetches the figure JSON
+    from src and draws it, to drop into a template in place of fig.to_html().
+    The layout template is fetched from template_src once per page.
+    """
+    return (
+        f'{plotlyjs_tag()}{chart_slot(chart_id)}'
+        f'<script>window.chartTemplate = window.chartTemplate || fetch({json.dumps(template_src)})'
+        f'.then(function (r) {{ return r.json(); }});'
+        f'fetch({json.dumps(src)}).then(function (r) {{ return r.json(); }}).then({_draw(chart_id)});</script>'
+    )
+
+
+# -------------------------------------------------------------------- #
+# --- STREAMED PAGES ---
+# -------------------------------------------------------------------- #
+
+def template_script() -> str:
+    """A <script> holding the layout template, sent once before a page's streamed charts."""
+    template = template_json().replace('</', '<\\/')
+    return f'<script>window.chartTemplate = Promise.resolve({template});</script>\n'
+
+
+def chart_fragment(chart_id: str, figure: str) -> str:
+    """
+    A <script> that draws a figure (slim Plotly JSON) into its chart_slot(),
+    sent after the page shell and template_script() once the figure is ready.
+    """
+    figure = figure.replace('</', '<\\/')  # keep '</script>' inside strings from closing the tag
+    return f'<script>({_draw(chart_id)})({figure});</script>\n'
+
+
+def chart_message(chart_id: str, html: str) -> str:
+    """A <script> that shows an HTML message in a chart_slot() instead of a figure."""
+    html = json.dumps(html).replace('</', '<\\/')
+    return (
+        f'<script>document.getElementById({json.dumps(f"chart-{chart_id}")}).innerHTML = {html};</script>\n'
+    )
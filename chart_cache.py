@@ -0,0 +1,128 @@
+# File Path: employee_wellness_project/chart_cache.py
+# This file contains the cache for rendered dashboard charts.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+
+# -------------------------------------------------------------------- #
+# --- DATASET FINGERPRINT ---
+# -------------------------------------------------------------------- #
+
+# Content hashes are only recomputed when a file's (mtime, size) changes.
+_hash_memo: dict[str, tuple[tuple[int, int], str]] = {}
+_hash_lock = threading.Lock()
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Returns a short fingerprint of a data file.
+    The cheap os.stat() check runs on every call; the file is only re-hashed
+    when its modification time or size has changed since the last call.
+    """
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _hash_lock:
+        memo = _hash_memo.get(path)
+        if memo is not None and memo[0] == stamp:
+            return memo[1]
+
+    digest = hashlib.blake2b(digest_size=8)
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(block)
+    fingerprint = digest.hexdigest()
+
+    with _hash_lock:
+        _hash_memo[path] = (stamp, fingerprint)
+    return fingerprint
+
+
+# -------------------------------------------------------------------- #
+# --- RENDERED CHART CACHE ---
+# -------------------------------------------------------------------- #
+
+class ChartCache:
+    """
+    A bounded LRU cache of rendered chart output (HTML or JSON strings).
+    Entries are keyed on (chart name, output kind, dataset fingerprint).
+
+    Fingerprints are tracked per scope (the dataset's source, e.g. its CSV
+    path). When a scope shows a new fingerprint, it becomes the scope's current
+    version and the one before it is kept as the previous version, so requests
+    still running against the old data (e.g. during a hot reload) neither see
+    nor evict the new version's charts. Entries of any older version are
+    dropped, so a changed dataset never serves stale charts.
+    """
+
+    def __init__(self, maxsize: int = 64, versions: int = 2):
+        self.maxsize = maxsize
+        self.versions = versions
+        self._entries: OrderedDict[tuple[str, str, str], str] = OrderedDict()
+        self._scopes: dict[str, list[str]] = {}  # scope -> live fingerprints, newest last
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, name: str, kind: str, fingerprint: str, render: Callable[[], str], scope: str = '') -> str:
+        """Returns the cached output for a chart, rendering it on a miss."""
+        key = (name, kind, fingerprint)
+        with self._lock:
+            self._track(scope, fingerprint)
+            output = self._entries.get(key)
+            if output is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return output
+            self.misses += 1
+
+        # Render outside the lock so one slow chart doesn't block the others.
+        output = render()
+
+        with self._lock:
+            if fingerprint in self._scopes.get(scope, ()):
+                self._entries[key] = output
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return output
+
+    def _track(self, scope: str, fingerprint: str) -> None:
+        """Records fingerprint as a live version of scope, retiring the oldest beyond self.versions."""
+        live = self._scopes.setdefault(scope, [])
+        if fingerprint in live:
+            return
+        live.append(fingerprint)
+        retired = set(live[:-self.versions])
+        del live[:-self.versions]
+        stale = [key for key in self._entries if key[2] in retired]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drops every cached entry (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the cache counters as a plain dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'fingerprints': {scope: list(live) for scope, live in self._scopes.items()},
+            }
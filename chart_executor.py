@@ -0,0 +1,82 @@
+# File Path: employee_wellness_project/chart_executor.py
+# This file contains the execution layer that builds a page's charts and KPIs concurrently.
+
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable
+
+
+def default_workers() -> int:
+    return min(8, os.cpu_count() or 1)
+
+
+class ChartExecutor:
+    """
+    Runs the independent pieces of a page (figures, KPIs) at the same time, so
+    a page takes as long as its slowest chart instead of the sum of all charts.
+
+    Tasks fan out over a thread pool; each one sees the caller's context
+    variables (e.g. the active segment). NumPy/pandas release the GIL, so
+    threads are enough for aggregation. For the GIL-bound part (building
+    Plotly figures and serializing them) run_in_process() hands work to one
+    long-lived process pool. Its workers are started by a fork server (spawned
+    where there is none), never forked from the threaded server process, so
+    they inherit no state: each task names the data it needs (see
+    app._render_html_in_worker) and the worker loads it itself.
+    """
+
+    def __init__(self, max_workers: int | None = None, timeout: float = 10.0, processes: int = 0):
+        self.max_workers = max_workers or default_workers()
+        self.timeout = timeout
+        self.processes = processes
+        self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='chart')
+        self._procs: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def map(self, tasks: dict[str, Callable[[], object]],
+            fallback: Callable[[str, BaseException], object]) -> dict[str, object]:
+        """
+        Runs every task concurrently and returns {name: result}. A task that
+        fails, or is still running once the page's timeout has elapsed, gets
+        fallback(name, error) instead; a timed-out task keeps running in the
+        background (and can still warm the chart cache).
+        """
+        futures = {name: self.submit(task) for name, task in tasks.items()}
+        deadline = time.monotonic() + self.timeout
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout as exc:
+                results[name] = fallback(name, exc)
+            except Exception as exc:
+                results[name] = fallback(name, exc)
+        return results
+
+    def submit(self, task: Callable[[], object]) -> Future:
+        """Starts one task in the thread pool, in a copy of the caller's context."""
+        return self._threads.submit(contextvars.copy_context().run, task)
+
+    def run_in_process(self, fn: Callable, *args):
+        """
+        Runs fn(*args) in the process pool (started on first use) and waits for
+        the result. fn must be a module-level function, and args must carry
+        everything it needs: workers share no memory with this process.
+        """
+        with self._lock:
+            if self._procs is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._procs = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+            future: Future = self._procs.submit(fn, *args)
+        return future.result(timeout=self.timeout)
+
+    def shutdown(self) -> None:
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._procs is not None:
+            self._procs.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,428 @@
+# File Path: employee_wellness_project/comment_index.py
+# This file contains the inverted index over the raw survey's free-text comments.
+#
+# The cleaned data drops the comments column; this index keeps it searchable.
+# Each comment is tokenized (lower-cased runs of letters and digits), every token
+# is reduced to its Porter stem, and the stems are recorded as positional
+# postings: per term, the sorted rows whose comment contains it and, per row, the
+# word positions where it occurs. A row is the response's position in the
+# cleaned data, so search hits can narrow the dashboards like any segment filter.
+#
+# ingest.py builds the index in the same streaming pass that cleans the raw
+# export, one chunk at a time; an incremental ingest adds a segment for the new
+# rows. A segment is stored as flat arrays (CSR offsets into the posting rows and
+# into the positions) that are memory-mapped when the index is opened. A query
+# intersects sorted row arrays and checks phrase adjacency on the positions of the
+# remaining candidates only, so it costs O(postings of its terms) however many
+# comments there are. Matches are ranked with BM25.
+#
+# Query syntax: every word must occur (in any inflection: "stressed" matches
+# "stress"), "a quoted phrase" must occur in that order, and -word excludes.
+#
+# Usage:
+#   python comment_index.py [cleaned_csv] QUERY...
+
+import functools
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from snapshot import install_snapshot
+
+INDEX_VERSION = 1
+
+TOKEN = re.compile(r'[a-z0-9]+')
+QUERY_PART = re.compile(r'"([^"]*)"|(-?)([^\s"]+)')
+
+# BM25 parameters
+K1, B = 1.2, 0.75
+
+
+def index_path(cleaned_path: str) -> str:
+    """Returns the directory holding the comment index for a cleaned CSV."""
+    return os.path.splitext(cleaned_path)[0] + '.comments'
+
+
+# -------------------------------------------------------------------- #
+# --- TOKENIZING AND STEMMING ---
+# -------------------------------------------------------------------- #
+
+def _is_consonant(word: str, i: int) -> bool:
+    if word[i] in 'aeiou':
+        return False
+    if word[i] == 'y':
+        return i == 0 or not _is_consonant(word, i - 1)
+    return True
+
+
+def _measure(stem: str) -> int:
+    """Porter's m: the number of vowel-consonant sequences in the stem."""
+    kinds = ''.join('c' if _is_consonant(stem, i) else 'v' for i in range(len(stem)))
+    return kinds.lstrip('c').count('vc') if kinds else 0
+
+
+def _has_vowel(stem: str) -> bool:
+    return any(not _is_consonant(stem, i) for i in range(len(stem)))
+
+
+def _ends_cvc(word: str) -> bool:
+    n = len(word)
+    return (n >= 3 and _is_consonant(word, n - 3) and not _is_consonant(word, n - 2)
+            and _is_consonant(word, n - 1) and word[-1] not in 'wxy')
+
+
+def _ends_double(word: str) -> bool:
+    return len(word) >= 2 and word[-1] == word[-2] and _is_consonant(word, len(word) - 1)
+
+
+def _replace(word: str, rules: list[tuple[str, str]], min_measure: int) -> str:
+    """Applies the first rule whose suffix matches, if the remaining stem is long enough."""
+    for suffix, replacement in rules:
+        if word.endswith(suffix):
+            stem = word[:len(word) - len(suffix)]
+            return stem + replacement if _measure(stem) > min_measure else word
+    return word
+
+
+_STEP2 = [('ational', 'ate'), ('tional', 'tion'), ('enci', 'ence'), ('anci', 'ance'), ('izer', 'ize'),
+          ('abli', 'able'), ('alli', 'al'), ('entli', 'ent'), ('eli', 'e'), ('ousli', 'ous'),
+          ('ization', 'ize'), ('ation', 'ate'), ('ator', 'ate'), ('alism', 'al'), ('iveness', 'ive'),
+          ('fulness', 'ful'), ('ousness', 'ous'), ('aliti', 'al'), ('iviti', 'ive'), ('biliti', 'ble')]
+_STEP3 = [('icate', 'ic'), ('ative', ''), ('alize', 'al'), ('iciti', 'ic'), ('ical', 'ic'),
+          ('ful', ''), ('ness', '')]
+# longest first, so the longest matching suffix is the one tried
+_STEP4 = sorted(['al', 'ance', 'ence', 'er', 'ic', 'able', 'ible', 'ant', 'ement', 'ment', 'ent', 'ion',
+                 'ou', 'ism', 'ate', 'iti', 'ous', 'ive', 'ize'], key=len, reverse=True)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def stem(word: str) -> str:
+    """Reduces a lower-case word to its stem with the Porter (1980) algorithm."""
+    if len(word) <= 2:
+        return word
+    # Step 1a: plurals
+    if word.endswith('sses') or word.endswith('ies'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+    # Step 1b: -eed, -ed, -ing
+    if word.endswith('eed'):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    else:
+        for suffix in ('ed', 'ing'):
+            if word.endswith(suffix) and _has_vowel(word[:-len(suffix)]):
+                word = word[:-len(suffix)]
+                if word.endswith(('at', 'bl', 'iz')):
+                    word += 'e'
+                elif _ends_double(word) and word[-1] not in 'lsz':
+                    word = word[:-1]
+                elif _measure(word) == 1 and _ends_cvc(word):
+                    word += 'e'
+                break
+    # Step 1c: y -> i
+    if word.endswith('y') and _has_vowel(word[:-1]):
+        word = word[:-1] + 'i'
+    # Steps 2-3: derivational suffixes
+    word = _replace(word, _STEP2, 0)
+    word = _replace(word, _STEP3, 0)
+    # Step 4: remove a suffix from long stems
+    for suffix in _STEP4:
+        if word.endswith(suffix):
+            rest = word[:len(word) - len(suffix)]
+            if _measure(rest) > 1 and (suffix != 'ion' or rest.endswith(('s', 't'))):
+                word = rest
+            break
+    # Step 5: final -e and -ll
+    if word.endswith('e'):
+        rest = word[:-1]
+        if _measure(rest) > 1 or (_measure(rest) == 1 and not _ends_cvc(rest)):
+            word = rest
+    if _measure(word) > 1 and word.endswith('ll'):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits text into stemmed terms, in order."""
+    return [stem(token) for token in TOKEN.findall(text.lower())]
+
+
+# -------------------------------------------------------------------- #
+# --- BUILDING ---
+# -------------------------------------------------------------------- #
+
+class CommentIndexBuilder:
+    """
+    Collects the comments of consecutive rows, one chunk at a time, and writes
+    them out as one index segment. Rows without a comment are skipped.
+    """
+
+    def __init__(self, first_row: int = 0):
+        self.first_row = first_row
+        self.next_row = first_row
+        self._vocab: dict[str, int] = {}
+        self._terms: list[np.ndarray] = []
+        self._rows: list[np.ndarray] = []
+        self._positions: list[np.ndarray] = []
+        self._comment_rows: list[np.ndarray] = []
+        self._lengths: list[np.ndarray] = []
+        self._texts: list[str] = []
+
+    def add(self, comments: pd.Series) -> None:
+        """Indexes the comments of the next len(comments) rows (missing or blank: no comment)."""
+        rows = np.arange(self.next_row, self.next_row + len(comments))
+        self.next_row += len(comments)
+        texts = pd.Series(comments.to_numpy(), index=rows).dropna().astype(str)
+        texts = texts[texts.str.strip() != '']
+        if texts.empty:
+            return
+        tokens = texts.str.lower().str.findall(TOKEN).explode().dropna()
+        lengths = tokens.groupby(level=0).size().reindex(texts.index, fill_value=0)
+        distinct = tokens.unique()
+        stems = tokens.map(dict(zip(distinct, map(stem, distinct))))
+        for term in stems.unique():
+            if term not in self._vocab:
+                self._vocab[term] = len(self._vocab)
+        self._terms.append(stems.map(self._vocab).to_numpy(np.int32))
+        self._rows.append(tokens.index.to_numpy(np.int64))
+        self._positions.append(tokens.groupby(level=0).cumcount().to_numpy(np.int32))
+        self._comment_rows.append(texts.index.to_numpy(np.int64))
+        self._lengths.append(lengths.to_numpy(np.int32))
+        self._texts.extend(texts)
+
+    def write(self, path: str) -> dict:
+        """Writes the segment's arrays into directory path; returns its metadata."""
+        os.makedirs(path, exist_ok=True)
+        empty = [np.zeros(0, dtype=np.int32)]
+        terms = np.concatenate(self._terms or empty)
+        rows = np.concatenate(self._rows or empty).astype(np.int64)
+        positions = np.concatenate(self._positions or empty)
+        # Tokens are in row order, and in position order within a row, so a stable
+        # sort by term gives each term's occurrences sorted by (row, position)
+        order = np.argsort(terms, kind='stable')
+        terms, rows, positions = terms[order], rows[order], positions[order]
+        starts = np.flatnonzero(np.r_[True, (terms[1:] != terms[:-1]) | (rows[1:] != rows[:-1])]) \
+            if len(terms) else np.zeros(0, dtype=np.int64)
+        doc_ptr = np.searchsorted(terms[starts], np.arange(len(self._vocab) + 1))
+        blob = [text.encode('utf-8') for text in self._texts]
+
+        arrays = {
+            'doc_ptr': doc_ptr.astype(np.int64),
+            'docs': rows[starts].astype(np.int64),
+            'pos_ptr': np.r_[starts, len(terms)].astype(np.int64),
+            'positions': positions.astype(np.int32),
+            'comment_rows': np.concatenate(self._comment_rows or [np.zeros(0, dtype=np.int64)]),
+            'lengths': np.concatenate(self._lengths or empty),
+            'text_ptr': np.cumsum([0, *map(len, blob)]).astype(np.int64),
+        }
+        for name, values in arrays.items():
+            np.save(os.path.join(path, f'{name}.npy'), values)
+        with open(os.path.join(path, 'texts.bin'), 'wb') as fh:
+            fh.write(b''.join(blob))
+        with open(os.path.join(path, 'terms.json'), 'w', encoding='utf-8') as fh:
+            json.dump(list(self._vocab), fh)
+        return {'first_row': self.first_row, 'n_rows': self.next_row - self.first_row,
+                'n_comments': len(self._texts), 'n_tokens': int(len(terms))}
+
+
+def _write_meta(path: str, meta: dict) -> None:
+    tmp = os.path.join(path, 'meta.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(meta, fh, indent=1)
+    os.replace(tmp, os.path.join(path, 'meta.json'))
+
+
+def write_index(builder: CommentIndexBuilder, path: str) -> None:
+    """Writes a builder as a new single-segment index, swapped in atomically over any old one."""
+    tmp = tempfile.mkdtemp(prefix='.comments-', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        segment = builder.write(os.path.join(tmp, 'seg-0'))
+        _write_meta(tmp, {'version': INDEX_VERSION, 'segments': [{'name': 'seg-0', **segment}]})
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    install_snapshot(tmp, path)
+
+
+def append_segment(builder: CommentIndexBuilder, path: str) -> None:
+    """Adds a builder's rows to an existing index as a new segment (meta.json is the commit point)."""
+    meta = read_meta(path)
+    name = f"seg-{len(meta['segments'])}"
+    segment = builder.write(os.path.join(path, name))
+    meta['segments'].append({'name': name, **segment})
+    _write_meta(path, meta)
+
+
+def truncate_index(path: str, n_segments: int) -> None:
+    """Drops the segments after the first n_segments (e.g. appended by an interrupted ingest)."""
+    meta = read_meta(path)
+    dropped, meta['segments'] = meta['segments'][n_segments:], meta['segments'][:n_segments]
+    if dropped:
+        _write_meta(path, meta)
+        for segment in dropped:
+            shutil.rmtree(os.path.join(path, segment['name']), ignore_errors=True)
+
+
+def read_meta(path: str) -> dict:
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+# -------------------------------------------------------------------- #
+# --- SEARCHING ---
+# -------------------------------------------------------------------- #
+
+class _Segment:
+    """One segment's arrays (memory-mapped) and term dictionary."""
+
+    def __init__(self, path: str):
+        for name in ('doc_ptr', 'docs', 'pos_ptr', 'positions', 'comment_rows', 'lengths', 'text_ptr'):
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+        with open(os.path.join(path, 'terms.json'), encoding='utf-8') as fh:
+            self.terms = {term: i for i, term in enumerate(json.load(fh))}
+        self._texts = os.path.join(path, 'texts.bin')
+
+    def postings(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        """The rows containing a term and the index of each posting (for its positions)."""
+        t = self.terms.get(term)
+        if t is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        lo, hi = int(self.doc_ptr[t]), int(self.doc_ptr[t + 1])
+        return np.asarray(self.docs[lo:hi]), np.arange(lo, hi)
+
+    def phrase_rows(self, terms: list[str], candidates: np.ndarray) -> np.ndarray:
+        """The candidate rows where the terms occur at consecutive positions."""
+        keys = None
+        for i, term in enumerate(terms):
+            docs, postings = self.postings(term)
+            at = postings[np.searchsorted(docs, candidates)]
+            starts, stops = self.pos_ptr[at], self.pos_ptr[at + 1]
+            counts = stops - starts
+            flat = np.repeat(stops - counts.cumsum(), counts) + np.arange(counts.sum())
+            owner = np.repeat(np.arange(len(candidates)), counts)
+            term_keys = owner.astype(np.int64) << 32 | (self.positions[flat].astype(np.int64) + len(terms) - i)
+            keys = term_keys if keys is None else np.intersect1d(keys, term_keys, assume_unique=True)
+        return candidates[np.unique(keys >> 32)] if keys is not None else candidates
+
+    def text(self, row: int) -> str | None:
+        i = np.searchsorted(self.comment_rows, row)
+        if i == len(self.comment_rows) or self.comment_rows[i] != row:
+            return None
+        lo, hi = int(self.text_ptr[i]), int(self.text_ptr[i + 1])
+        with open(self._texts, 'rb') as fh:
+            fh.seek(lo)
+            return fh.read(hi - lo).decode('utf-8')
+
+
+def parse_query(query: str) -> tuple[list[list[str]], list[str]]:
+    """Splits a query into required term groups (words and phrases) and excluded terms."""
+    required, excluded = [], []
+    for phrase, negated, word in QUERY_PART.findall(query):
+        terms = tokenize(phrase or word)
+        if not terms:
+            continue
+        if negated:
+            excluded.extend(terms)
+        else:
+            required.append(terms)
+    return required, excluded
+
+
+class CommentIndex:
+    """A comment index opened from disk: its segments, searched together."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.meta = read_meta(path)
+        self.segments = [_Segment(os.path.join(path, s['name'])) for s in self.meta['segments']]
+        self.n_rows = max((s['first_row'] + s['n_rows'] for s in self.meta['segments']), default=0)
+        self.n_comments = sum(s['n_comments'] for s in self.meta['segments'])
+        n_tokens = sum(s['n_tokens'] for s in self.meta['segments'])
+        self._average_length = n_tokens / self.n_comments if self.n_comments else 0.0
+
+    def search(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the rows whose comment matches the query, best first, and their
+        BM25 scores. A query without any searchable word matches nothing.
+        """
+        required, excluded = parse_query(query)
+        if not required:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        terms = sorted({term for group in required for term in group})
+        df = {term: sum(len(seg.postings(term)[0]) for seg in self.segments) for term in terms}
+        # rarest first, so the candidate set shrinks as fast as possible
+        terms.sort(key=df.get)
+
+        rows, scores = [], []
+        for seg in self.segments:
+            candidates = None
+            for term in terms:
+                docs = seg.postings(term)[0]
+                candidates = docs if candidates is None else np.intersect1d(candidates, docs, assume_unique=True)
+            for group in required:
+                if len(group) > 1 and len(candidates):
+                    candidates = seg.phrase_rows(group, candidates)
+            for term in excluded:
+                candidates = np.setdiff1d(candidates, seg.postings(term)[0], assume_unique=True)
+            if not len(candidates):
+                continue
+            length = np.asarray(seg.lengths)[np.searchsorted(seg.comment_rows, candidates)]
+            score = np.zeros(len(candidates))
+            for term in terms:
+                docs, postings = seg.postings(term)
+                at = postings[np.searchsorted(docs, candidates)]
+                tf = (seg.pos_ptr[at + 1] - seg.pos_ptr[at]).astype(np.float64)
+                idf = np.log(1 + (self.n_comments - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / self._average_length))
+            rows.append(candidates)
+            scores.append(score)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        order = np.lexsort((rows, -scores))
+        return rows[order], scores[order]
+
+    def matching_rows(self, query: str) -> np.ndarray:
+        """The rows whose comment matches the query, sorted by row."""
+        return np.sort(self.search(query)[0])
+
+    def comment(self, row: int) -> str | None:
+        """The comment of a row (None if it has none)."""
+        for seg, meta in zip(self.segments, self.meta['segments']):
+            if meta['first_row'] <= row < meta['first_row'] + meta['n_rows']:
+                return seg.text(row)
+        return None
+
+
+def open_index(cleaned_path: str) -> CommentIndex | None:
+    """Opens the comment index of a cleaned CSV, or returns None if it has none."""
+    path = index_path(cleaned_path)
+    if not os.path.exists(os.path.join(path, 'meta.json')):
+        return None
+    index = CommentIndex(path)
+    return index if index.meta.get('version') == INDEX_VERSION else None
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    cleaned = args.pop(0) if args and args[0].endswith('.csv') else 'cleaned_employee_data.csv'
+    if not args:
+        sys.exit("usage: python comment_index.py [cleaned_csv] QUERY...")
+    index = open_index(cleaned)
+    if index is None:
+        sys.exit(f"{cleaned} has no comment index; run python ingest.py --full to build it")
+    start = time.perf_counter()
+    rows, scores = index.search(' '.join(args))
+    elapsed = time.perf_counter() - start
+    for row, score in zip(rows[:10], scores[:10]):
+        text = index.comment(int(row)).replace('\n', ' ')
+        print(f"row {row:>7}  {score:5.2f}  {text[:100]}")
+    print(f"{len(rows):,} of {index.n_comments:,} comments match ({elapsed * 1000:.2f} ms)")
@@ -0,0 +1,303 @@
+# File Path: employee_wellness_project/count_cube.py
+# This file contains the materialized count cube behind drill-down and roll-up queries.
+#
+# The cube counts every answer column against the target ('treatment') for every
+# combination of the demographic and workplace dimensions. It is stored sparsely:
+# a cuboid (the counts grouped by one subset of the dimensions) keeps one row per
+# combination that actually occurs, as a sorted array of mixed-radix keys plus a
+# (keys x cells) count matrix holding all answer columns side by side.
+#
+# The base cuboid (all dimensions) is counted from the crosstab engine's codes.
+# Of the other 2^d - 1 cuboids, rollups are materialized greedily by benefit per
+# stored key: each step adds the cuboid that most reduces the rows scanned by all
+# queries it could answer, until the rollups hold ROLLUP_BUDGET times as many keys
+# as the base cuboid. A query is answered from the smallest materialized cuboid
+# that has every dimension it groups or filters by, so it scans a few hundred
+# keys rather than the respondents.
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ('Country', 'state', 'Gender', 'Age', 'no_employees', 'tech_company', 'remote_work')
+
+# Age is banded: a value v falls in band i when AGE_EDGES[i - 1] <= v < AGE_EDGES[i]
+AGE_EDGES = (25, 35, 45, 55)
+
+# Keys the rollups may hold, as a multiple of the base cuboid's keys
+ROLLUP_BUDGET = 1.0
+
+
+def band_labels(edges: tuple[int, ...]) -> list[str]:
+    inner = [f'{lo}-{hi - 1}' for lo, hi in zip(edges, edges[1:])]
+    return [f'<{edges[0]}', *inner, f'{edges[-1]}+']
+
+
+class _Cuboid:
+    """The counts grouped by one subset of the dimensions (given as a bitmask over them)."""
+
+    def __init__(self, mask: int, dims: list[int], radix: list[int], keys: np.ndarray, counts: np.ndarray):
+        self.mask = mask
+        self.dims = dims
+        self.radix = radix
+        self.keys = keys
+        self.counts = counts
+        self.codes = _decode(keys, radix)
+
+
+def _strides(radix: list[int]) -> np.ndarray:
+    return np.cumprod([1, *radix[:0:-1]])[::-1].astype(np.int64)
+
+
+def _decode(keys: np.ndarray, radix: list[int]) -> list[np.ndarray]:
+    """Splits mixed-radix keys back into one code array per dimension."""
+    return [(keys // stride) % size for stride, size in zip(_strides(radix), radix)]
+
+
+def _group(keys: np.ndarray, counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sums the count rows sharing a key; returns the sorted unique keys and their counts."""
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+    return keys[starts], np.add.reduceat(counts[order], starts, axis=0) if len(keys) else counts[:0]
+
+
+class CountCube:
+    """
+    Answer x target counts for every combination of the dimensions, with
+    partial rollups, built from a CrosstabEngine and extended in place as the
+    engine grows. Missing dimension values are counted in a slot of their own,
+    so rollups stay exact; they are left out of grouped results, as in
+    DataFrame.groupby.
+    """
+
+    def __init__(self, engine, dimensions: tuple[str, ...] = DIMENSIONS, budget: float = ROLLUP_BUDGET):
+        self.dimensions = [d for d in dimensions if d in engine.labels or d in engine.values]
+        self.target = engine.target if engine.target in engine.labels else None
+        self.measures = [c for c in engine.labels if c not in self.dimensions]
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._build(engine)
+
+    # --- Building ---
+
+    def _shape(self, engine) -> tuple[list[pd.Index], dict[str, pd.Index]]:
+        dim_labels = [pd.Index(band_labels(AGE_EDGES)) if d in engine.values else engine.labels[d]
+                      for d in self.dimensions]
+        return dim_labels, {m: engine.labels[m] for m in self.measures}
+
+    def _build(self, engine) -> None:
+        self.dim_labels, self.measure_labels = self._shape(engine)
+        # one extra slot per categorical dimension for missing values
+        self._radix = [len(labels) + (d not in engine.values) for d, labels in zip(self.dimensions, self.dim_labels)]
+        n_target = len(self.measure_labels[self.target]) if self.target else 1
+        widths = [len(labels) * (n_target if m != self.target else 1) for m, labels in self.measure_labels.items()]
+        self._offsets = dict(zip(self.measures, np.cumsum([0, *widths[:-1]])))
+        self._widths = dict(zip(self.measures, widths))
+        self.n_cells = int(sum(widths))
+
+        full = (1 << len(self.dimensions)) - 1
+        base = self._count(engine, 0, engine.n_rows)
+        self._cuboids = {full: base}
+        self.n_rows = engine.n_rows
+        for mask in self._choose_rollups(base):
+            self._cuboids[mask] = self._rollup(base, mask)
+        self._answer_from = self._route()
+
+    def _count(self, engine, start: int, stop: int) -> _Cuboid:
+        """Counts rows start:stop of the engine into a base cuboid."""
+        key = np.zeros(stop - start, dtype=np.int64)
+        for d, stride, size in zip(self.dimensions, _strides(self._radix), self._radix):
+            if d in engine.values:
+                codes = np.searchsorted(AGE_EDGES, engine.values[d][start:stop], side='right')
+            else:
+                codes = engine.codes[d][start:stop].astype(np.int64)
+                codes[codes < 0] = size - 1
+            key += codes * stride
+        keys, inverse = np.unique(key, return_inverse=True)
+        counts = np.zeros((len(keys), self.n_cells), dtype=np.int64)
+        target = engine.codes[self.target][start:stop] if self.target else None
+        for m in self.measures:
+            codes = engine.codes[m][start:stop]
+            if self.target and m != self.target:
+                answered = (codes >= 0) & (target >= 0)
+                cells = codes[answered].astype(np.int64) * len(self.measure_labels[self.target]) + target[answered]
+            else:
+                answered = codes >= 0
+                cells = codes[answered].astype(np.int64)
+            width = self._widths[m]
+            table = np.bincount(inverse[answered] * width + cells, minlength=len(keys) * width)
+            offset = self._offsets[m]
+            counts[:, offset:offset + width] = table.reshape(len(keys), width)
+        full = (1 << len(self.dimensions)) - 1
+        return _Cuboid(full, list(range(len(self.dimensions))), list(self._radix), keys, counts)
+
+    def _rollup(self, parent: _Cuboid, mask: int) -> _Cuboid:
+        """Sums a cuboid over the dimensions outside mask."""
+        dims = [i for i in range(len(self.dimensions)) if mask >> i & 1]
+        radix = [self._radix[i] for i in dims]
+        key = np.zeros(len(parent.keys), dtype=np.int64)
+        for i, stride in zip(dims, _strides(radix)):
+            key += parent.codes[parent.dims.index(i)] * stride
+        keys, counts = _group(key, parent.counts)
+        return _Cuboid(mask, dims, radix, keys, counts)
+
+    def _choose_rollups(self, base: _Cuboid) -> list[int]:
+        """
+        Picks the cuboids to materialize (greedy benefit per key, within the
+        budget), from the exact number of keys of every cuboid.
+        """
+        if not len(base.keys):
+            return []
+        n_masks = 1 << len(self.dimensions)
+        sizes = np.array([len(np.unique(self._rollup_keys(base, mask))) for mask in range(n_masks)], dtype=np.float64)
+        masks = np.arange(n_masks)
+        answers = (masks[None, :] & ~masks[:, None]) == 0  # answers[v, w]: cuboid v can answer queries on w
+        cost = np.full(n_masks, sizes[-1])  # keys scanned per query, answering everything from the base
+        chosen, spent, allowance = [], 0.0, self.budget * sizes[-1]
+        while True:
+            benefit = (answers * np.maximum(cost[None, :] - sizes[:, None], 0)).sum(axis=1)
+            benefit[sizes + spent > allowance] = 0
+            best = int(np.argmax(benefit / sizes))
+            if benefit[best] <= 0:
+                return chosen
+            chosen.append(best)
+            spent += sizes[best]
+            cost = np.where(answers[best], np.minimum(cost, sizes[best]), cost)
+
+    def _rollup_keys(self, base: _Cuboid, mask: int) -> np.ndarray:
+        key = np.zeros(len(base.keys), dtype=np.int64)
+        for i in range(len(self.dimensions)):
+            if mask >> i & 1:
+                key = key * self._radix[i] + base.codes[i]
+        return key
+
+    def _route(self) -> list[int]:
+        """For every subset of the dimensions, the smallest materialized cuboid that has them all."""
+        route = []
+        for needed in range(1 << len(self.dimensions)):
+            candidates = [mask for mask in self._cuboids if mask & needed == needed]
+            route.append(min(candidates, key=lambda mask: len(self._cuboids[mask].keys)))
+        return route
+
+    # --- Incremental maintenance ---
+
+    def extend(self, engine) -> None:
+        """
+        Counts the engine's rows that are not in the cube yet into every
+        materialized cuboid, in O(batch) plus O(cuboid) where a combination
+        occurs for the first time. A label never seen before changes the
+        cube's layout, so it is rebuilt instead.
+        """
+        with self._lock:
+            if engine.n_rows == self.n_rows:
+                return
+            dim_labels, measure_labels = self._shape(engine)
+            if (any(len(a) != len(b) for a, b in zip(dim_labels, self.dim_labels))
+                    or any(len(measure_labels[m]) != len(self.measure_labels[m]) for m in self.measures)):
+                self._build(engine)
+                return
+            batch = self._count(engine, self.n_rows, engine.n_rows)
+            for mask, cuboid in list(self._cuboids.items()):
+                added = batch if mask == batch.mask else self._rollup(batch, mask)
+                pos = np.searchsorted(cuboid.keys, added.keys)
+                if len(cuboid.keys) and (cuboid.keys[np.minimum(pos, len(cuboid.keys) - 1)] == added.keys).all():
+                    cuboid.counts[pos] += added.counts
+                    continue
+                keys, counts = _group(np.concatenate([cuboid.keys, added.keys]),
+                                      np.concatenate([cuboid.counts, added.counts]))
+                self._cuboids[mask] = _Cuboid(mask, cuboid.dims, cuboid.radix, keys, counts)
+            self.n_rows = engine.n_rows
+
+    # --- Queries ---
+
+    def labels(self, name: str) -> pd.Index:
+        """The labels of a dimension (bands, for Age) or of an answer column."""
+        if name in self.dimensions:
+            return self.dim_labels[self.dimensions.index(name)]
+        return self.measure_labels[name]
+
+    def counts(self, measure: str, by: tuple[str, ...] | list[str] = (),
+               filters: dict[str, list[str]] | None = None) -> np.ndarray:
+        """
+        Counts of a measure (an answer column) grouped by some dimensions,
+        among the respondents matching filters on the dimensions (values
+        within a dimension are OR-ed, dimensions AND-ed). The result has one
+        axis per by dimension, then the measure's labels and, unless the
+        measure is the target, the target's labels.
+        Raises ValueError for an unknown measure or dimension.
+        """
+        filters = filters or {}
+        if measure not in self.measures:
+            raise ValueError(f"unknown measure: {measure!r}")
+        unknown = [d for d in [*by, *filters] if d not in self.dimensions]
+        if unknown:
+            raise ValueError(f"not a cube dimension: {unknown}")
+
+        with self._lock:
+            needed = 0
+            for d in [*by, *filters]:
+                needed |= 1 << self.dimensions.index(d)
+            cuboid = self._cuboids[self._answer_from[needed]]
+            offset, width = self._offsets[measure], self._widths[measure]
+            counts = cuboid.counts[:, offset:offset + width]
+
+            keep = None
+            for d, values in filters.items():
+                i = self.dimensions.index(d)
+                allowed = np.zeros(self._radix[i], dtype=bool)
+                codes = self.labels(d).get_indexer(values)
+                allowed[codes[codes >= 0]] = True
+                hit = allowed[cuboid.codes[cuboid.dims.index(i)]]
+                keep = hit if keep is None else keep & hit
+            if keep is not None:
+                counts = counts[keep]
+
+            group = np.zeros(len(counts), dtype=np.int64)
+            shape = []
+            for d in by:
+                i = self.dimensions.index(d)
+                codes = cuboid.codes[cuboid.dims.index(i)]
+                group = group * self._radix[i] + (codes[keep] if keep is not None else codes)
+                shape.append(self._radix[i])
+            n_groups = int(np.prod(shape, dtype=np.int64))
+            flat = np.bincount((group[:, None] * width + np.arange(width)).ravel(), weights=counts.ravel(),
+                               minlength=n_groups * width)
+
+        cells = [len(self.measure_labels[measure])]
+        if self.target and measure != self.target:
+            cells.append(len(self.measure_labels[self.target]))
+        table = flat.astype(np.int64).reshape(*shape, *cells)
+        # drop the missing-value slots of the by dimensions
+        return table[tuple(slice(len(self.labels(d))) for d in by)]
+
+    def crosstab(self, row: str, col: str, filters: dict[str, list[str]] | None = None) -> np.ndarray:
+        """
+        The (row labels x col labels) table of a dimension or answer column
+        against an answer column or the target, e.g. ('tech_company',
+        'obs_consequence') or ('Country', 'treatment'). Answer columns are
+        counted against the target, so respondents without a target answer are
+        left out.
+        """
+        if row in self.dimensions:
+            table = self.counts(col, (row,), filters)
+            return table if col == self.target else table.sum(axis=2)
+        if col == self.target:
+            return self.counts(row, (), filters)
+        raise ValueError(f"crosstab needs a dimension or the target among ({row!r}, {col!r})")
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.keys.nbytes + c.counts.nbytes + sum(a.nbytes for a in c.codes) for c in self._cuboids.values())
+
+    def stats(self) -> dict:
+        """Sizes of the materialized cuboids, by the dimensions they group by."""
+        with self._lock:
+            return {
+                'n_rows': self.n_rows,
+                'n_cells': self.n_cells,
+                'nbytes': self.nbytes,
+                'cuboids': {','.join(self.dimensions[i] for i in c.dims) or '(total)': len(c.keys)
+                            for c in sorted(self._cuboids.values(), key=lambda c: -len(c.keys))},
+            }
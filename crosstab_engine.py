@@ -0,0 +1,346 @@
+# File Path: employee_wellness_project/crosstab_engine.py
+# This file contains the vectorized contingency-table engine used by analysis.py.
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Rows are aggregated in blocks so the combined-code buffer stays bounded.
+BLOCK_ROWS = 1_000_000
+
+
+def encode_column(series: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """
+    Encodes a column to integer codes plus the labels they index.
+    Missing values get the code -1, as in pandas. Categorical columns reuse
+    their existing (narrow) codes; everything else is factorized in sorted
+    order, which is the label order pd.crosstab produces.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.array.codes, series.cat.categories  # not .cat.codes, which copies
+    codes, labels = pd.factorize(series, sort=True)
+    return codes.astype(np.int32, copy=False), pd.Index(labels)
+
+
+def _is_categorical(series: pd.Series) -> bool:
+    return isinstance(series.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(series)
+
+
+class _Lazy(dict):
+    """A dict that computes (and keeps) a missing entry with factory(key) on first lookup."""
+
+    def __init__(self, factory):
+        super().__init__()
+        self._factory = factory
+
+    def __missing__(self, key):
+        value = self[key] = self._factory(key)
+        return value
+
+
+def _histogram(values: np.ndarray) -> tuple[int, np.ndarray]:
+    """Unit-width histogram of integer values, as (smallest value, counts)."""
+    if not len(values):
+        return 0, np.zeros(0, dtype=np.int64)
+    base = int(values.min())
+    return base, np.bincount(values - base)
+
+
+def _merge_histograms(a: tuple[int, np.ndarray], b: tuple[int, np.ndarray]) -> tuple[int, np.ndarray]:
+    """Adds two unit-width histograms that may start at different values."""
+    base = min(a[0], b[0])
+    size = max(a[0] + len(a[1]), b[0] + len(b[1])) - base
+    merged = np.zeros(size, dtype=np.int64)
+    for start, counts in (a, b):
+        merged[start - base:start - base + len(counts)] += counts
+    return base, merged
+
+
+class CrosstabEngine:
+    """
+    Encodes every categorical column of a frame once, then answers crosstab
+    queries from integer count tables built with np.bincount.
+
+    On construction, the table of every column against the target column
+    ('treatment') is built in a single pass: each row block is turned into one
+    array of combined codes (table offset + row code * width + column code)
+    and counted with one bincount call. Other column pairs are counted on
+    first use and memoized.
+
+    The engine also keeps per-column value counts and unit-width histograms of
+    the integer columns (Age). append() folds a batch of new rows into all of
+    these stored counts, so it costs O(batch) rather than O(dataset).
+    subset() gives a read-only engine over selected rows (a segment).
+    """
+
+    def __init__(self, frame: pd.DataFrame, target: str = 'treatment'):
+        self.target = target
+        self.n_rows = len(frame)
+        self.codes: dict[str, np.ndarray] = {}
+        self.labels: dict[str, pd.Index] = {}
+        self.values: dict[str, np.ndarray] = {}  # integer columns, e.g. Age
+        self._buffers: dict[str, np.ndarray] = {}
+        self._value_counts: dict[str, np.ndarray] = {}
+        self._histograms: dict[str, tuple[int, np.ndarray]] = {}
+        self._tables: dict[tuple[str, str], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+        for col in frame.columns:
+            series = frame[col]
+            if _is_categorical(series):
+                codes, labels = encode_column(series)
+                self.codes[col] = self._buffers[col] = codes
+                self.labels[col] = labels
+                self._value_counts[col] = np.bincount(codes[codes >= 0], minlength=len(labels))
+            elif pd.api.types.is_integer_dtype(series) and len(series):
+                values = series.to_numpy()
+                self.values[col] = self._buffers[col] = values
+                self._histograms[col] = _histogram(values)
+
+        if target in self.codes:
+            pairs = [(col, target) for col in self.codes if col != target]
+            self._tables.update(zip(pairs, self._count_pairs(pairs)))
+
+    # --- Counting ---
+
+    def _count_pairs(self, pairs: list[tuple[str, str]], mask: np.ndarray | None = None,
+                     codes: dict[str, np.ndarray] | None = None) -> list[np.ndarray]:
+        """Counts several (row, col) tables with one bincount per row block."""
+        codes = codes if codes is not None else self.codes
+        n_rows = len(codes[pairs[0][0]])
+        shapes = [(len(self.labels[r]), len(self.labels[c])) for r, c in pairs]
+        offsets = np.cumsum([0] + [nr * nc for nr, nc in shapes])
+        dump = int(offsets[-1])  # rows with a missing value land in this extra bin
+        totals = np.zeros(dump + 1, dtype=np.int64)
+
+        rows = np.flatnonzero(mask[:n_rows]) if mask is not None else None
+        n = len(rows) if rows is not None else n_rows
+        for start in range(0, n, BLOCK_ROWS):
+            block = slice(start, min(start + BLOCK_ROWS, n))
+            take = rows[block] if rows is not None else block
+            combined = np.empty((len(pairs), block.stop - block.start), dtype=np.int64)
+            for i, (r, c) in enumerate(pairs):
+                rc, cc = codes[r][take], codes[c][take]
+                np.multiply(rc, shapes[i][1], out=combined[i], dtype=np.int64)
+                combined[i] += cc
+                combined[i] += offsets[i]
+                combined[i][(rc < 0) | (cc < 0)] = dump
+            totals += np.bincount(combined.ravel(), minlength=dump + 1)
+
+        return [totals[offsets[i]:offsets[i + 1]].reshape(shapes[i]) for i in range(len(pairs))]
+
+    def counts(self, row: str, col: str, mask: np.ndarray | None = None) -> np.ndarray:
+        """Returns the raw (row labels x col labels) count matrix."""
+        if mask is not None:
+            return self._count_pairs([(row, col)], mask)[0]
+        key = (row, col)
+        if key not in self._tables:
+            with self._lock:
+                if key not in self._tables:
+                    self._tables[key] = self._count_pairs([key])[0]
+        return self._tables[key]
+
+    def target_tables(self) -> dict[str, np.ndarray]:
+        """Every categorical column's table against the target; any not stored yet are counted in one pass."""
+        pairs = [(col, self.target) for col in self.labels if col != self.target]
+        with self._lock:
+            missing = [pair for pair in pairs if pair not in self._tables]
+            if missing:
+                self._tables.update(zip(missing, self._count_pairs(missing)))
+            return {row: self._tables[(row, col)] for row, col in pairs}
+
+    # --- Incremental maintenance ---
+
+    def _encode_batch(self, col: str, values: pd.Series) -> np.ndarray:
+        """Encodes new values against a column's labels, adding labels never seen before."""
+        values = values.astype(object)
+        labels = self.labels[col]
+        unseen = pd.Index(values.dropna().unique()).difference(labels)
+        if len(unseen):
+            labels = labels.append(unseen)
+            self.labels[col] = labels
+            grow = len(labels) - len(self._value_counts[col])
+            self._value_counts[col] = np.pad(self._value_counts[col], (0, grow))
+            for (r, c), table in list(self._tables.items()):
+                if col in (r, c):
+                    self._tables[(r, c)] = np.pad(table, ((0, grow if r == col else 0),
+                                                          (0, grow if c == col else 0)))
+        codes = labels.get_indexer(values)
+        buffer = self._buffers[col]
+        if codes.max(initial=-1) > np.iinfo(buffer.dtype).max:
+            self._buffers[col] = buffer = buffer.astype(np.int32)
+        return codes.astype(buffer.dtype)
+
+    def _extend(self, store: dict[str, np.ndarray], col: str, new: np.ndarray) -> None:
+        """Appends to a column array, growing its buffer geometrically (amortized O(batch))."""
+        n, k = self.n_rows, len(new)
+        buffer = self._buffers[col]
+        if n + k > len(buffer):
+            grown = np.empty(max(2 * len(buffer), n + k, 1024), dtype=buffer.dtype)
+            grown[:n] = buffer[:n]
+            self._buffers[col] = buffer = grown
+        buffer[n:n + k] = new
+        store[col] = buffer[:n + k]
+
+    def append(self, batch: pd.DataFrame) -> None:
+        """Folds a batch of new rows into every stored count."""
+        with self._lock:
+            batch_codes = {col: self._encode_batch(col, batch[col]) for col in self.codes}
+            for col, codes in batch_codes.items():
+                self._value_counts[col] = self._value_counts[col] + np.bincount(
+                    codes[codes >= 0], minlength=len(self.labels[col]))
+            batch_values = {col: batch[col].to_numpy(dtype=self.values[col].dtype) for col in self.values}
+            for col, values in batch_values.items():
+                if len(values):
+                    self._histograms[col] = _merge_histograms(self._histograms[col], _histogram(values))
+            if self._tables:
+                pairs = list(self._tables)
+                for pair, added in zip(pairs, self._count_pairs(pairs, codes=batch_codes)):
+                    self._tables[pair] = self._tables[pair] + added
+            for col, codes in batch_codes.items():
+                self._extend(self.codes, col, codes)
+            for col, values in batch_values.items():
+                self._extend(self.values, col, values)
+            self.n_rows += len(batch)
+
+    def subset(self, rows: np.ndarray) -> 'CrosstabEngine':
+        """
+        Returns a read-only engine over the given row positions. Columns, value
+        counts, histograms and tables are gathered lazily on first use, so a
+        segment only pays for the aggregates its charts actually read.
+        """
+        sub = object.__new__(CrosstabEngine)
+        sub.target = self.target
+        sub.n_rows = len(rows)
+        sub.labels = dict(self.labels)
+        sub.codes = _Lazy(lambda col: self.codes[col][rows])
+        sub.values = _Lazy(lambda col: self.values[col][rows])
+        sub._buffers = {}
+        sub._value_counts = _Lazy(lambda col: np.bincount(
+            sub.codes[col][sub.codes[col] >= 0], minlength=len(sub.labels[col])))
+        sub._histograms = _Lazy(lambda col: _histogram(sub.values[col]))
+        sub._tables = {}
+        sub._lock = threading.Lock()
+        return sub
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the column buffers and the stored counts."""
+        arrays = [*self._buffers.values(), *self._value_counts.values(), *self._tables.values(),
+                  *(counts for _, counts in self._histograms.values())]
+        return sum(a.nbytes for a in arrays)
+
+    # --- Pandas-compatible views ---
+
+    def crosstab(self, row: str, col: str, normalize: bool | str = False,
+                 mask: np.ndarray | None = None) -> pd.DataFrame:
+        """
+        Equivalent of pd.crosstab(df[row], df[col], normalize=normalize),
+        optionally restricted to the rows selected by a boolean mask.
+        Labels that never occur are dropped and the rest are sorted, exactly
+        as pandas does.
+        """
+        table = self.counts(row, col, mask)
+        row_labels, col_labels = self.labels[row], self.labels[col]
+        keep_r = np.flatnonzero(table.sum(axis=1) > 0)
+        keep_c = np.flatnonzero(table.sum(axis=0) > 0)
+        keep_r = keep_r[row_labels[keep_r].argsort()]
+        keep_c = keep_c[col_labels[keep_c].argsort()]
+        table = table[np.ix_(keep_r, keep_c)]
+        values = table.astype(np.float64)
+        if normalize == 'index':
+            values /= values.sum(axis=1, keepdims=True)
+        elif normalize == 'columns':
+            values /= values.sum(axis=0, keepdims=True)
+        elif normalize is True or normalize == 'all':
+            values /= values.sum()
+        else:
+            values = table
+        return pd.DataFrame(
+            values,
+            index=pd.Index(row_labels[keep_r], name=row),
+            columns=pd.Index(col_labels[keep_c], name=col),
+        )
+
+    def value_counts(self, col: str, normalize: bool = False) -> pd.Series:
+        """
+        Equivalent of df[col].value_counts(normalize=normalize) for a category
+        column, from the stored counts: labels that never occur are kept, with
+        a count of 0, after the rest. The index is categorical, as in pandas.
+        """
+        labels = self.labels[col]
+        order = labels.argsort()
+        counts = self._value_counts[col][order]
+        keep = np.argsort(-counts, kind='stable')
+        values = counts[keep] / counts.sum() if normalize else counts[keep]
+        index = pd.CategoricalIndex(pd.Categorical.from_codes(keep, categories=labels[order]), name=col)
+        return pd.Series(values, index=index, name='proportion' if normalize else 'count')
+
+    def grouped_value_counts(self, by: str, col: str) -> pd.Series:
+        """
+        Equivalent of df.groupby(by)[col].value_counts(normalize=True) for two
+        category columns: the share of each col label within each observed by
+        label, highest first (ties in label order), as a Series with a
+        categorical (by, col) MultiIndex.
+        """
+        table = self.counts(by, col)
+        by_labels, col_labels = self.labels[by], self.labels[col]
+        by_order, col_order = by_labels.argsort(), col_labels.argsort()
+        group_codes, value_codes, shares = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)], [np.zeros(0)]
+        for group in by_order[table[by_order].sum(axis=1) > 0]:
+            counts = table[group, col_order]
+            order = col_order[np.argsort(-counts, kind='stable')]
+            group_codes.append(np.full(len(order), group))
+            value_codes.append(order)
+            shares.append(table[group, order] / counts.sum())
+        # codes into the sorted labels, which become the categories
+        index = pd.MultiIndex.from_arrays([
+            pd.Categorical.from_codes(np.argsort(by_order)[np.concatenate(group_codes)], categories=by_labels[by_order]),
+            pd.Categorical.from_codes(np.argsort(col_order)[np.concatenate(value_codes)], categories=col_labels[col_order]),
+        ], names=[by, col])
+        return pd.Series(np.concatenate(shares), index=index, name='proportion')
+
+    def binned_counts(self, col: str, edges: tuple[int, ...], by: str) -> np.ndarray:
+        """
+        The (bins x by labels) count matrix of an integer column cut at edges
+        (value v is in bin i when edges[i - 1] <= v < edges[i]) against a
+        category column.
+        """
+        codes = self.codes[by]
+        answered = codes >= 0
+        bins = np.searchsorted(edges, self.values[col][answered], side='right')
+        width = len(self.labels[by])
+        return np.bincount(bins * width + codes[answered], minlength=(len(edges) + 1) * width).reshape(-1, width)
+
+    def histogram(self, col: str) -> pd.Series:
+        """Returns the unit-width histogram of an integer column (value -> count)."""
+        base, hist = self._histograms[col]
+        keep = np.flatnonzero(hist)
+        return pd.Series(hist[keep], index=pd.Index(keep + base, name=col), name='count')
+
+    def binned_histogram(self, col: str, nbins: int) -> pd.DataFrame:
+        """
+        Counts an integer column in at most about nbins bins of equal, round
+        width (1, 2 or 5 times a power of ten, as Plotly picks them), from the
+        unit-width histogram: one row per bin with its first and last value
+        and count. Costs O(distinct values), however many rows there are.
+        """
+        base, hist = self._histograms[col]
+        if not hist.any():
+            return pd.DataFrame({'start': [], 'end': [], 'count': []}, dtype=np.int64)
+        keep = np.flatnonzero(hist)
+        lo, hi = int(keep[0]) + base, int(keep[-1]) + base
+        width = 1
+        while (hi - lo + 1) / width > nbins:
+            width = width * 5 // 2 if str(width)[0] == '2' else width * 2
+        first = lo // width * width
+        bins = (keep + base - first) // width
+        counts = np.bincount(bins, weights=hist[keep], minlength=bins[-1] + 1).astype(np.int64)
+        starts = first + width * np.arange(len(counts))
+        return pd.DataFrame({'start': starts, 'end': starts + width - 1, 'count': counts})
+
+    def isin(self, col: str, values: list[str]) -> np.ndarray:
+        """Returns a boolean row mask for rows whose value is in values."""
+        wanted = self.labels[col].get_indexer(values)
+        return np.isin(self.codes[col], wanted[wanted >= 0])
@@ -0,0 +1,340 @@
+# File Path: employee_wellness_project/dataset.py
+# This file holds a loaded survey dataset together with its derived aggregates.
+
+import threading
+from typing import Callable
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from bitmap_index import BitmapIndex
+from chart_cache import file_fingerprint
+from comment_index import CommentIndex, open_index
+from count_cube import CountCube
+from crosstab_engine import CrosstabEngine
+from snapshot import load_frame
+from timeline import Timeline, read_timestamps, response_times, timestamps_path
+
+
+class Dataset:
+    """
+    A survey dataset: the row-level frame, the crosstab engine built over it,
+    and a revision counter that is bumped by every append.
+
+    Appended batches are folded into the engine's counts immediately, but only
+    concatenated onto the frame the next time .frame is read, so a stream of
+    appends followed by KPI and rate-chart requests never copies the dataset.
+
+    A bitmap index over every (column, value) is built at load time; select()
+    uses it to cut out a segment of respondents as a DatasetView, optionally
+    narrowed to the responses whose comment matches a keyword search. The count
+    cube used for drill-down queries (see count_cube.py) and the KPI timeline
+    (see timeline.py) are built on first use.
+    """
+
+    # The full dataset is not a segment
+    segment_key = ''
+    # Appended responses are only kept in memory
+    appends_persist = False
+
+    def __init__(self, frame: pd.DataFrame, path: str | None = None, source: str | None = None):
+        self.path = path
+        # Fingerprint of the source file as it was loaded, so a changed file
+        # doesn't change the version this (old) data is cached under
+        self.source = source or (file_fingerprint(path) if path else 'memory')
+        self.columns = list(frame.columns)
+        self.engine = CrosstabEngine(frame)
+        self.index = BitmapIndex(self.engine)
+        self.revision = 0
+        self._frame = frame
+        self._pending: list[pd.DataFrame] = []
+        self._cube: CountCube | None = None
+        self._comments: CommentIndex | None | bool = False  # False: not opened yet
+        self._file_rows = len(frame)
+        self._stamps: list[np.ndarray] = []  # timestamps of the appended batches
+        self._times: np.ndarray | None | bool = False  # False: not read yet
+        self._timeline: Timeline | None | bool = False
+        self._lock = threading.RLock()
+        # Called with the dataset after it grew (an append, or an aggregate built
+        # on first use), outside its lock; the DatasetRegistry re-measures it
+        self.on_grow: Callable[['Dataset'], None] | None = None
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> 'Dataset':
+        """
+        Loads a dataset from its cleaned CSV (or that CSV's fresh snapshot).
+        With mmap=True the snapshot's columns are memory-mapped, not copied.
+        """
+        source = file_fingerprint(path)  # taken first: a file replaced meanwhile shows up as stale
+        return cls(load_frame(path, mmap), path, source)
+
+    @property
+    def n_rows(self) -> int:
+        return self.engine.n_rows
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The row-level frame, including every appended batch."""
+        with self._lock:
+            if self._pending:
+                self._frame = self._concat([self._frame, *self._pending])
+                self._pending = []
+            return self._frame
+
+    def _grew(self) -> None:
+        if self.on_grow is not None:
+            self.on_grow(self)
+
+    @property
+    def cube(self) -> CountCube:
+        """The count cube over the demographic and workplace dimensions, built on first use."""
+        with self._lock:
+            built = self._cube is None
+            if built:
+                self._cube = CountCube(self.engine)
+            cube = self._cube
+        if built:
+            self._grew()
+        return cube
+
+    @property
+    def comments(self) -> CommentIndex | None:
+        """
+        The index of the raw comments (see comment_index.py), opened on first
+        use; None if the CSV has none, or one that doesn't fit its rows.
+        """
+        with self._lock:
+            opened = self._comments is False
+            if opened:
+                index = open_index(self.path) if self.path else None
+                self._comments = index if index is not None and index.n_rows <= self.engine.n_rows else None
+            comments = self._comments
+        if opened and comments is not None:
+            self._grew()
+        return comments
+
+    @property
+    def times(self) -> np.ndarray | None:
+        """
+        Every row's timestamp in epoch seconds: the loaded rows' from the
+        CSV's timestamps file (see timeline.py), then the appended ones'.
+        None if the CSV has no timestamps file, or one that doesn't fit its rows.
+        """
+        with self._lock:
+            read = self._times is False
+            if read:
+                times = read_timestamps(timestamps_path(self.path)) if self.path else None
+                self._times = times if times is not None and len(times) == self._file_rows else None
+            if self._times is not None and self._stamps:
+                self._times = np.concatenate([self._times, *self._stamps])
+                self._stamps = []
+            times = self._times
+        if read and times is not None:
+            self._grew()
+        return times
+
+    @property
+    def timeline(self) -> Timeline | None:
+        """The KPI timeline over the rows' timestamps, built on first use; None without timestamps."""
+        with self._lock:
+            built = self._timeline is False
+            if built:
+                times = self.times
+                self._timeline = Timeline.build(times, self.engine) if times is not None else None
+            timeline = self._timeline
+        if built and timeline is not None:
+            self._grew()
+        return timeline
+
+    def fingerprint(self) -> str:
+        """Identifies this exact version of the data (source file + appends)."""
+        return f'{self.source}-r{self.revision}'
+
+    def is_stale(self) -> bool:
+        """True if the source file has changed since it was loaded (a reload would pick it up)."""
+        try:
+            return self.path is not None and file_fingerprint(self.path) != self.source
+        except OSError:  # gone, or being replaced: keep serving what is loaded
+            return False
+
+    def memory_usage(self) -> int:
+        """
+        Estimated bytes held by the dataset: the frame (with pending appends),
+        the engine's buffers and counts, the bitmap index and the cube. Buffers the
+        engine shares with the frame's category codes are counted twice, so
+        this errs on the high side.
+        """
+        with self._lock:
+            frames = [self._frame, *self._pending]
+            times = self._times if isinstance(self._times, np.ndarray) else None
+            return (sum(int(f.memory_usage(deep=True).sum()) for f in frames)
+                    + self.engine.nbytes + self.index.nbytes + (self._cube.nbytes if self._cube else 0)
+                    + (times.nbytes if times is not None else 0)
+                    + (self._timeline.nbytes if self._timeline else 0))
+
+    # --- Segments ---
+
+    def normalize_filters(self, filters: dict[str, list[str]]) -> dict[str, list[str]]:
+        """Checks that every filter column is a categorical column; drops empty filters."""
+        unknown = [col for col in filters if col not in self.engine.codes]
+        if unknown:
+            raise ValueError(f"cannot filter on: {unknown}")
+        return {col: sorted(set(values)) for col, values in sorted(filters.items()) if values}
+
+    def mask(self, filters: dict[str, list[str]]) -> np.ndarray:
+        """Boolean row mask of the rows matching the filters, from the bitmap index."""
+        with self._lock:
+            indexed = self.index.nbytes
+            mask = self.index.mask(self.engine, self.normalize_filters(filters))
+            grew = self.index.nbytes > indexed  # a column's bitsets built on first use
+        if grew:
+            self._grew()
+        return mask
+
+    def select(self, filters: dict[str, list[str]], query: str | None = None) -> 'Dataset | DatasetView':
+        """
+        Returns the segment of respondents matching the filters, e.g.
+        {'Country': ['United States'], 'tech_company': ['Yes']}. Values within a
+        column are OR-ed, columns are AND-ed. With a query, only respondents
+        whose comment matches it are kept (see CommentIndex.search); raises
+        ValueError if the dataset has no comment index.
+        """
+        filters = self.normalize_filters(filters)
+        query = query.strip() if query else None
+        if not filters and not query:
+            return self
+        hits = None
+        if query:
+            if self.comments is None:
+                raise ValueError("this dataset has no comment index to search")
+            hits = self.comments.matching_rows(query)
+        with self._lock:
+            indexed = self.index.nbytes
+            rows = np.flatnonzero(self.index.mask(self.engine, filters)) if filters else np.arange(self.n_rows)
+            if hits is not None:
+                rows = np.intersect1d(rows, hits, assume_unique=True)
+            view = DatasetView(self, filters, rows, query)
+            grew = self.index.nbytes > indexed
+        if grew:
+            self._grew()
+        return view
+
+    # --- Appending new responses ---
+
+    def prepare(self, rows: list[dict] | pd.DataFrame) -> pd.DataFrame:
+        """
+        Validates a batch of new responses and returns it as a frame with the
+        dataset's columns. Raises ValueError for missing/unknown columns or
+        values that don't fit a numeric column. A 'Timestamp' column is allowed
+        (see append) but not part of the result.
+        """
+        batch = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+        missing = [c for c in self.columns if c not in batch.columns]
+        unknown = [c for c in batch.columns if c not in self.columns and c != 'Timestamp']
+        if missing:
+            raise ValueError(f"missing columns: {missing}")
+        if unknown:
+            raise ValueError(f"unknown columns: {unknown}")
+        batch = batch[self.columns].reset_index(drop=True)
+        for col in self.columns:
+            dtype = self._frame[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(dtype):
+                batch[col] = batch[col].astype(object).where(batch[col].notna(), None)
+            else:
+                try:
+                    batch[col] = pd.to_numeric(batch[col], errors='raise').astype(dtype)
+                except (TypeError, ValueError) as exc:
+                    raise ValueError(f"column {col!r}: {exc}") from exc
+        return batch
+
+    def append(self, rows: list[dict] | pd.DataFrame) -> int:
+        """
+        Adds a batch of responses, updating the stored counts in O(batch).
+        Each response is timestamped with its 'Timestamp', if given, else with
+        the time it arrived. Returns the batch size.
+        """
+        rows = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+        batch = self.prepare(rows)
+        stamps = response_times(rows)
+        with self._lock:
+            first_row = self.n_rows
+            self.engine.append(batch)
+            self.index.extend(self.engine)
+            if self._cube is not None:
+                self._cube.extend(self.engine)
+            if self._timeline:
+                self._timeline.extend(stamps, self.engine, first_row)
+            self._stamps.append(stamps)
+            self._pending.append(batch)
+            self.revision += 1
+        self._grew()
+        return len(batch)
+
+    @staticmethod
+    def _concat(frames: list[pd.DataFrame]) -> pd.DataFrame:
+        """Concatenates frames, merging category dictionaries instead of falling back to object."""
+        out = {}
+        for col in frames[0].columns:
+            parts = [f[col] for f in frames]
+            if isinstance(parts[0].dtype, pd.CategoricalDtype):
+                parts = [p if isinstance(p.dtype, pd.CategoricalDtype) else p.astype('category') for p in parts]
+                out[col] = union_categoricals(parts, sort_categories=True)
+            else:
+                out[col] = pd.concat(parts, ignore_index=True)
+        return pd.DataFrame(out)
+
+
+class DatasetView:
+    """
+    A segment of a Dataset: the rows selected by a filter (and keyword query),
+    with an engine that aggregates over those rows only. Views are read-only
+    snapshots of their parent at the moment they were selected.
+    """
+
+    def __init__(self, parent: Dataset, filters: dict[str, list[str]], rows: np.ndarray,
+                 query: str | None = None):
+        self.parent = parent
+        self.filters = filters
+        self.query = query
+        self.rows = rows
+        self.path = parent.path
+        self.columns = parent.columns
+        self.revision = parent.revision
+        self.engine = parent.engine.subset(rows)
+        self.segment_key = urlencode([(col, v) for col, values in filters.items() for v in values]
+                                     + ([('q', query)] if query else []))
+        self._frame = None
+        self._timeline: Timeline | None | bool = False
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.rows)
+
+    @property
+    def timeline(self) -> Timeline | None:
+        """The KPI timeline of the segment's rows (built on first use); None without timestamps."""
+        if self._timeline is False:
+            times = self.parent.times
+            self._timeline = Timeline.build(times[self.rows], self.engine) if times is not None else None
+        return self._timeline
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The row-level frame of the segment (built on first use)."""
+        if self._frame is None:
+            self._frame = self.parent.frame.iloc[self.rows].reset_index(drop=True)
+        return self._frame
+
+    def fingerprint(self) -> str:
+        """
+        The version of the parent's data this segment was selected from (its
+        revision then, not now); the segment itself is identified by
+        segment_key, which cache keys and ETags add to it.
+        """
+        return f'{self.parent.source}-r{self.revision}'
+
+    def mask(self, filters: dict[str, list[str]]) -> np.ndarray:
+        """Boolean mask over this segment's rows of the rows matching further filters."""
+        return self.parent.mask(filters)[self.rows]
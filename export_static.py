@@ -0,0 +1,120 @@
+# File Path: employee_wellness_project/export_static.py
+# This file pre-renders every dashboard to static files, for serving without Flask.
+#
+# Every chart is built once, in a process pool, and written to charts/<chart_id>.json,
+# next to the layout template they share (charts/template.json); the pages load those files. charts/manifest.json remembers what each file was
+# built from, so a re-export only rebuilds charts whose inputs changed.
+#
+# Usage:
+#   python export_static.py [out_dir] [--workers N] [--force]
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly
+
+import analysis as an
+from app import app
+from chart_api import FIGURE_FORMAT, figure_json, template_json
+
+OUT_DIR = 'static_site'
+
+# Route -> file, relative to the output directory
+PAGES = {
+    '/': 'index.html',
+    **{f'/presenter/{n}': f'presenter/{n}/index.html' for n in range(1, 7)},
+    '/summary': 'summary/index.html',
+}
+
+
+def chart_inputs(chart_id: str) -> str:
+    """
+    Hashes everything a chart is built from: the dataset version, the source of
+    its plot function(s), the Plotly version and the figure JSON format.
+    """
+    fn = an.CHARTS[chart_id]
+    sources = [inspect.getsource(fn)]
+    sources += [inspect.getsource(getattr(an, name)) for name in fn.__code__.co_names if name.startswith('plot_')]
+    digest = hashlib.blake2b(digest_size=12)
+    for part in (an.data_fingerprint(), plotly.__version__, str(FIGURE_FORMAT), *sources):
+        digest.update(part.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_chart(chart_id: str) -> tuple[str, str]:
+    """Builds one chart's figure JSON (runs in a worker process)."""
+    return chart_id, figure_json(an.CHARTS[chart_id]())
+
+
+def _write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(content)
+
+
+def export(out_dir: str = OUT_DIR, workers: int | None = None, force: bool = False) -> dict:
+    """
+    Writes every page and chart under out_dir. Returns counts of the charts
+    built and skipped.
+    """
+    manifest_path = os.path.join(out_dir, 'charts', 'manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+
+    inputs = {chart_id: chart_inputs(chart_id) for chart_id in an.CHARTS}
+    stale = [
+        chart_id for chart_id, key in inputs.items()
+        if manifest.get(chart_id) != key
+        or not os.path.exists(os.path.join(out_dir, 'charts', f'{chart_id}.json'))
+    ]
+
+    # Workers are forked from this process, so they start with the dataset already loaded.
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chart_id, payload in pool.map(build_chart, stale):
+                _write(os.path.join(out_dir, 'charts', f'{chart_id}.json'), payload)
+                manifest[chart_id] = inputs[chart_id]
+    _write(manifest_path, json.dumps(manifest, indent=1, sort_keys=True))
+    _write(os.path.join(out_dir, 'charts', 'template.json'), template_json())
+
+    # Pages only embed loaders for the chart files, so rendering them is cheap.
+    app.config.update(CHART_EMBED='static', STATIC_CHART_URL='/charts/{chart_id}.json',
+                      STATIC_TEMPLATE_URL='/charts/template.json')
+    with app.test_client() as client:
+        for route, filename in PAGES.items():
+            response = client.get(route)
+            if response.status_code != 200:
+                raise RuntimeError(f"{route} returned {response.status_code}")
+            _write(os.path.join(out_dir, filename), response.get_data(as_text=True))
+
+    # CSS/JS referenced by the templates
+    if app.static_folder and os.path.isdir(app.static_folder):
+        shutil.copytree(app.static_folder, os.path.join(out_dir, 'static'), dirs_exist_ok=True)
+
+    return {'built': len(stale), 'skipped': len(inputs) - len(stale), 'pages': len(PAGES)}
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    force = '--force' in args
+    if force:
+        args.remove('--force')
+    workers = None
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    target = args[0] if args else OUT_DIR
+
+    start = time.perf_counter()
+    result = export(target, workers, force)
+    print(f"Exported {result['pages']} pages to {target}: {result['built']} charts built, "
+          f"{result['skipped']} unchanged ({time.perf_counter() - start:.1f}s)")
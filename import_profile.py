@@ -0,0 +1,198 @@
+# File Path: employee_wellness_project/import_profile.py
+# This file profiles the app's start-up: what importing it (and serving its
+# first requests) costs, and which packages that time goes to.
+#
+# Each scenario runs in a fresh interpreter under `python -X importtime`, so
+# module caches from earlier runs don't hide anything. Per scenario the report
+# gives the wall time, the time spent importing, the modules imported, whether
+# the heavy packages (pandas, numpy, Plotly) were loaded at all, and the packages
+# that took longest. Results are written as JSON so releases can be compared;
+# 'compare' flags scenarios and packages that got slower.
+#
+# Usage:
+#   python import_profile.py run [--repeat N] [--top N] [--out FILE]
+#   python import_profile.py compare OLD.json NEW.json [--threshold 0.10]
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REPEAT = 5
+TOP = 15
+OUT_PATH = 'import_profile.json'
+
+# Scenario -> code run in a fresh interpreter; it prints its own wall time
+SCENARIOS = {
+    'import app': "import app",
+    'health check': "import app; app.app.test_client().get('/api/ready')",
+    'first chart': "import app; app.app.test_client().get('/api/chart/q1_gender')",
+    'import analysis + dataset': "import analysis; analysis.dataset",
+}
+HEAVY = ('pandas', 'numpy', 'plotly')
+
+# A scenario or package only counts as a regression when it is this much slower,
+# relatively and absolutely
+THRESHOLD = 0.10
+MIN_DELTA = 0.005
+
+_TIMER = "import time as _t; _s = _t.perf_counter(); {code}; print(_t.perf_counter() - _s)"
+
+
+# -------------------------------------------------------------------- #
+# --- PROFILE ---
+# -------------------------------------------------------------------- #
+
+def parse_importtime(log: str) -> list[dict]:
+    """
+    Parses `-X importtime` output into one entry per module imported: its
+    name, its own import time and its cumulative time (with the modules it
+    imported), in seconds.
+    """
+    modules = []
+    for line in log.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append({'name': name.strip(), 'self': int(own) / 1e6, 'cumulative': int(cumulative) / 1e6})
+    return modules
+
+
+def profile_once(code: str) -> dict:
+    """Runs code once in a fresh interpreter; returns its wall time and imported modules."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', _TIMER.format(code=code)],
+                            cwd=here, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{result.stderr[-2000:]}")
+    return {'wall': float(result.stdout.split()[-1]), 'modules': parse_importtime(result.stderr)}
+
+
+def by_package(modules: list[dict]) -> dict[str, float]:
+    """Own import time summed per top-level package, slowest first."""
+    totals = {}
+    for module in modules:
+        package = module['name'].split('.')[0]
+        totals[package] = totals.get(package, 0.0) + module['self']
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def profile(code: str, repeat: int = REPEAT, top: int = TOP) -> dict:
+    """
+    Profiles a scenario repeat times and summarizes the median run: wall and
+    import time, modules imported, heavy packages loaded and the top packages.
+    """
+    runs = [profile_once(code) for _ in range(repeat)]
+    walls = [run['wall'] for run in runs]
+    median = sorted(runs, key=lambda run: run['wall'])[len(runs) // 2]
+    packages = by_package(median['modules'])
+    loaded = {module['name'].split('.')[0] for module in median['modules']}
+    return {
+        'code': code,
+        'wall': statistics.median(walls),
+        'runs': walls,
+        'import': sum(module['self'] for module in median['modules']),
+        'modules': len(median['modules']),
+        'heavy': {name: name in loaded for name in HEAVY},
+        'packages': dict(list(packages.items())[:top]),
+    }
+
+
+def run(repeat: int = REPEAT, top: int = TOP) -> dict:
+    """Profiles every scenario; returns the results document."""
+    results = {}
+    for name, code in SCENARIOS.items():
+        results[name] = profile(code, repeat, top)
+        print(f"{name}: {results[name]['wall'] * 1000:.0f}ms", file=sys.stderr)
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def _print_report(document: dict) -> None:
+    for name, result in document['results'].items():
+        heavy = ', '.join(f"{package} {'loaded' if loaded else 'not loaded'}"
+                          for package, loaded in result['heavy'].items())
+        print(f"\n{name}: {result['wall'] * 1000:.0f}ms wall, {result['import'] * 1000:.0f}ms importing "
+              f"{result['modules']} modules ({heavy})")
+        for package, seconds in result['packages'].items():
+            print(f"    {package:<32}{seconds * 1000:>10.1f}ms")
+
+
+# -------------------------------------------------------------------- #
+# --- COMPARE ---
+# -------------------------------------------------------------------- #
+
+def compare(old: dict, new: dict, threshold: float = THRESHOLD) -> list[dict]:
+    """
+    Matches the two runs on scenario (wall and import time) and on the
+    packages both list, and returns a row per pair with whether it got slower
+    by more than threshold (and MIN_DELTA).
+    """
+    def row(scenario, name, old_s, new_s):
+        ratio = new_s / old_s if old_s else float('inf')
+        return {'scenario': scenario, 'name': name, 'old': old_s, 'new': new_s, 'ratio': ratio,
+                'regression': ratio > 1 + threshold and new_s - old_s > MIN_DELTA}
+
+    rows = []
+    for scenario, result in new['results'].items():
+        before = old['results'].get(scenario)
+        if before is None:
+            continue
+        rows.append(row(scenario, 'wall', before['wall'], result['wall']))
+        rows.append(row(scenario, 'import', before['import'], result['import']))
+        for package, seconds in result['packages'].items():
+            if package in before['packages']:
+                rows.append(row(scenario, package, before['packages'][package], seconds))
+    return rows
+
+
+def _print_comparison(rows: list[dict]) -> None:
+    print(f"{'scenario':<28}{'name':<28}{'old (ms)':>10}{'new (ms)':>10}{'ratio':>8}")
+    for row in sorted(rows, key=lambda r: -r['ratio']):
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['scenario']:<28}{row['name']:<28}"
+              f"{row['old'] * 1000:>10.1f}{row['new'] * 1000:>10.1f}{row['ratio']:>8.2f}{flag}")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    command = args.pop(0) if args else 'run'
+    options = {}
+    for flag in ('--repeat', '--top', '--out', '--threshold'):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+
+    if command == 'run':
+        document = run(int(options.get('--repeat', REPEAT)), int(options.get('--top', TOP)))
+        _print_report(document)
+        out = options.get('--out', OUT_PATH)
+        with open(out, 'w', encoding='utf-8') as fh:
+            json.dump(document, fh, indent=1)
+        print(f"\nWrote {len(document['results'])} scenarios to {out}")
+    elif command == 'compare':
+        if len(args) != 2:
+            sys.exit("usage: python import_profile.py compare OLD.json NEW.json [--threshold 0.10]")
+        with open(args[0], encoding='utf-8') as fh:
+            old = json.load(fh)
+        with open(args[1], encoding='utf-8') as fh:
+            new = json.load(fh)
+        rows = compare(old, new, float(options.get('--threshold', THRESHOLD)))
+        _print_comparison(rows)
+        regressions = sum(row['regression'] for row in rows)
+        print(f"{regressions} regression(s) in {len(rows)} comparable timings")
+        sys.exit(1 if regressions else 0)
+    else:
+        sys.exit(f"unknown command: {command}")
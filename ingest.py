@@ -0,0 +1,271 @@
+# File Path: employee_wellness_project/ingest.py
+# This file turns the raw survey export into cleaned_employee_data.csv (and its snapshot,
+# comment index and response timestamps).
+#
+# The raw file is streamed in fixed-size chunks, so memory use does not grow with
+# the file. The free-text comments and the timestamps, which the cleaned data drops,
+# are fed to the comment index (see comment_index.py) and the timestamps file (see
+# timeline.py) in the same pass. Progress is recorded in <cleaned>.ingest.json; a rerun seeks straight
+# past the last ingested byte and only processes rows with a newer S.No.
+#
+# The state file is also the journal of an incremental run: before anything is
+# appended it records how long each output is ('pending'), and only the final
+# state drops that record. A rerun after a crash first cuts every output back to
+# those lengths (see rollback()), so no row is appended twice.
+#
+# Usage:
+#   python ingest.py [raw_csv] [cleaned_csv] [--chunk-size N] [--full]
+
+import io
+import json
+import os
+import sys
+
+import pandas as pd
+
+from comment_index import CommentIndexBuilder, append_segment, index_path, truncate_index, write_index
+from comment_index import read_meta as read_index_meta
+from snapshot import append_snapshot, build_snapshot, install_snapshot, read_meta, snapshot_path, stamp_snapshot, \
+    write_snapshot
+from timeline import append_timestamps, timestamps_path, to_seconds
+
+RAW_PATH = 'employee_wellness_dataset.csv'
+CLEANED_PATH = 'cleaned_employee_data.csv'
+CHUNK_ROWS = 50_000
+
+# Columns present in the raw export but not in the cleaned data
+DROP_COLUMNS = ['S.No', 'Timestamp', 'comments']
+
+# Valid age range; responses outside it are discarded
+MIN_AGE, MAX_AGE = 18, 100
+
+# Free-form Gender answers that map to Male / Female; anything else becomes 'Other'.
+# Matching is exact (no case folding or trimming), as in the shipped cleaned file.
+MALE_ANSWERS = {
+    'Male', 'male', 'M', 'm', 'Man', 'Cis Male', 'cis male', 'Male (CIS)', 'Male-ish',
+    'Make', 'Mal', 'Mail', 'maile', 'msle', 'Guy (-ish) ^_^',
+}
+FEMALE_ANSWERS = {
+    'Female', 'female', 'F', 'f', 'Woman', 'woman', 'Cis Female', 'Female (cis)',
+    'cis-female/femme', 'Femake', 'Female (trans)', 'Trans woman', 'Trans-female',
+}
+
+# How 'NA' answers are filled in; blank answers are left missing
+FILL_VALUES = {
+    'state': 'Not Applicable',
+    'self_employed': 'No',
+    'work_interfere': 'Never',
+}
+
+
+# -------------------------------------------------------------------- #
+# --- CLEANING ---
+# -------------------------------------------------------------------- #
+
+def normalize_gender(series: pd.Series) -> pd.Series:
+    """Maps the free-form Gender answers to Male / Female / Other."""
+    return pd.Series('Other', index=series.index).mask(series.isin(MALE_ANSWERS), 'Male') \
+        .mask(series.isin(FEMALE_ANSWERS), 'Female')
+
+
+def clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Applies every cleaning rule to one chunk of raw rows."""
+    age = pd.to_numeric(chunk['Age'], errors='coerce')
+    chunk = chunk[age.between(MIN_AGE, MAX_AGE)].copy()
+    chunk['Age'] = age[chunk.index].astype('int64')
+    chunk['Gender'] = normalize_gender(chunk['Gender'])
+    for col, value in FILL_VALUES.items():
+        chunk[col] = chunk[col].fillna(value)
+    chunk = chunk.drop(columns=DROP_COLUMNS)
+    return chunk.mask(chunk == '')
+
+
+# -------------------------------------------------------------------- #
+# --- INCREMENTAL STATE ---
+# -------------------------------------------------------------------- #
+
+def state_path(cleaned_path: str) -> str:
+    """Returns the file that records how far the raw export has been ingested."""
+    return os.path.splitext(cleaned_path)[0] + '.ingest.json'
+
+
+def read_state(cleaned_path: str) -> dict | None:
+    """Returns the saved ingest state, or None when there is nothing to resume from."""
+    path = state_path(cleaned_path)
+    if not os.path.exists(path) or not os.path.exists(cleaned_path):
+        return None
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def write_state(cleaned_path: str, state: dict) -> None:
+    """Atomically saves the ingest state."""
+    tmp = state_path(cleaned_path) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(state, fh, indent=1)
+    os.replace(tmp, state_path(cleaned_path))
+
+
+def _output_lengths(cleaned_path: str) -> dict:
+    """How long each output of an incremental run is before it appends to them."""
+    times, index = timestamps_path(cleaned_path), index_path(cleaned_path)
+    return {
+        'csv_bytes': os.path.getsize(cleaned_path),
+        'timestamps_bytes': os.path.getsize(times) if os.path.exists(times) else None,
+        'index_segments': len(read_index_meta(index)['segments']) if os.path.exists(index) else None,
+    }
+
+
+def rollback(cleaned_path: str, state: dict) -> None:
+    """
+    Undoes what an interrupted incremental run appended: cuts the cleaned CSV
+    and the timestamps file back to their recorded lengths, drops the comment
+    index segments it added and, if its snapshot committed rows, rebuilds the
+    snapshot from the restored CSV. Then saves the state without its journal.
+    """
+    pending = state.pop('pending')
+    os.truncate(cleaned_path, pending['csv_bytes'])
+    if pending['timestamps_bytes'] is not None:
+        os.truncate(timestamps_path(cleaned_path), pending['timestamps_bytes'])
+    if pending['index_segments'] is not None:
+        truncate_index(index_path(cleaned_path), pending['index_segments'])
+    snap = snapshot_path(cleaned_path)
+    if os.path.exists(snap) and read_meta(snap)['n_rows'] != state['rows_written']:
+        build_snapshot(cleaned_path)
+    write_state(cleaned_path, state)
+
+
+class _ByteWindow(io.RawIOBase):
+    """A read-only view of bytes [start, end) of a file, handed to pd.read_csv."""
+
+    def __init__(self, fh, start: int, end: int):
+        self._fh, self._remaining = fh, end - start
+        fh.seek(start)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self._fh.readinto(memoryview(buffer)[:min(len(buffer), self._remaining)])
+        self._remaining -= n
+        return n
+
+
+def _complete_end(fh, size: int) -> int:
+    """Returns the offset just past the last complete line of the file."""
+    pos = size
+    while pos > 0:
+        step = min(1 << 16, pos)
+        fh.seek(pos - step)
+        block = fh.read(step)
+        newline = block.rfind(b'\n')
+        if newline >= 0:
+            return pos - step + newline + 1
+        pos -= step
+    return 0
+
+
+# -------------------------------------------------------------------- #
+# --- INGEST ---
+# -------------------------------------------------------------------- #
+
+def ingest(raw_path: str = RAW_PATH, cleaned_path: str = CLEANED_PATH,
+           chunk_rows: int = CHUNK_ROWS, full: bool = False) -> dict:
+    """
+    Streams the raw export into the cleaned CSV, its snapshot, its comment
+    index and its timestamps file. Without a previous state (or with full=True) the outputs are rebuilt
+    from scratch and swapped in at the end; otherwise only the new rows are
+    appended (as a new segment, for the comment index), after rolling back a
+    run that was interrupted. Returns the updated ingest state.
+    """
+    state = None if full else read_state(cleaned_path)
+    if state is not None and 'pending' in state:
+        rollback(cleaned_path, state)
+    snap = snapshot_path(cleaned_path)
+    if state is None:
+        state = {'offset': 0, 'last_sno': None, 'last_timestamp': None, 'rows_read': 0, 'rows_written': 0}
+        out_csv = cleaned_path + '.tmp'
+        out_snap = snap + '.tmp'
+        rebuild = True
+    else:
+        out_csv, out_snap, rebuild = cleaned_path, snap, False
+        write_state(cleaned_path, {**state, 'pending': _output_lengths(cleaned_path)})
+    snapshot_started = not rebuild and os.path.exists(snap)
+    comments = CommentIndexBuilder(first_row=state['rows_written'])
+    times = timestamps_path(cleaned_path)
+    out_times = times + '.tmp' if rebuild else times
+    if rebuild:
+        open(out_times, 'wb').close()
+    keep_times = os.path.exists(out_times)  # not for an older ingest without one: python ingest.py --full
+
+    with open(raw_path, 'rb') as fh:
+        header = fh.readline()
+        names = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+        start = max(state['offset'], len(header))
+        end = _complete_end(fh, os.path.getsize(raw_path))
+        if end < start:
+            raise ValueError(f"{raw_path} is shorter than the last ingested offset; rerun with --full")
+
+        reader = pd.read_csv(
+            io.BufferedReader(_ByteWindow(fh, start, end)), names=names, header=None,
+            chunksize=chunk_rows, na_values=['NA'], keep_default_na=False,
+        )
+        with open(out_csv, 'w' if rebuild else 'a', newline='', encoding='utf-8') as out:
+            if rebuild:
+                out.write(','.join(c for c in names if c not in DROP_COLUMNS) + '\r\n')
+            for chunk in reader:
+                if state['last_sno'] is not None:
+                    chunk = chunk[chunk['S.No'] > state['last_sno']]
+                if chunk.empty:
+                    continue
+                state['rows_read'] += len(chunk)
+                state['last_sno'] = int(chunk['S.No'].iloc[-1])
+                state['last_timestamp'] = str(chunk['Timestamp'].iloc[-1])
+
+                cleaned = clean_chunk(chunk)
+                if 'comments' in chunk:
+                    comments.add(chunk.loc[cleaned.index, 'comments'])
+                if keep_times:
+                    append_timestamps(out_times, to_seconds(chunk.loc[cleaned.index, 'Timestamp']))
+                cleaned.to_csv(out, header=False, index=False, lineterminator='\r\n')
+                if snapshot_started:
+                    append_snapshot(cleaned, out_snap)
+                else:
+                    write_snapshot(cleaned, out_snap)
+                    snapshot_started = True
+                state['rows_written'] += len(cleaned)
+        state['offset'] = end
+
+    if rebuild:
+        if os.path.exists(state_path(cleaned_path)):  # a state left by an older ingest doesn't describe these
+            os.remove(state_path(cleaned_path))
+        os.replace(out_times, times)
+        os.replace(out_csv, cleaned_path)
+        if snapshot_started:
+            install_snapshot(out_snap, snap)
+    if snapshot_started:
+        stamp_snapshot(snap, cleaned_path)
+    if rebuild:
+        write_index(comments, index_path(cleaned_path))
+    elif comments.next_row > comments.first_row and os.path.exists(index_path(cleaned_path)):
+        append_segment(comments, index_path(cleaned_path))  # an index from before: python ingest.py --full
+    write_state(cleaned_path, state)
+    return state
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    full = '--full' in args
+    if full:
+        args.remove('--full')
+    chunk_rows = CHUNK_ROWS
+    if '--chunk-size' in args:
+        i = args.index('--chunk-size')
+        chunk_rows = int(args[i + 1])
+        del args[i:i + 2]
+    raw = args[0] if args else RAW_PATH
+    cleaned = args[1] if len(args) > 1 else CLEANED_PATH
+
+    result = ingest(raw, cleaned, chunk_rows, full)
+    print(f"Ingested up to S.No {result['last_sno']} ({result['last_timestamp']}): "
+          f"{result['rows_written']} cleaned rows in {cleaned}")
@@ -0,0 +1,211 @@
+# File Path: employee_wellness_project/instrumentation.py
+# This file contains the request instrumentation: per-chart phase timings, the
+# Server-Timing header, Prometheus latency histograms and the slow-request profiler.
+#
+# A chart is timed by wrapping its build in chart_timer(chart_id). The clock starts
+# in the 'aggregation' phase; the plot functions call phase('figure') where they
+# start building Plotly objects (and phase('aggregation') if they go back to
+# counting), and the app switches to 'to_html' / 'to_json' for serialization.
+# Outside a chart_timer, phase() does nothing, so analysis.py runs unchanged
+# from the command line.
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# -------------------------------------------------------------------- #
+# --- PROMETHEUS HISTOGRAMS ---
+# -------------------------------------------------------------------- #
+
+class Histogram:
+    """A labelled latency histogram, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...], buckets: tuple[float, ...] = BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}  # label values -> [bucket counts, count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += seconds
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(self._series.items())
+            for values, (buckets, count, total) in series:
+                labels = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values))
+                sep = ',' if labels else ''
+                for bound, n in zip(self.buckets, buckets):
+                    lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {n}')
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {count}')
+                lines.append(f'{self.name}_count{{{labels}}} {count}')
+                lines.append(f'{self.name}_sum{{{labels}}} {total:.6f}')
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_SECONDS = Histogram(
+    'wellness_request_duration_seconds', 'Time to handle a request.', ('route', 'method', 'status'))
+CHART_PHASE_SECONDS = Histogram(
+    'wellness_chart_phase_duration_seconds', 'Time spent building a chart, by phase.', ('chart', 'phase'))
+RENDER_SECONDS = Histogram(
+    'wellness_template_render_duration_seconds', 'Time to render a page template.', ('template',))
+
+
+def render_metrics() -> str:
+    """Returns every histogram in the Prometheus text exposition format."""
+    lines = []
+    for histogram in (REQUEST_SECONDS, CHART_PHASE_SECONDS, RENDER_SECONDS):
+        lines += histogram.render()
+    return '\n'.join(lines) + '\n'
+
+
+# -------------------------------------------------------------------- #
+# --- PER-REQUEST TIMINGS ---
+# -------------------------------------------------------------------- #
+
+# (name, seconds) entries for the request being handled; shared with its worker threads
+_timings: ContextVar[list | None] = ContextVar('request_timings', default=None)
+
+
+def start_request():
+    """Starts collecting timings for the current request; returns a token for end_request."""
+    return _timings.set([])
+
+
+def end_request(token) -> list[tuple[str, float]]:
+    """Stops collecting and returns the request's timings."""
+    timings = _timings.get() or []
+    _timings.reset(token)
+    return timings
+
+
+def record(name: str, seconds: float) -> None:
+    """Adds a timing to the current request (if one is being timed)."""
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+def server_timing(timings: list[tuple[str, float]]) -> str:
+    """Formats timings as a Server-Timing header value."""
+    return ', '.join(f'{name};dur={seconds * 1000:.1f}' for name, seconds in timings)
+
+
+class _Stopwatch:
+    """Splits the time spent on one chart between named phases."""
+
+    def __init__(self, chart_id: str, first_phase: str):
+        self.chart_id = chart_id
+        self.phases: dict[str, float] = {}
+        self._phase, self._since = first_phase, time.perf_counter()
+
+    def switch(self, phase_name: str) -> None:
+        now = time.perf_counter()
+        self.phases[self._phase] = self.phases.get(self._phase, 0.0) + now - self._since
+        self._phase, self._since = phase_name, now
+
+
+_stopwatch: ContextVar[_Stopwatch | None] = ContextVar('chart_stopwatch', default=None)
+
+
+@contextmanager
+def chart_timer(chart_id: str, first_phase: str = 'aggregation'):
+    """Times the block as one chart's build, split into the phases marked with phase()."""
+    stopwatch = _Stopwatch(chart_id, first_phase)
+    token = _stopwatch.set(stopwatch)
+    try:
+        yield stopwatch
+    finally:
+        _stopwatch.reset(token)
+        stopwatch.switch('')
+        for phase_name, seconds in stopwatch.phases.items():
+            CHART_PHASE_SECONDS.observe(seconds, chart_id, phase_name)
+            record(f'{chart_id}.{phase_name}', seconds)
+
+
+def phase(name: str) -> None:
+    """Marks the start of a new phase of the chart being timed (no-op otherwise)."""
+    stopwatch = _stopwatch.get()
+    if stopwatch is not None:
+        stopwatch.switch(name)
+
+
+# -------------------------------------------------------------------- #
+# --- SAMPLING PROFILER ---
+# -------------------------------------------------------------------- #
+
+class SamplingProfiler:
+    """
+    Samples the call stacks of the request thread and of the chart worker
+    threads (those named thread_prefix*) every interval seconds while a
+    request runs. The samples are written in the folded-stack format
+    ('outer;inner;leaf count' per line) read by flamegraph.pl and speedscope.
+    Worker threads are sampled only while they run a task; they may be
+    running charts for other concurrent requests too.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_prefix: str = 'chart'):
+        self.interval = interval
+        self.thread_prefix = thread_prefix
+        self.samples: Counter = Counter()
+        self._target = threading.get_ident()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+
+    def start(self) -> 'SamplingProfiler':
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._done.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        while not self._done.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self._target:
+                    self.samples[_folded(frame)] += 1
+                elif names.get(ident, '').startswith(self.thread_prefix):
+                    stack = _folded(frame)
+                    if 'run (thread.py' in stack:  # busy with a task, not idle in the queue
+                        self.samples[stack] += 1
+
+    def dump(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as fh:
+            for stack, count in self.samples.most_common():
+                fh.write(f'{stack} {count}\n')
+
+
+def _folded(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
@@ -0,0 +1,70 @@
+# File Path: employee_wellness_project/lazy_loading.py
+# This file contains the helpers that put off expensive start-up work until it
+# is needed: once() for thread-safe, run-once initializers, and lazy_import()
+# for the heavy modules (pandas, Plotly) that dominate the app's import time.
+#
+# Importing app.py then costs little more than importing Flask, so CLI tools,
+# tests and short-lived workers only pay for what they use, and routes that
+# don't look at the data (the index page, /api/ready) never load pandas or Plotly.
+# Run `python import_profile.py` to see what an import costs.
+
+import functools
+import importlib
+import threading
+import types
+from typing import Callable
+
+
+def once(initializer: Callable[[], object]) -> Callable[[], object]:
+    """
+    Wraps a no-argument initializer so it runs at most once: the first call
+    runs it, callers arriving meanwhile (on other threads) wait for it, and
+    every call returns its result. If it raises, nothing is kept and the next
+    call runs it again. The wrapper's done() tells whether it has run.
+    """
+    lock = threading.Lock()
+    result = []
+
+    @functools.wraps(initializer)
+    def wrapper():
+        if not result:
+            with lock:
+                if not result:
+                    result.append(initializer())
+        return result[0]
+
+    wrapper.done = lambda: bool(result)
+    return wrapper
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stands in for a module until one of its attributes is first read, then
+    imports it (once, see once()) and runs setup(), if given, before handing
+    out the attribute.
+    """
+
+    def __init__(self, name: str, setup: Callable[[], None] | None = None):
+        super().__init__(name)
+
+        def load():
+            module = importlib.import_module(name)
+            if setup is not None:
+                setup()
+            return module
+
+        self._lazy_load = once(load)
+
+    def __getattr__(self, attr: str):
+        return getattr(self._lazy_load(), attr)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+
+def lazy_import(name: str, setup: Callable[[], None] | None = None) -> types.ModuleType:
+    """
+    Returns a stand-in for the named module that imports it on first use,
+    e.g. pd = lazy_import('pandas') in place of import pandas as pd.
+    """
+    return LazyModule(name, setup)
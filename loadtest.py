@@ -0,0 +1,358 @@
+# File Path: employee_wellness_project/loadtest.py
+# This file contains the end-to-end load generator for the dashboards.
+#
+# Virtual viewers request pages over keep-alive HTTP/1.1 connections with a small
+# asyncio client (standard library only, so it runs offline on any box), and the
+# latency of every response is recorded per route. Load is generated in one of two ways:
+#   closed loop (default): --users viewers each request a page, wait for it, pause
+#       --think seconds and request the next, so the load adapts to the server;
+#   open loop (--rate R): R requests per second are started on a fixed schedule,
+#       finished or not, over at most --users connections. Latency is measured
+#       from each request's scheduled start, so time spent queueing (in the server,
+#       or for a free connection) is counted the way a viewer would notice it.
+# Routes are picked at random (seeded) by the weights of the traffic mix. The
+# report gives the throughput and p50/p95/p99 latency of each route, with its
+# error rate; requests started in the first --warmup seconds are left out.
+#
+# Without --url the app is started in this process (create_app(), then a threaded
+# werkzeug server on a free localhost port). The client then shares the CPU with
+# the server, so for production-like numbers start the server on its own, e.g.
+# gunicorn --preload -w 4 'app:create_app()', and pass its --url.
+#
+# Usage:
+#   python loadtest.py [--url http://127.0.0.1:8000] [--users N] [--rate R] [--duration S]
+#                      [--warmup S] [--think S] [--mix PATH=WEIGHT,...] [--timeout S]
+#                      [--seed N] [--out FILE]
+
+import asyncio
+import json
+import logging
+import platform
+import random
+import sys
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlsplit
+
+import numpy as np
+
+USERS = 200
+DURATION = 30.0
+WARMUP = 5.0
+TIMEOUT = 30.0
+SEED = 0
+
+# Route -> relative weight: the lobby and the summary are opened most
+MIX = {'/': 2, **{f'/presenter/{n}': 1 for n in range(1, 7)}, '/summary': 2}
+
+PERCENTILES = (50, 95, 99)
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """
+    Parses a traffic mix such as '/=2,/presenter/1=1,/summary?Gender=Female=3'
+    (the weight follows the last '=').
+    """
+    mix = {}
+    for item in text.split(','):
+        path, _, weight = item.strip().rpartition('=')
+        if not path.startswith('/'):
+            raise ValueError(f"expected PATH=WEIGHT, got {item!r}")
+        mix[path] = float(weight)
+    return mix
+
+
+# -------------------------------------------------------------------- #
+# --- HTTP CLIENT ---
+# -------------------------------------------------------------------- #
+
+class HttpConnection:
+    """A keep-alive HTTP/1.1 connection that GETs paths and reads (and discards) the responses."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def get(self, path: str) -> tuple[int, int]:
+        """GETs a path, (re)connecting if needed. Returns the status code and the body size."""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(f'GET {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n'
+                           'Accept: text/html,application/json\r\nAccept-Encoding: gzip\r\n\r\n'.encode('latin-1'))
+        await self._writer.drain()
+        head = (await self._reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+        status_line, *lines = head.split('\r\n')
+        version, status = status_line.split(' ', 2)[:2]
+        headers = {}
+        for line in lines:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip().lower()
+        keep_alive = headers.get('connection', 'keep-alive' if version == 'HTTP/1.1' else 'close') != 'close'
+
+        if status in ('204', '304') or status.startswith('1'):
+            size = 0
+        elif 'content-length' in headers:
+            size = int(headers['content-length'])
+            await self._discard(size)
+        elif headers.get('transfer-encoding') == 'chunked':
+            size = await self._read_chunked()
+        else:  # the body ends when the server closes the connection
+            size = len(await self._reader.read())
+            keep_alive = False
+        if not keep_alive:
+            self.close()
+        return int(status), size
+
+    async def _discard(self, size: int) -> None:
+        while size > 0:
+            data = await self._reader.read(min(size, 1 << 16))
+            if not data:
+                raise asyncio.IncompleteReadError(b'', size)
+            size -= len(data)
+
+    async def _read_chunked(self) -> int:
+        size = 0
+        while True:
+            n = int((await self._reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+            if n == 0:
+                while await self._reader.readuntil(b'\r\n') != b'\r\n':  # trailers
+                    pass
+                return size
+            await self._discard(n + 2)  # the chunk and its CRLF
+            size += n
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+# -------------------------------------------------------------------- #
+# --- LOAD GENERATION ---
+# -------------------------------------------------------------------- #
+
+# One record per request: (route, scheduled start, finish, status, body bytes, error)
+Record = tuple[str, float, float, int, int, str | None]
+
+
+async def _request(conn: HttpConnection, path: str, scheduled: float, timeout: float,
+                   records: list[Record]) -> None:
+    try:
+        status, size = await asyncio.wait_for(conn.get(path), timeout)
+        error = f'HTTP {status}' if status >= 400 else None
+    except (OSError, EOFError, ValueError, asyncio.LimitOverrunError) as exc:  # incl. timeouts
+        conn.close()
+        status, size, error = 0, 0, type(exc).__name__
+    records.append((path, scheduled, time.perf_counter(), status, size, error))
+
+
+async def _viewer(conn: HttpConnection, mix: dict[str, float], rng: random.Random, start: float,
+                  deadline: float, think: float, timeout: float, records: list[Record]) -> None:
+    """A closed-loop viewer: one request after the other (starting at start) until the deadline."""
+    paths, weights = list(mix), list(mix.values())
+    await asyncio.sleep(max(start - time.perf_counter(), 0))
+    try:
+        while time.perf_counter() < deadline:
+            await _request(conn, rng.choices(paths, weights)[0], time.perf_counter(), timeout, records)
+            if think:
+                await asyncio.sleep(think)
+    finally:
+        conn.close()
+
+
+async def _closed_loop(host: str, port: int, users: int, mix: dict[str, float], seed: int, start: float,
+                       ramp: float, deadline: float, think: float, timeout: float, records: list[Record]) -> None:
+    # Viewers join one by one over the ramp (the warm-up), not all in the same instant
+    await asyncio.gather(*(
+        _viewer(HttpConnection(host, port), mix, random.Random(seed + i), start + ramp * i / users,
+                deadline, think, timeout, records)
+        for i in range(users)
+    ))
+
+
+async def _open_loop(host: str, port: int, connections: int, rate: float, mix: dict[str, float], seed: int,
+                     start: float, deadline: float, timeout: float, records: list[Record]) -> None:
+    pool: asyncio.Queue[HttpConnection] = asyncio.Queue()
+    for _ in range(connections):
+        pool.put_nowait(HttpConnection(host, port))
+
+    async def fire(path: str, scheduled: float) -> None:
+        try:
+            conn = await pool.get()
+        except asyncio.CancelledError:
+            records.append((path, scheduled, time.perf_counter(), 0, 0, 'unsent'))
+            raise
+        try:
+            await _request(conn, path, scheduled, timeout, records)
+        finally:
+            pool.put_nowait(conn)
+
+    paths, weights = list(mix), list(mix.values())
+    rng = random.Random(seed)
+    tasks = set()
+    for i in range(int((deadline - start) * rate)):
+        scheduled = start + i / rate
+        await asyncio.sleep(max(scheduled - time.perf_counter(), 0))
+        task = asyncio.create_task(fire(rng.choices(paths, weights)[0], scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    # Requests still waiting for a connection when the last one is due are dropped
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    while not pool.empty():
+        pool.get_nowait().close()
+
+
+def serve_in_process(config: dict | None = None) -> tuple[str, Callable[[], None]]:
+    """Starts the app on a threaded server on a free localhost port; returns its URL and a stop function."""
+    from werkzeug.serving import make_server
+
+    import app as web  # imported here so a run against --url doesn't load the dataset
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no log line per request
+    server = make_server('127.0.0.1', 0, web.create_app(config), threaded=True)
+    threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}', server.shutdown
+
+
+# -------------------------------------------------------------------- #
+# --- REPORT ---
+# -------------------------------------------------------------------- #
+
+def summarize(records: list[Record], measured_from: float, seconds: float) -> list[dict]:
+    """
+    Per route (and over all, as route '*'): requests started after
+    measured_from, throughput over the given seconds, error rate, and the
+    latency percentiles of the successful requests (in seconds).
+    """
+    records = [r for r in records if r[1] >= measured_from]
+    routes = sorted({r[0] for r in records})
+    rows = []
+    for route in [*routes, '*']:
+        mine = [r for r in records if route in ('*', r[0])]
+        latencies = np.array([r[2] - r[1] for r in mine if r[5] is None])
+        errors = [r[5] for r in mine if r[5] is not None]
+        row = {
+            'route': route,
+            'requests': len(mine),
+            'errors': len(errors),
+            'error_rate': len(errors) / len(mine) if mine else 0.0,
+            'error_kinds': {kind: errors.count(kind) for kind in sorted(set(errors))},
+            'throughput': (len(mine) - len(errors)) / seconds,
+            'bytes': sum(r[4] for r in mine),
+        }
+        if len(latencies):
+            row.update({f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(latencies, PERCENTILES))})
+            row.update(mean=float(latencies.mean()), max=float(latencies.max()))
+        rows.append(row)
+    return rows
+
+
+def _print_report(rows: list[dict]) -> None:
+    print(f"{'route':<28}{'requests':>9}{'req/s':>9}{'errors':>8}"
+          + ''.join(f"{f'p{p} (ms)':>11}" for p in PERCENTILES) + f"{'max (ms)':>11}")
+    for row in rows:
+        latencies = ''.join(f"{row[key] * 1000:>11.1f}" if key in row else f"{'-':>11}"
+                            for key in (*(f'p{p}' for p in PERCENTILES), 'max'))
+        print(f"{row['route']:<28}{row['requests']:>9}{row['throughput']:>9.1f}"
+              f"{row['error_rate']:>8.1%}{latencies}")
+    kinds = rows[-1]['error_kinds'] if rows else {}
+    if kinds:
+        print('errors: ' + ', '.join(f'{kind} x{count}' for kind, count in kinds.items()))
+
+
+# -------------------------------------------------------------------- #
+# --- RUN ---
+# -------------------------------------------------------------------- #
+
+def run(url: str | None = None, users: int = USERS, rate: float | None = None, duration: float = DURATION,
+        warmup: float = WARMUP, think: float = 0.0, mix: dict[str, float] | None = None,
+        timeout: float = TIMEOUT, seed: int = SEED) -> dict:
+    """
+    Drives the app at url (or one started in this process) for duration
+    seconds, closed-loop with users viewers or, given a rate, open-loop at
+    rate requests per second. Returns the results document.
+    """
+    mix = mix or MIX
+    if duration <= warmup:
+        raise ValueError("the duration must be longer than the warm-up")
+    stop = None
+    if url is None:
+        url, stop = serve_in_process()
+    target = urlsplit(url)
+    if target.scheme != 'http':
+        raise ValueError(f"only http:// URLs are supported, got {url!r}")
+    prefix = target.path.rstrip('/')  # e.g. http://host:8000/d/emea-2024 drives that dataset
+    mix = {prefix + path: weight for path, weight in mix.items()}
+    host, port = target.hostname, target.port or 80
+
+    records: list[Record] = []
+    start = time.perf_counter()
+    deadline = start + duration
+    try:
+        if rate is None:
+            asyncio.run(_closed_loop(host, port, users, mix, seed, start, warmup, deadline, think, timeout, records))
+        else:
+            asyncio.run(_open_loop(host, port, users, rate, mix, seed, start, deadline, timeout, records))
+    finally:
+        if stop is not None:
+            stop()
+
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'url': url,
+            'mode': 'closed' if rate is None else 'open',
+            'users': users,
+            'rate': rate,
+            'duration': duration,
+            'warmup': warmup,
+            'think': think,
+            'timeout': timeout,
+            'seed': seed,
+            'mix': mix,
+        },
+        'routes': summarize(records, start + warmup, duration - warmup),
+    }
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    options = {}
+    for flag in ('--url', '--users', '--rate', '--duration', '--warmup', '--think', '--mix', '--timeout',
+                 '--seed', '--out'):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    if args:
+        sys.exit(f"unknown arguments: {args}")
+
+    document = run(
+        url=options.get('--url'),
+        users=int(options.get('--users', USERS)),
+        rate=float(options['--rate']) if '--rate' in options else None,
+        duration=float(options.get('--duration', DURATION)),
+        warmup=float(options.get('--warmup', WARMUP)),
+        think=float(options.get('--think', 0.0)),
+        mix=parse_mix(options['--mix']) if '--mix' in options else None,
+        timeout=float(options.get('--timeout', TIMEOUT)),
+        seed=int(options.get('--seed', SEED)),
+    )
+    meta = document['meta']
+    load = f"{meta['users']} viewers" if meta['mode'] == 'closed' else f"{meta['rate']:g} req/s"
+    print(f"{meta['mode']}-loop, {load}, {meta['duration'] - meta['warmup']:g}s measured against {meta['url']}")
+    _print_report(document['routes'])
+    if '--out' in options:
+        with open(options['--out'], 'w', encoding='utf-8') as fh:
+            json.dump(document, fh, indent=1)
+        print(f"Wrote the results to {options['--out']}")
@@ -0,0 +1,159 @@
+# File Path: employee_wellness_project/registry.py
+# This file contains the registry that serves many survey datasets from one process.
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from dataset import Dataset
+
+
+class DatasetRegistry:
+    """
+    Maps dataset ids (one per business unit / survey wave) to loaded Datasets.
+
+    A dataset is loaded on first use: locate(dataset_id) returns its cleaned
+    CSV path (or None for an unknown id) and the Dataset is built from it.
+    When several requests ask for a dataset that is still loading, they all
+    wait for that one load instead of starting their own.
+
+    Loaded datasets are kept in least-recently-used order and evicted once
+    their estimated memory (Dataset.memory_usage) exceeds budget_bytes; the
+    most recently used dataset always stays. Pinned datasets, and datasets
+    holding appended responses that exist only in memory, are never evicted.
+    Requests that already hold an evicted dataset keep using it until they finish.
+    A dataset is measured again whenever it grows (its on_grow callback: an
+    append, or an aggregate built on first use), and the budget checked then.
+    """
+
+    def __init__(self, locate: Callable[[str], str | None], budget_bytes: int,
+                 loader: Callable[[str], Dataset] | None = None):
+        if loader is None:
+            from dataset import Dataset  # imported here so importing this module doesn't load pandas
+            loader = Dataset.load
+        self.budget_bytes = budget_bytes
+        self._locate = locate
+        self._loader = loader
+        self._pinned: dict[str, Dataset] = {}
+        self._loaded: OrderedDict[str, Dataset] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._loading: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def pin(self, dataset_id: str, dataset: Dataset) -> None:
+        """Registers an already loaded dataset that is never evicted."""
+        with self._lock:
+            self._pinned[dataset_id] = dataset
+
+    def get(self, dataset_id: str) -> Dataset:
+        """Returns a dataset, loading it if needed. Raises KeyError for an unknown id."""
+        with self._lock:
+            if dataset_id in self._pinned:
+                return self._pinned[dataset_id]
+            if dataset_id in self._loaded:
+                self._loaded.move_to_end(dataset_id)
+                return self._loaded[dataset_id]
+            future = self._loading.get(dataset_id)
+            owner = future is None
+            if owner:
+                future = self._loading[dataset_id] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            path = self._locate(dataset_id)
+            if path is None:
+                raise KeyError(dataset_id)
+            dataset = self._loader(path)
+            size = dataset.memory_usage()
+        except BaseException as exc:
+            with self._lock:
+                del self._loading[dataset_id]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            del self._loading[dataset_id]
+            self._loaded[dataset_id] = dataset
+            self._sizes[dataset_id] = size
+            self.loads += 1
+            self._evict()
+        self._watch_growth(dataset_id, dataset)
+        future.set_result(dataset)
+        return dataset
+
+    def peek(self, dataset_id: str) -> Dataset | None:
+        """Returns a dataset if it is pinned or loaded, without loading it or touching its LRU position."""
+        with self._lock:
+            return self._pinned.get(dataset_id) or self._loaded.get(dataset_id)
+
+    def items(self) -> list[tuple[str, Dataset]]:
+        """The pinned and loaded datasets, by id."""
+        with self._lock:
+            return [*self._pinned.items(), *self._loaded.items()]
+
+    def replace(self, dataset_id: str, dataset: Dataset) -> Dataset | None:
+        """
+        Swaps in a new version of a dataset and returns the one it replaced.
+        Requests that already hold the old version finish with it; every later
+        get() returns the new one.
+        """
+        size = dataset.memory_usage()
+        with self._lock:
+            if dataset_id in self._pinned:
+                old, self._pinned[dataset_id] = self._pinned[dataset_id], dataset
+                return old
+            old = self._loaded.get(dataset_id)
+            self._loaded[dataset_id] = dataset
+            self._loaded.move_to_end(dataset_id)
+            self._sizes[dataset_id] = size
+            self._evict()
+        self._watch_growth(dataset_id, dataset)
+        return old
+
+    def _watch_growth(self, dataset_id: str, dataset: Dataset) -> None:
+        if hasattr(dataset, 'on_grow'):  # SqlDataset holds little in memory and doesn't report growth
+            dataset.on_grow = lambda grown: self._remeasure(dataset_id, grown)
+
+    def _remeasure(self, dataset_id: str, dataset: Dataset) -> None:
+        """Records a loaded dataset's new size and evicts others if it no longer fits the budget."""
+        size = dataset.memory_usage()
+        with self._lock:
+            if self._loaded.get(dataset_id) is not dataset:  # evicted or replaced meanwhile
+                return
+            self._sizes[dataset_id] = size
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drops least recently used datasets until the loaded ones fit the budget."""
+        total = sum(self._sizes.values())
+        for dataset_id in list(self._loaded)[:-1]:
+            if total <= self.budget_bytes:
+                break
+            dataset = self._loaded[dataset_id]
+            if dataset.revision > 0 and not dataset.appends_persist:  # appended rows would be lost
+                continue
+            del self._loaded[dataset_id]
+            total -= self._sizes.pop(dataset_id)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'pinned': sorted(self._pinned),
+                'loaded': {dataset_id: self._sizes[dataset_id] for dataset_id in self._loaded},
+                'loading': sorted(self._loading),
+                'memory_bytes': sum(self._sizes.values()),
+                'budget_bytes': self.budget_bytes,
+                'loads': self.loads,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,179 @@
+# File Path: employee_wellness_project/reloader.py
+# This file contains the hot reloader that swaps in a refreshed dataset without a restart.
+#
+# A reload is double-buffered: the new version of a dataset is loaded on a
+# background thread (frame, crosstab engine, bitmap index) and its charts are
+# rendered into the chart cache while the old version keeps serving. Only then
+# is it swapped in, with one assignment in the registry. Requests that started
+# before the swap hold the old version and finish with it; the chart cache keeps
+# both versions apart (see ChartCache), so nothing is invalidated for them and
+# the first requests after the swap find warm charts instead of a cold start.
+#
+# Reloads are started from the admin endpoint (POST /api/admin/reload) or by the
+# watcher, which polls each loaded dataset's source file every interval seconds.
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable
+
+from registry import DatasetRegistry
+
+if TYPE_CHECKING:
+    from dataset import Dataset
+
+log = logging.getLogger(__name__)
+
+
+class ReloadRefused(Exception):
+    """Raised when a dataset can't be reloaded without losing data (or isn't loaded at all)."""
+
+
+class DatasetReloader:
+    """
+    Reloads datasets of a DatasetRegistry from their source files.
+
+    loader(dataset_id, path) builds the new version from the path the current
+    one was loaded from, warm(dataset_id, dataset) is called
+    with it before the swap (e.g. to render its charts), and install(dataset_id,
+    dataset) swaps it in (by default DatasetRegistry.replace). A reload asked
+    for while one of the same dataset is running joins that one.
+
+    Responses appended through the API live only in memory; a dataset holding
+    some is only reloaded with force=True, which drops them (as a restart would).
+    """
+
+    def __init__(self, registry: DatasetRegistry, loader: Callable[[str, str], Dataset],
+                 warm: Callable[[str, Dataset], None] | None = None,
+                 install: Callable[[str, Dataset], None] | None = None):
+        self._registry = registry
+        self._loader = loader
+        self._warm = warm
+        self._install = install or registry.replace
+        self._running: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._seen: dict[str, tuple[int, int]] = {}
+        self._refused: dict[str, tuple] = {}  # dataset id -> (file stamp, fingerprint) last warned about
+        self.reloads = 0
+        self.failures = 0
+        self.last: dict[str, dict] = {}
+
+    def reload(self, dataset_id: str, force: bool = False) -> Future:
+        """
+        Starts reloading a dataset in the background and returns a Future of
+        the new version. Raises ReloadRefused if the dataset isn't loaded, has
+        no source file, or holds appended responses (unless force is set).
+        """
+        with self._lock:
+            future = self._running.get(dataset_id)
+            if future is not None:
+                return future
+            current = self._registry.peek(dataset_id)
+            if current is None or current.path is None:
+                raise ReloadRefused(f"dataset {dataset_id!r} is not loaded from a file")
+            if current.revision > 0 and not current.appends_persist and not force:
+                raise ReloadRefused(f"dataset {dataset_id!r} holds {current.revision} appended batches "
+                                    "that a reload would drop")
+            future = self._running[dataset_id] = Future()
+        threading.Thread(target=self._run, args=(dataset_id, current, force, future),
+                         name=f'reload-{dataset_id}', daemon=True).start()
+        return future
+
+    def _run(self, dataset_id: str, current: Dataset, force: bool, future: Future) -> None:
+        started, revision = time.perf_counter(), current.revision
+        try:
+            dataset = self._loader(dataset_id, current.path)
+            loaded = time.perf_counter()
+            if self._warm is not None:
+                self._warm(dataset_id, dataset)
+            if current.revision != revision and not current.appends_persist and not force:
+                raise ReloadRefused(f"responses were appended to dataset {dataset_id!r} during the reload")
+            self._install(dataset_id, dataset)
+        except BaseException as exc:
+            log.exception("reloading dataset %r failed", dataset_id)
+            with self._lock:
+                del self._running[dataset_id]
+                self.failures += 1
+            future.set_exception(exc)
+            return
+        done = time.perf_counter()
+        with self._lock:
+            del self._running[dataset_id]
+            self.reloads += 1
+            self.last[dataset_id] = {
+                'fingerprint': dataset.fingerprint(),
+                'replaced': current.fingerprint(),
+                'n_rows': dataset.n_rows,
+                'load_seconds': round(loaded - started, 3),
+                'warm_seconds': round(done - loaded, 3),
+                'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+        log.info("reloaded dataset %r: %s rows in %.2fs", dataset_id, dataset.n_rows, done - started)
+        future.set_result(dataset)
+
+    # --- Watching the source files ---
+
+    def watch(self, interval: float) -> None:
+        """Starts a daemon thread that reloads datasets whose source file has changed."""
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                             name='reload-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except Exception:
+                log.exception("dataset watcher poll failed")
+
+    def poll(self) -> list[str]:
+        """
+        Starts a reload of every loaded dataset whose source file has changed
+        and has stayed unchanged since the previous poll (so a file still being
+        written is left alone). Returns the ids of the reloads started. A
+        refused reload is logged once, until the file or the dataset changes.
+        """
+        started = []
+        for dataset_id, dataset in self._registry.items():
+            if dataset.path is None:
+                continue
+            try:
+                st = os.stat(dataset.path)
+            except OSError:
+                continue
+            stamp, settled = (st.st_mtime_ns, st.st_size), self._seen.get(dataset_id)
+            self._seen[dataset_id] = stamp
+            if stamp != settled or not dataset.is_stale():
+                continue
+            try:
+                self.reload(dataset_id)
+                started.append(dataset_id)
+                self._refused.pop(dataset_id, None)
+            except ReloadRefused as exc:
+                state = (stamp, dataset.fingerprint())
+                if self._refused.get(dataset_id) != state:
+                    self._refused[dataset_id] = state
+                    log.warning("not reloading changed dataset: %s", exc)
+        return started
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'running': sorted(self._running),
+                'watching': self._watcher is not None and not self._stop.is_set(),
+                'reloads': self.reloads,
+                'failures': self.failures,
+                'last': dict(self.last),
+            }
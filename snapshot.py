@@ -0,0 +1,414 @@
+# File Path: employee_wellness_project/snapshot.py
+# This file converts the cleaned CSV into a compact columnar snapshot and loads it back.
+#
+# A snapshot is a directory next to the CSV (cleaned_employee_data.snapshot/):
+#   meta.json      - row count, source file stamp, and per-column dtype + categories
+#   NNN.bin        - one raw little-endian array per column (category codes or numbers)
+#
+# cleaned_employee_data.snapshot is a symlink to a versioned directory
+# (cleaned_employee_data.snapshot.v<stamp>/); a rebuilt snapshot is swapped in by
+# atomically renaming a new symlink over it. The .bin files can be memory-mapped
+# instead of read (read_snapshot(mmap=True)): the processes of a prefork server
+# then share one page-cache copy of the columns, and a process that still maps
+# the previous version keeps reading it until it reloads.
+#
+# Builds and swaps take an exclusive lock on cleaned_employee_data.snapshot.lock,
+# so processes that start together don't install over each other. Snapshots are
+# only built by ingest.py, by the CLI below and at preload (ensure_snapshot);
+# load_frame() never writes, and reads the CSV if the snapshot can't be used.
+#
+# Usage:
+#   python snapshot.py build   [csv_path]               # write/refresh the snapshot
+#   python snapshot.py compare [csv_path] [--scale N]   # time & memory vs. the CSV path
+
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # no file locks (Windows): concurrent builds aren't serialized
+    fcntl = None
+
+SNAPSHOT_VERSION = 1
+# Block size used when streaming a column during a recode.
+APPEND_BLOCK_ROWS = 1_000_000
+
+
+def snapshot_path(csv_path: str) -> str:
+    """Returns the snapshot directory that belongs to a CSV file."""
+    return os.path.splitext(csv_path)[0] + '.snapshot'
+
+
+def code_dtype(n_categories: int) -> np.dtype:
+    """Returns the narrowest signed integer dtype that can hold the codes (and -1 for NA)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories <= np.iinfo(dtype).max:
+            return np.dtype(dtype).newbyteorder('<')
+    return np.dtype('<i8')
+
+
+def to_categorical(frame: pd.DataFrame) -> pd.DataFrame:
+    """Converts every non-numeric column to a category dtype with sorted categories."""
+    out = {}
+    for col in frame.columns:
+        series = frame[col]
+        if pd.api.types.is_numeric_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+            out[col] = series
+        else:
+            out[col] = series.astype('category')
+    return pd.DataFrame(out, index=frame.index)
+
+
+def _source_stamp(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+@contextlib.contextmanager
+def snapshot_lock(path: str):
+    """
+    Holds an exclusive lock on path + '.lock' (created if needed) while the
+    block runs, across threads and processes. Not reentrant.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(f'{path}.lock', 'a') as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _version_name(path: str) -> str:
+    """A new version directory name for path; names sort in the order they were made."""
+    return f'{path}.v{time.time_ns():016x}{uuid.uuid4().hex[:4]}'
+
+
+def _version_stamp(name: str) -> int:
+    """The creation stamp in a version name (-1 for the unstamped names of older releases)."""
+    stamp = name.rsplit('.v', 1)[-1]
+    return int(stamp[:16], 16) if len(stamp) == 20 else -1
+
+
+# -------------------------------------------------------------------- #
+# --- WRITING ---
+# -------------------------------------------------------------------- #
+
+def write_snapshot(frame: pd.DataFrame, path: str, source: str | None = None) -> None:
+    """
+    Writes a frame as a snapshot directory. The files are written into a
+    temporary sibling directory first and then moved into place, so readers
+    never see a half-written snapshot.
+    """
+    install_snapshot(_stage_snapshot(frame, path, source), path)
+
+
+def _stage_snapshot(frame: pd.DataFrame, path: str, source: str | None = None) -> str:
+    """Writes a frame as a snapshot into a new temporary sibling of path; returns that directory."""
+    frame = to_categorical(frame)
+    parent = os.path.dirname(os.path.abspath(path))
+    tmp = tempfile.mkdtemp(prefix='.snapshot-', dir=parent)
+    columns = []
+    for i, col in enumerate(frame.columns):
+        series = frame[col]
+        filename = f'{i:03d}.bin'
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = [str(c) for c in series.cat.categories]
+            dtype = code_dtype(len(categories))
+            series.cat.codes.to_numpy().astype(dtype).tofile(os.path.join(tmp, filename))
+            columns.append({'name': col, 'kind': 'category', 'dtype': dtype.str,
+                            'file': filename, 'categories': categories})
+        else:
+            values = series.to_numpy()
+            values = values.astype(values.dtype.newbyteorder('<'))
+            values.tofile(os.path.join(tmp, filename))
+            columns.append({'name': col, 'kind': 'numeric', 'dtype': values.dtype.str, 'file': filename})
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'n_rows': len(frame),
+        'source': _source_stamp(source) if source else None,
+        'columns': columns,
+    }
+    _write_meta(tmp, meta)
+    return tmp
+
+
+def install_snapshot(staged: str, path: str) -> None:
+    """
+    Moves a fully written snapshot directory into place, replacing any old one.
+    The staged directory becomes a new version and the path's symlink is
+    switched to it with one atomic rename, so readers never find the path
+    missing or half-written. The version it replaces is kept, for readers
+    still opening its files; versions older than that one are removed.
+    """
+    with snapshot_lock(path):
+        _install_locked(staged, path)
+
+
+def _install_locked(staged: str, path: str) -> None:
+    """install_snapshot() for a caller that holds snapshot_lock(path)."""
+    parent = os.path.dirname(os.path.abspath(path))
+    if os.path.islink(staged):  # itself written through install_snapshot: move its version
+        link, staged = staged, os.path.realpath(staged)
+        os.remove(link)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(f'{link}.lock')
+    os.chmod(staged, os.stat(parent).st_mode & 0o777)  # mkdtemp makes it private to its owner
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    if os.path.isdir(path) and not os.path.islink(path):  # an unversioned snapshot: moved aside once
+        previous = _version_name(path)
+        os.rename(path, previous)
+    version = _version_name(path)
+    os.rename(staged, version)
+    link = f'{path}.link-{uuid.uuid4().hex[:12]}'
+    try:
+        os.symlink(os.path.basename(version), link)
+    except FileExistsError:
+        raise
+    except OSError:  # no symlinks (e.g. Windows without developer mode): rename in two steps
+        if os.path.exists(path):
+            retired = staged + '.old'
+            os.rename(path, retired)
+            os.rename(version, path)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.rename(version, path)
+        return
+    os.replace(link, path)
+
+    if previous is None:
+        return
+    prefix, oldest_kept = os.path.basename(path) + '.v', _version_stamp(os.path.basename(previous))
+    for name in os.listdir(parent):
+        if name.startswith(prefix) and _version_stamp(name) < oldest_kept:
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+def _write_meta(path: str, meta: dict) -> None:
+    """Atomically replaces a snapshot's meta.json, the commit point for every write."""
+    tmp = os.path.join(path, 'meta.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(meta, fh, indent=1)
+    os.replace(tmp, os.path.join(path, 'meta.json'))
+
+
+def _recode_column(path: str, spec: dict, n_rows: int, categories: list[str]) -> list[str]:
+    """
+    Rewrites a category column against a new (sorted, superset) dictionary,
+    streaming the codes in blocks. The result goes to a new file so readers of
+    the current meta.json are unaffected; returns the files that become obsolete.
+    """
+    old_dtype, new_dtype = np.dtype(spec['dtype']), code_dtype(len(categories))
+    lookup = np.append(pd.Index(categories).get_indexer(spec['categories']), -1).astype(new_dtype)
+    stem = spec['file'].split('.')[0]
+    generation = spec.get('generation', 0) + 1
+    new_file = f'{stem}.{generation}.bin'
+    with open(os.path.join(path, spec['file']), 'rb') as src, open(os.path.join(path, new_file), 'wb') as dst:
+        for start in range(0, n_rows, APPEND_BLOCK_ROWS):
+            count = min(APPEND_BLOCK_ROWS, n_rows - start)
+            lookup[np.fromfile(src, dtype=old_dtype, count=count)].tofile(dst)
+    obsolete = [spec['file']]
+    spec.update(file=new_file, generation=generation, dtype=new_dtype.str, categories=categories)
+    return obsolete
+
+
+def append_snapshot(frame: pd.DataFrame, path: str, source: str | None = None) -> None:
+    """
+    Appends rows to an existing snapshot in place.
+    Codes are written past the committed row count and only become visible
+    when meta.json is replaced. Unseen category values are merged into the
+    sorted dictionary by recoding just that column.
+    """
+    meta = read_meta(path)
+    n_rows = meta['n_rows']
+    obsolete = []
+    for spec in meta['columns']:
+        series = frame[spec['name']]
+        if spec['kind'] == 'category' and isinstance(series.dtype, pd.CategoricalDtype) \
+                and series.cat.categories.astype(str).equals(pd.Index(spec['categories'])):
+            # same dictionary: the codes can be written as they are
+            values = series.cat.codes.to_numpy().astype(np.dtype(spec['dtype']))
+        elif spec['kind'] == 'category':
+            seen = pd.Index(series.dropna().astype(str).unique())
+            unseen = seen.difference(spec['categories'])
+            if len(unseen):
+                obsolete += _recode_column(path, spec, n_rows, sorted([*spec['categories'], *unseen]))
+            codes = pd.Categorical(series.astype(object), categories=spec['categories']).codes
+            values = codes.astype(np.dtype(spec['dtype']))
+        else:
+            values = series.to_numpy().astype(np.dtype(spec['dtype']))
+        itemsize = np.dtype(spec['dtype']).itemsize
+        with open(os.path.join(path, spec['file']), 'r+b') as fh:
+            fh.seek(n_rows * itemsize)
+            values.tofile(fh)
+            fh.truncate()
+
+    meta['n_rows'] = n_rows + len(frame)
+    if source:
+        meta['source'] = _source_stamp(source)
+    _write_meta(path, meta)
+    for filename in obsolete:
+        os.remove(os.path.join(path, filename))
+
+
+def stamp_snapshot(path: str, source: str) -> None:
+    """Records the current state of the source CSV, marking the snapshot as fresh."""
+    meta = read_meta(path)
+    meta['source'] = _source_stamp(source)
+    _write_meta(path, meta)
+
+
+def build_snapshot(csv_path: str) -> str:
+    """Converts a cleaned CSV into its snapshot and returns the snapshot path."""
+    path = snapshot_path(csv_path)
+    with snapshot_lock(path):
+        _install_locked(_stage_snapshot(pd.read_csv(csv_path), path, source=csv_path), path)
+    return path
+
+
+def ensure_snapshot(csv_path: str) -> bool:
+    """
+    Builds the CSV's snapshot unless a fresh one exists; returns whether one
+    does afterwards. Processes calling this together build it once: the
+    others wait for the lock and find it fresh. A build that fails (e.g. a
+    read-only data directory) is given up on, and the CSV is read instead.
+    """
+    path = snapshot_path(csv_path)
+    try:
+        if is_fresh(csv_path):
+            return True
+        with snapshot_lock(path):
+            if not is_fresh(csv_path):
+                _install_locked(_stage_snapshot(pd.read_csv(csv_path), path, source=csv_path), path)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+# -------------------------------------------------------------------- #
+# --- READING ---
+# -------------------------------------------------------------------- #
+
+def read_meta(path: str) -> dict:
+    """Reads a snapshot's meta.json."""
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def read_snapshot(path: str, mmap: bool = False) -> pd.DataFrame:
+    """
+    Loads a snapshot directory into a DataFrame with category dtypes. With
+    mmap=True the columns are read-only memory maps of the .bin files rather
+    than copies, so they are only paged in as they are used and the page cache
+    holds one copy for every process that maps them.
+    """
+    path = os.path.realpath(path)  # every file from the same version, even if it is swapped meanwhile
+    meta = read_meta(path)
+    n_rows = meta['n_rows']
+    data = {}
+    for spec in meta['columns']:
+        dtype, filename = np.dtype(spec['dtype']), os.path.join(path, spec['file'])
+        if mmap and n_rows:
+            values = np.memmap(filename, dtype=dtype, mode='r', shape=(n_rows,))
+        else:
+            values = np.fromfile(filename, dtype=dtype, count=n_rows)
+        if spec['kind'] == 'category':
+            dtype = pd.CategoricalDtype(spec['categories'])
+            data[spec['name']] = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        else:
+            data[spec['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def is_fresh(csv_path: str) -> bool:
+    """True if the CSV's snapshot exists and was built from the CSV as it is now."""
+    path = snapshot_path(csv_path)
+    if not os.path.exists(os.path.join(path, 'meta.json')):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    meta = read_meta(path)
+    return meta.get('version') == SNAPSHOT_VERSION and meta.get('source') == _source_stamp(csv_path)
+
+
+def load_frame(csv_path: str, mmap: bool = False) -> pd.DataFrame:
+    """
+    Loads the dataset, preferring a fresh snapshot and falling back to the CSV
+    (also when the snapshot can't be read). Either way the non-numeric columns
+    come back as category dtypes. With mmap=True the snapshot's columns are
+    memory-mapped. A missing or stale snapshot is not built here (see
+    ensure_snapshot()).
+    """
+    try:
+        if is_fresh(csv_path):
+            return read_snapshot(snapshot_path(csv_path), mmap)
+    except Exception:  # unreadable, or swapped and removed while opening it: the CSV has the same rows
+        pass
+    return to_categorical(pd.read_csv(csv_path))
+
+
+# -------------------------------------------------------------------- #
+# --- MEASURED COMPARISON ---
+# -------------------------------------------------------------------- #
+
+def _best_of(fn, repeat: int = 3) -> tuple[float, pd.DataFrame]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def compare(csv_path: str, scale: int = 1) -> None:
+    """Prints load time and in-memory size for the CSV path vs. the snapshot path."""
+    workdir = None
+    if scale > 1:
+        workdir = tempfile.mkdtemp(prefix='snapshot-compare-')
+        scaled = os.path.join(workdir, 'scaled.csv')
+        pd.concat([pd.read_csv(csv_path)] * scale, ignore_index=True).to_csv(scaled, index=False)
+        csv_path = scaled
+    try:
+        build_snapshot(csv_path)
+        csv_time, csv_df = _best_of(lambda: pd.read_csv(csv_path))
+        snap_time, snap_df = _best_of(lambda: read_snapshot(snapshot_path(csv_path)))
+        csv_mb = csv_df.memory_usage(deep=True).sum() / 1e6
+        snap_mb = snap_df.memory_usage(deep=True).sum() / 1e6
+        print(f"rows: {len(csv_df):,}")
+        print(f"{'path':<10}{'load (ms)':>12}{'memory (MB)':>14}")
+        print(f"{'csv':<10}{csv_time * 1000:>12.1f}{csv_mb:>14.1f}")
+        print(f"{'snapshot':<10}{snap_time * 1000:>12.1f}{snap_mb:>14.1f}")
+        print(f"speedup x{csv_time / snap_time:.1f}, memory x{csv_mb / snap_mb:.1f} smaller")
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    command = args.pop(0) if args else 'build'
+    scale = 1
+    if '--scale' in args:
+        i = args.index('--scale')
+        scale = int(args[i + 1])
+        del args[i:i + 2]
+    target = args[0] if args else 'cleaned_employee_data.csv'
+
+    if command == 'build':
+        print(f"Snapshot written to {build_snapshot(target)}")
+    elif command == 'compare':
+        compare(target, scale)
+    else:
+        sys.exit(f"unknown command: {command}")
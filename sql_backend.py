@@ -0,0 +1,496 @@
+# File Path: employee_wellness_project/sql_backend.py
+# This file contains the optional SQLite storage backend, for datasets larger than RAM.
+#
+# The responses live in an SQLite file next to the cleaned CSV
+# (cleaned_employee_data.sqlite): one 'responses' table, with an index on every
+# category column paired with 'treatment', so the '<column> x treatment' counts
+# behind the rate charts are read from the indexes alone. SqlDataset has the same
+# interface as Dataset, and its engine (SqlEngine) answers the same crosstab /
+# value_counts / grouped_value_counts / histogram queries as CrosstabEngine by
+# pushing GROUP BY queries down to SQLite. Only the small count tables are held
+# in memory; they are formatted by the CrosstabEngine code, so both backends
+# return identical frames.
+#
+# Queries run on a pool of read-only connections (the file is in WAL mode, so
+# they never wait for an append being written). Appended responses are written
+# to the file, so they survive restarts.
+#
+# Usage:
+#   python sql_backend.py build [csv_path]     # write/refresh the database
+
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+from chart_executor import default_workers
+from crosstab_engine import CrosstabEngine, _Lazy
+
+DATABASE_VERSION = 1
+TABLE = 'responses'
+# CSV rows read (and inserted) per batch while building the database
+CHUNK_ROWS = 200_000
+# Page cache used while building the indexes, in KiB
+BUILD_CACHE_KB = 256 * 1024
+
+
+def database_path(csv_path: str) -> str:
+    """Returns the database file that belongs to a CSV file."""
+    return os.path.splitext(csv_path)[0] + '.sqlite'
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _source_stamp(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _records(frame: pd.DataFrame) -> list[tuple]:
+    """The frame's rows as tuples of plain Python values, None for missing."""
+    columns = [frame[col].astype(object).where(frame[col].notna(), None) for col in frame.columns]
+    return list(zip(*columns))
+
+
+# -------------------------------------------------------------------- #
+# --- BUILDING ---
+# -------------------------------------------------------------------- #
+
+def build_database(csv_path: str, target: str = 'treatment') -> str:
+    """
+    Converts a cleaned CSV into its database and returns the database path.
+    The CSV is streamed in chunks, and the file is written under a temporary
+    name and moved into place, so readers never see a half-built database.
+    """
+    path = database_path(csv_path)
+    tmp = path + '.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    try:
+        # the file is only moved into place once complete, so it needs no rollback journal
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(f"PRAGMA cache_size=-{BUILD_CACHE_KB}")
+        kinds = None
+        for chunk in pd.read_csv(csv_path, chunksize=CHUNK_ROWS):
+            if kinds is None:
+                kinds = {col: 'integer' if pd.api.types.is_integer_dtype(chunk[col])
+                         else 'real' if pd.api.types.is_numeric_dtype(chunk[col]) else 'category'
+                         for col in chunk.columns}
+                sql_types = {'integer': 'INTEGER', 'real': 'REAL', 'category': 'TEXT'}
+                conn.execute(f"CREATE TABLE {TABLE} ("
+                             + ', '.join(f'{_quote(col)} {sql_types[kind]}' for col, kind in kinds.items()) + ')')
+            conn.executemany(f"INSERT INTO {TABLE} VALUES ({', '.join('?' * len(kinds))})", _records(chunk))
+
+        for i, (col, kind) in enumerate(kinds.items()):
+            if kind == 'category' and col != target:
+                conn.execute(f"CREATE INDEX idx_{i} ON {TABLE} ({_quote(col)}, {_quote(target)})")
+            elif col == target or kind == 'integer':
+                conn.execute(f"CREATE INDEX idx_{i} ON {TABLE} ({_quote(col)})")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        meta = {
+            'version': DATABASE_VERSION, 'target': target, 'kinds': kinds,
+            'source': _source_stamp(csv_path), 'build': uuid.uuid4().hex, 'generation': 0,
+        }
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [(k, json.dumps(v)) for k, v in meta.items()])
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+    # a write-ahead log left by the previous database must not be replayed into this one
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.replace(tmp, path)
+    return path
+
+
+def read_meta(path: str) -> dict:
+    """Reads a database's meta table."""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta")}
+    finally:
+        conn.close()
+
+
+def is_fresh(csv_path: str) -> bool:
+    """True if the CSV's database exists and was built from the CSV as it is now."""
+    path = database_path(csv_path)
+    if not os.path.exists(path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    meta = read_meta(path)
+    return meta.get('version') == DATABASE_VERSION and meta.get('source') == _source_stamp(csv_path)
+
+
+# -------------------------------------------------------------------- #
+# --- QUERYING ---
+# -------------------------------------------------------------------- #
+
+class ConnectionPool:
+    """Up to size read-only connections to one database, shared between threads."""
+
+    def __init__(self, path: str, size: int | None = None):
+        self.path = path
+        self.size = size or default_workers()
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection for the with-block, opening one if none is idle and the pool has room."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._opened < self.size
+                if grow:
+                    self._opened += 1
+            if grow:
+                conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+            else:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def query(self, sql: str, params: list | tuple = ()) -> list[tuple]:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+
+class SqlFilter:
+    """
+    A row filter {column: [values]} as an SQL condition (values within a column
+    OR-ed, columns AND-ed), optionally also restricted to a set of rowids.
+    ~filter selects every other row, including rows with a missing value, like
+    ~mask does for a boolean row mask.
+    """
+
+    def __init__(self, filters: dict[str, list[str]], negate: bool = False, rowids: np.ndarray | None = None):
+        self.filters = filters
+        self.negate = negate
+        self.rowids = rowids
+
+    def __invert__(self) -> 'SqlFilter':
+        return SqlFilter(self.filters, not self.negate, self.rowids)
+
+    def sql(self) -> tuple[str, list]:
+        clauses, params = [], []
+        for col, values in self.filters.items():
+            clauses.append(f"COALESCE({_quote(col)} IN ({', '.join('?' * len(values))}), 0)")
+            params += values
+        if self.rowids is not None:  # one JSON parameter, however many rows
+            clauses.append("rowid IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(self.rowids.tolist()))
+        condition = ' AND '.join(clauses) or '1'
+        return (f'NOT ({condition})' if self.negate else condition), params
+
+
+class SqlEngine(CrosstabEngine):
+    """
+    A CrosstabEngine whose counts come from GROUP BY queries on the database,
+    optionally restricted to the rows matching a filter (a segment). Counts are
+    fetched on first use and kept; row-level codes are never loaded. Row
+    positions are rowids - 1: rows are only ever inserted, in order.
+    """
+
+    def __init__(self, pool: ConnectionPool, kinds: dict[str, str], target: str = 'treatment',
+                 where: SqlFilter | None = None, labels: dict[str, pd.Index] | None = None):
+        self.target = target
+        self.kinds = kinds
+        self._pool = pool
+        self._where = where
+        self.labels = labels if labels is not None else {
+            col: pd.Index(sorted(value for (value,) in pool.query(
+                f"SELECT DISTINCT {_quote(col)} FROM {TABLE} WHERE {_quote(col)} IS NOT NULL")))
+            for col, kind in kinds.items() if kind == 'category'
+        }
+        self.codes, self.values, self._buffers = {}, {}, {}
+        self._value_counts = _Lazy(self._count_values)
+        self._histograms = _Lazy(self._count_histogram)
+        self._tables = {}
+        self._lock = threading.Lock()
+        self.n_rows = self._query('COUNT(*)', [])[0][0]
+
+    def _query(self, select: str, not_null: list[str], group_by: str = '',
+               mask: SqlFilter | None = None) -> list[tuple]:
+        conditions, params = [f'{_quote(col)} IS NOT NULL' for col in not_null], []
+        for condition in (self._where, mask):
+            if condition is not None:
+                sql, values = condition.sql()
+                conditions.append(f'({sql})')
+                params += values
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        group = f' GROUP BY {group_by}' if group_by else ''
+        return self._pool.query(f"SELECT {select} FROM {TABLE}{where}{group}", params)
+
+    def _count_pairs(self, pairs: list[tuple[str, str]], mask: SqlFilter | None = None,
+                     codes: dict | None = None) -> list[np.ndarray]:
+        tables = []
+        for row, col in pairs:
+            table = np.zeros((len(self.labels[row]), len(self.labels[col])), dtype=np.int64)
+            r, c = _quote(row), _quote(col)
+            result = self._query(f'{r}, {c}, COUNT(*)', [row, col], f'{r}, {c}', mask)
+            if result:
+                row_values, col_values, counts = zip(*result)
+                table[self.labels[row].get_indexer(row_values), self.labels[col].get_indexer(col_values)] = counts
+            tables.append(table)
+        return tables
+
+    def counts(self, row: str, col: str, mask: SqlFilter | None = None) -> np.ndarray:
+        if mask is not None:
+            return self._count_pairs([(row, col)], mask)[0]
+        return super().counts(row, col)
+
+    def _count_values(self, col: str) -> np.ndarray:
+        counts = np.zeros(len(self.labels[col]), dtype=np.int64)
+        result = self._query(f'{_quote(col)}, COUNT(*)', [col], _quote(col))
+        if result:
+            values, n = zip(*result)
+            counts[self.labels[col].get_indexer(values)] = n
+        return counts
+
+    def _count_histogram(self, col: str) -> tuple[int, np.ndarray]:
+        result = self._query(f'{_quote(col)}, COUNT(*)', [col], _quote(col))
+        if not result:
+            return 0, np.zeros(0, dtype=np.int64)
+        values, n = (np.array(v, dtype=np.int64) for v in zip(*result))
+        base = int(values.min())
+        hist = np.zeros(int(values.max()) - base + 1, dtype=np.int64)
+        hist[values - base] = n
+        return base, hist
+
+    def binned_counts(self, col: str, edges: tuple[int, ...], by: str) -> np.ndarray:
+        cases = ' '.join(f'WHEN {_quote(col)} < {int(edge)} THEN {i}' for i, edge in enumerate(edges))
+        band = f'CASE {cases} ELSE {len(edges)} END'
+        table = np.zeros((len(edges) + 1, len(self.labels[by])), dtype=np.int64)
+        result = self._query(f'{band}, {_quote(by)}, COUNT(*)', [col, by], '1, 2')
+        if result:
+            bands, values, counts = zip(*result)
+            table[list(bands), self.labels[by].get_indexer(values)] = counts
+        return table
+
+    def subset(self, rows: np.ndarray) -> 'SqlEngine':
+        """Returns a read-only engine over the given row positions of this one (see CrosstabEngine.subset)."""
+        if self._where is None:
+            rowids = np.asarray(rows, dtype=np.int64) + 1
+        else:
+            rowids = np.sort(np.array([rowid for (rowid,) in self._query('rowid', [])], dtype=np.int64))[rows]
+        return SqlEngine(self._pool, self.kinds, self.target, SqlFilter({}, rowids=rowids), self.labels)
+
+    def append(self, batch: pd.DataFrame, meta: dict | None = None) -> None:
+        """
+        Inserts a batch of new rows (see SqlDataset.prepare) into the database,
+        in one transaction with the given meta table entries. The counts fetched
+        so far are dropped, to be queried again; labels never seen before are
+        added after the others, as by CrosstabEngine.append.
+        """
+        if self._where is not None:
+            raise ValueError("a segment's engine is read-only")
+        conn = sqlite3.connect(self._pool.path)
+        try:
+            with conn:
+                conn.executemany(f"INSERT INTO {TABLE} VALUES ({', '.join('?' * len(self.kinds))})",
+                                 _records(batch[list(self.kinds)]))
+                conn.executemany("UPDATE meta SET value = ? WHERE key = ?",
+                                 [(json.dumps(value), key) for key, value in (meta or {}).items()])
+        finally:
+            conn.close()
+        with self._lock:
+            labels = dict(self.labels)
+            for col, known in labels.items():
+                unseen = pd.Index(batch[col].dropna().unique()).difference(known)
+                if len(unseen):
+                    labels[col] = known.append(unseen)
+            self.labels = labels
+            self._value_counts = _Lazy(self._count_values)
+            self._histograms = _Lazy(self._count_histogram)
+            self._tables = {}
+            self.n_rows = self._query('COUNT(*)', [])[0][0]
+
+
+# -------------------------------------------------------------------- #
+# --- DATASETS ---
+# -------------------------------------------------------------------- #
+
+class SqlDataset:
+    """
+    A survey dataset stored in an SQLite database: the counterpart of Dataset
+    for data that doesn't fit in memory. Aggregates are pushed down to SQLite
+    by its SqlEngine; .frame (only needed by charts that plot row-level data)
+    reads the whole table.
+    """
+
+    # The full dataset is not a segment
+    segment_key = ''
+    # Appended responses are written to the database, so dropping it loses nothing
+    appends_persist = True
+
+    def __init__(self, db_path: str, source: str | None = None, pool_size: int | None = None):
+        self.db_path = db_path
+        self.path = source or db_path
+        meta = read_meta(db_path)
+        self.kinds: dict[str, str] = meta['kinds']
+        self.target: str = meta['target']
+        self.columns = list(self.kinds)
+        self._build: str = meta['build']
+        self._generation: int = meta['generation']
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.engine = SqlEngine(self.pool, self.kinds, self.target)
+        self.revision = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, csv_path: str) -> 'SqlDataset':
+        """Opens a CSV's database, (re)building it first if it is missing or older than the CSV."""
+        if not is_fresh(csv_path):
+            build_database(csv_path)
+        return cls(database_path(csv_path), csv_path)
+
+    @property
+    def n_rows(self) -> int:
+        return self.engine.n_rows
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The row-level frame, read from the database (category dtypes, as Dataset.frame)."""
+        return _read_frame(self.pool, self.engine)
+
+    def fingerprint(self) -> str:
+        """Identifies this exact version of the data: the database build and its appends."""
+        return f'sqlite-{self._build[:12]}-g{self._generation}'
+
+    def is_stale(self) -> bool:
+        """True if the source CSV has changed since the database was built (see Dataset.is_stale)."""
+        return self.path != self.db_path and os.path.exists(self.path) and not is_fresh(self.path)
+
+    def memory_usage(self) -> int:
+        """Bytes held by the count tables fetched so far."""
+        return self.engine.nbytes
+
+    # --- Segments ---
+
+    def normalize_filters(self, filters: dict[str, list[str]]) -> dict[str, list[str]]:
+        """Checks that every filter column is a categorical column; drops empty filters."""
+        unknown = [col for col in filters if col not in self.engine.labels]
+        if unknown:
+            raise ValueError(f"cannot filter on: {unknown}")
+        return {col: sorted(set(values)) for col, values in sorted(filters.items()) if values}
+
+    def mask(self, filters: dict[str, list[str]]) -> SqlFilter:
+        """The rows matching the filters, as an SQL condition (invert it with ~)."""
+        return SqlFilter(self.normalize_filters(filters))
+
+    def select(self, filters: dict[str, list[str]], query: str | None = None) -> 'SqlDataset | SqlDatasetView':
+        """Returns the segment of respondents matching the filters (see Dataset.select)."""
+        if query and query.strip():
+            raise ValueError("keyword search is not available for SQLite-backed datasets")
+        filters = self.normalize_filters(filters)
+        if not filters:
+            return self
+        return SqlDatasetView(self, filters)
+
+    # --- Appending new responses ---
+
+    def prepare(self, rows: list[dict] | pd.DataFrame) -> pd.DataFrame:
+        """
+        Validates a batch of new responses and returns it as a frame with the
+        dataset's columns. Raises ValueError for missing/unknown columns or
+        values that don't fit a numeric column. A 'Timestamp' column is
+        accepted, as by Dataset.prepare, but not stored.
+        """
+        batch = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+        missing = [c for c in self.columns if c not in batch.columns]
+        unknown = [c for c in batch.columns if c not in self.columns and c != 'Timestamp']
+        if missing:
+            raise ValueError(f"missing columns: {missing}")
+        if unknown:
+            raise ValueError(f"unknown columns: {unknown}")
+        batch = batch[self.columns].reset_index(drop=True)
+        for col, kind in self.kinds.items():
+            if kind == 'category':
+                batch[col] = batch[col].astype(object).where(batch[col].notna(), None)
+            else:
+                try:
+                    values = pd.to_numeric(batch[col], errors='raise')
+                    batch[col] = values.astype('Int64') if kind == 'integer' else values
+                except (TypeError, ValueError) as exc:
+                    raise ValueError(f"column {col!r}: {exc}") from exc
+        return batch
+
+    def append(self, rows: list[dict] | pd.DataFrame) -> int:
+        """Inserts a batch of responses into the database. Returns the batch size."""
+        batch = self.prepare(rows)
+        with self._lock:
+            self.engine.append(batch, {'generation': self._generation + 1})
+            self._generation += 1
+            self.revision += 1
+        return len(batch)
+
+
+class SqlDatasetView:
+    """A segment of an SqlDataset: its engine aggregates over the matching rows only."""
+
+    def __init__(self, parent: SqlDataset, filters: dict[str, list[str]]):
+        self.parent = parent
+        self.filters = filters
+        self.path = parent.path
+        self.columns = parent.columns
+        self.revision = parent.revision
+        self.engine = SqlEngine(parent.pool, parent.kinds, parent.target, SqlFilter(filters), parent.engine.labels)
+        self.segment_key = urlencode([(col, v) for col, values in filters.items() for v in values])
+
+    @property
+    def n_rows(self) -> int:
+        return self.engine.n_rows
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The row-level frame of the segment, read from the database."""
+        return _read_frame(self.parent.pool, self.engine)
+
+    def fingerprint(self) -> str:
+        """The parent's data version; the segment itself is identified by segment_key."""
+        return self.parent.fingerprint()
+
+    def mask(self, filters: dict[str, list[str]]) -> SqlFilter:
+        return self.parent.mask(filters)
+
+
+def _read_frame(pool: ConnectionPool, engine: SqlEngine) -> pd.DataFrame:
+    """Reads the engine's rows into a frame with the same dtypes as Dataset.frame."""
+    sql, params = engine._where.sql() if engine._where is not None else ('1', [])
+    with pool.connection() as conn:
+        frame = pd.read_sql_query(f"SELECT * FROM {TABLE} WHERE {sql}", conn, params=params)
+    for col, kind in engine.kinds.items():
+        if kind == 'category':
+            frame[col] = pd.Categorical(frame[col], categories=engine.labels[col].sort_values())  # appends add labels last
+    return frame
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if not args or args[0] != 'build':
+        sys.exit("usage: python sql_backend.py build [csv_path]")
+    csv_path = args[1] if len(args) > 1 else 'cleaned_employee_data.csv'
+    start = time.perf_counter()
+    path = build_database(csv_path)
+    print(f"Built {path} ({os.path.getsize(path) / 1e6:.1f} MB, {time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,228 @@
+# File Path: employee_wellness_project/synthetic.py
+# This file generates synthetic survey responses, for testing the dashboards at scale.
+#
+# The model is learned from the cleaned file. Every column is drawn conditionally
+# on 'treatment', so each column's joint distribution with treatment (what most
+# charts show) is reproduced. Every column also gets at most one other column as
+# a parent, chosen by a maximum spanning tree over the conditional mutual
+# information between columns (a tree-augmented naive Bayes model), so the
+# strongest other pairwise dependencies (e.g. care_options x no_employees) are
+# kept too. Column names and category vocabularies are those of the cleaned file.
+#
+# Rows are drawn in vectorized chunks from a seeded generator and streamed to
+# disk, so memory use does not depend on the number of rows.
+#
+# Usage:
+#   python synthetic.py N_ROWS OUT_CSV [--format csv|snapshot|both] [--seed S]
+#                       [--chunk-size N] [--source CLEANED_CSV]
+
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from snapshot import append_snapshot, install_snapshot, load_frame, snapshot_path, stamp_snapshot, write_snapshot
+
+SOURCE_PATH = 'cleaned_employee_data.csv'
+CHUNK_ROWS = 500_000
+SEED = 0
+
+
+def _codes(series: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Integer codes of a column plus its values; a missing value gets the code len(values)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, values = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, values = pd.factorize(series, sort=True)
+        values = pd.Index(values)
+    return np.where(codes < 0, len(values), codes).astype(np.int64), values
+
+
+def _edge_score(x: np.ndarray, nx: int, y: np.ndarray, ny: int, t: np.ndarray, nt: int) -> float:
+    """
+    Conditional mutual information I(X; Y | T) in nats, minus an AIC-style
+    penalty for the cells the pair adds, so that pairs linked only by noise in
+    sparse high-cardinality tables are not linked.
+    """
+    n = len(x)
+    joint = np.bincount((t * nx + x) * ny + y, minlength=nt * nx * ny).reshape(nt, nx, ny).astype(float)
+    tx, ty, tt = joint.sum(axis=2, keepdims=True), joint.sum(axis=1, keepdims=True), joint.sum(axis=(1, 2), keepdims=True)
+    nz = joint > 0
+    with np.errstate(divide='ignore', invalid='ignore'):  # empty cells are masked out
+        info = (joint[nz] * np.log((joint * tt / (tx * ty))[nz])).sum() / n
+    # degrees of freedom actually used: observed cells beyond the two P(. | T) margins
+    dof = nz.sum() - (tx > 0).sum() - (ty > 0).sum() + (tt > 0).sum()
+    return info - dof / n
+
+
+class SurveyModel:
+    """
+    A tree-augmented naive Bayes model of the survey: the target column is drawn
+    from its marginal, then every other column from P(column | target, parent).
+    """
+
+    def __init__(self, frame: pd.DataFrame, target: str = 'treatment'):
+        self.columns = list(frame.columns)
+        self.target = target
+        self.values: dict[str, pd.Index] = {}
+        self.numeric: dict[str, bool] = {}
+        codes: dict[str, np.ndarray] = {}
+        for col in self.columns:
+            codes[col], self.values[col] = _codes(frame[col])
+            self.numeric[col] = pd.api.types.is_numeric_dtype(frame[col])
+        self.sizes = {col: len(values) + 1 for col, values in self.values.items()}  # + missing
+
+        self.parents = self._learn_parents(codes)
+        self.order = self._sampling_order()
+        self.tables = {col: self._cdf_table(codes, col) for col in self.columns}
+
+    def _learn_parents(self, codes: dict[str, np.ndarray]) -> dict[str, list[str]]:
+        """Every column's parents: [] for the target, [target] or [target, other column]."""
+        t, nt = codes[self.target], self.sizes[self.target]
+        others = [col for col in self.columns if col != self.target]
+        score = {
+            (a, b): _edge_score(codes[a], self.sizes[a], codes[b], self.sizes[b], t, nt)
+            for i, a in enumerate(others) for b in others[i + 1:]
+        }
+        parents = {self.target: [], **{col: [self.target] for col in others}}
+
+        # Prim's algorithm for the maximum spanning forest over positive scores
+        unattached = set(others)
+        while unattached:
+            root = next(col for col in others if col in unattached)
+            unattached.remove(root)
+            tree = [root]
+            while True:
+                best = max(
+                    ((score.get((a, b), score.get((b, a))), a, b) for a in tree for b in unattached),
+                    default=None,
+                )
+                if best is None or best[0] <= 0:
+                    break
+                _, parent, child = best
+                parents[child] = [self.target, parent]
+                unattached.remove(child)
+                tree.append(child)
+        return parents
+
+    def _sampling_order(self) -> list[str]:
+        """The columns ordered so that every parent is drawn before its children."""
+        order, placed = [], set()
+        while len(order) < len(self.columns):
+            for col in self.columns:
+                if col not in placed and all(p in placed for p in self.parents[col]):
+                    order.append(col)
+                    placed.add(col)
+        return order
+
+    def _cdf_table(self, codes: dict[str, np.ndarray], col: str) -> np.ndarray:
+        """
+        The cumulative distribution of col for every combination of its parents'
+        values, flattened so that group g occupies (g, g + 1]: one searchsorted
+        over g + u then draws every row of a chunk at once.
+        """
+        n_groups = math.prod(self.sizes[p] for p in self.parents[col])
+        counts = np.bincount(
+            self._group(codes, col) * self.sizes[col] + codes[col],
+            minlength=n_groups * self.sizes[col],
+        ).reshape(n_groups, self.sizes[col]).astype(float)
+        counts[counts.sum(axis=1) == 0, 0] = 1  # combinations never observed are never drawn
+        cdf = counts.cumsum(axis=1) / counts.sum(axis=1, keepdims=True)
+        cdf[:, -1] = 1.0
+        return (np.arange(n_groups)[:, None] + cdf).ravel()
+
+    def _group(self, codes: dict[str, np.ndarray], col: str) -> np.ndarray:
+        group = np.zeros(len(codes[self.target]), dtype=np.int64)
+        for parent in self.parents[col]:
+            group = group * self.sizes[parent] + codes[parent]
+        return group
+
+    def sample_codes(self, n_rows: int, rng: np.random.Generator) -> dict[str, np.ndarray]:
+        """Draws n_rows rows as per-column codes (len(values) meaning missing)."""
+        codes = {self.target: np.zeros(n_rows, dtype=np.int64)}
+        for col in self.order:
+            group = self._group(codes, col)
+            drawn = np.searchsorted(self.tables[col], group + rng.random(n_rows), side='right')
+            codes[col] = drawn - group * self.sizes[col]
+        return codes
+
+    def sample(self, n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+        """Draws n_rows rows as a frame shaped like the cleaned data (category dtypes)."""
+        codes = self.sample_codes(n_rows, rng)
+        data = {}
+        for col in self.columns:
+            values, c = self.values[col], codes[col]
+            missing = c == len(values)
+            if self.numeric[col]:
+                column = values.to_numpy()[np.minimum(c, len(values) - 1)]
+                data[col] = np.where(missing, np.nan, column) if missing.any() else column
+            else:
+                data[col] = pd.Categorical.from_codes(np.where(missing, -1, c), categories=values)
+        return pd.DataFrame(data)
+
+
+# -------------------------------------------------------------------- #
+# --- GENERATION ---
+# -------------------------------------------------------------------- #
+
+def generate(n_rows: int, out_path: str, fmt: str = 'csv', seed: int = SEED,
+             chunk_rows: int = CHUNK_ROWS, source: str = SOURCE_PATH) -> int:
+    """
+    Streams n_rows synthetic responses to out_path (CSV), to its snapshot
+    directory, or both. Outputs are written to temporary paths and moved into
+    place at the end. The same seed and chunk size give the same rows.
+    Returns the number of rows written.
+    """
+    if fmt not in ('csv', 'snapshot', 'both'):
+        raise ValueError(f"unknown format: {fmt}")
+    model = SurveyModel(load_frame(source))
+    rng = np.random.default_rng(seed)
+    write_csv, write_snap = fmt in ('csv', 'both'), fmt in ('snapshot', 'both')
+    csv_tmp, snap = out_path + '.tmp', snapshot_path(out_path)
+    snap_tmp = snap + '.tmp'
+
+    out = open(csv_tmp, 'w', newline='', encoding='utf-8') if write_csv else None
+    try:
+        for start in range(0, n_rows, chunk_rows):
+            chunk = model.sample(min(chunk_rows, n_rows - start), rng)
+            if out:
+                chunk.to_csv(out, header=start == 0, index=False, lineterminator='\r\n')
+            if write_snap:
+                if start == 0:
+                    write_snapshot(chunk, snap_tmp)
+                else:
+                    append_snapshot(chunk, snap_tmp)
+    finally:
+        if out:
+            out.close()
+
+    if write_csv:
+        os.replace(csv_tmp, out_path)
+    if write_snap:
+        install_snapshot(snap_tmp, snap)
+        if write_csv:
+            stamp_snapshot(snap, out_path)
+    return n_rows
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    options = {}
+    for flag in ('--format', '--seed', '--chunk-size', '--source'):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    if len(args) != 2:
+        sys.exit("usage: python synthetic.py N_ROWS OUT_CSV [--format csv|snapshot|both] "
+                 "[--seed S] [--chunk-size N] [--source CLEANED_CSV]")
+
+    start = time.perf_counter()
+    written = generate(
+        int(float(args[0])), args[1], options.get('--format', 'csv'), int(options.get('--seed', SEED)),
+        int(options.get('--chunk-size', CHUNK_ROWS)), options.get('--source', SOURCE_PATH),
+    )
+    print(f"Generated {written:,} rows to {args[1]} ({time.perf_counter() - start:.1f}s)")
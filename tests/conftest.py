@@ -0,0 +1,34 @@
+# File Path: employee_wellness_project/tests/conftest.py
+# This file contains the fixtures shared by the tests: the shipped data files and
+# the repository root on sys.path (the modules live at the top level).
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RAW_CSV = os.path.join(ROOT, 'employee_wellness_dataset.csv')
+CLEANED_CSV = os.path.join(ROOT, 'cleaned_employee_data.csv')
+
+
+@pytest.fixture
+def cleaned_csv(tmp_path) -> str:
+    """A copy of the shipped cleaned CSV in a scratch directory (snapshots etc. are written next to it)."""
+    path = tmp_path / 'cleaned.csv'
+    path.write_bytes(open(CLEANED_CSV, 'rb').read())
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def frame() -> pd.DataFrame:
+    """The shipped cleaned data, as pandas reads it."""
+    return pd.read_csv(CLEANED_CSV)
+
+
+def records(frame: pd.DataFrame) -> list[dict]:
+    """The rows of a frame as JSON-ready records (missing values as None), as POST /api/responses takes them."""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
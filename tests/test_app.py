@@ -0,0 +1,419 @@
+# File Path: employee_wellness_project/tests/test_app.py
+# This file tests the Flask routes, with the app bound to a fresh copy of the
+# shipped data so that appends don't leak between tests.
+
+import gzip
+import json
+
+import pandas as pd
+import pytest
+
+import analysis as an
+import app as app_module
+import ingest
+from app import app as flask_app, chart_cache, create_app
+from chart_api import template_json, template_version
+from chart_executor import ChartExecutor
+from comment_index import open_index
+from conftest import records
+from dataset import Dataset
+from test_ingest import CHUNK_ROWS, _raw_lines, _write_raw
+
+TOKEN = 'secret'
+
+
+@pytest.fixture
+def app(monkeypatch, frame):
+    monkeypatch.setattr(an, 'dataset', Dataset(frame))
+    chart_cache.clear()
+    monkeypatch.setitem(flask_app.config, 'ADMIN_TOKEN', TOKEN)
+    monkeypatch.setitem(flask_app.config, 'ALLOW_APPENDS', True)
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    """Stands in for the dashboard templates, which this tree doesn't ship: a page is its chart blocks."""
+    def render_template(template, **context):
+        charts = ''.join(context[f'chart{i}'] for i in (1, 2, 3))
+        return f'<html><body><h1>{context["presenter_name"]}</h1>{charts}</body></html>'
+    monkeypatch.setattr('app.render_template', render_template)
+
+
+def _post_rows(client, rows, token=TOKEN):
+    headers = {'X-Admin-Token': token} if token is not None else {}
+    return client.post('/api/responses', json=rows, headers=headers)
+
+
+# --- POST /api/responses ---
+
+def test_append_responses(client, frame):
+    response = _post_rows(client, records(frame.iloc[:5]))
+    assert response.status_code == 201
+    assert response.get_json() == {'appended': 5, 'n_rows': len(frame) + 5, 'revision': 1}
+
+
+def test_appends_are_off_by_default(app, client, frame, monkeypatch):
+    monkeypatch.setitem(app.config, 'ALLOW_APPENDS', False)
+    assert _post_rows(client, records(frame.iloc[:1])).status_code == 403
+
+
+def test_appends_need_a_configured_token(app, client, frame, monkeypatch):
+    monkeypatch.setitem(app.config, 'ADMIN_TOKEN', None)
+    assert _post_rows(client, records(frame.iloc[:1])).status_code == 403
+
+
+@pytest.mark.parametrize('token', [None, 'wrong'])
+def test_appends_need_the_token(client, frame, token):
+    assert _post_rows(client, records(frame.iloc[:1]), token).status_code == 401
+    assert an.current().revision == 0
+
+
+@pytest.mark.parametrize('body', [[], {'rows': 'x'}, [{'Planet': 'Earth'}]])
+def test_bad_batches_are_rejected(client, body):
+    assert _post_rows(client, body).status_code == 400
+
+
+def test_large_bodies_are_refused(client, frame):
+    rows = records(frame) * 5
+    assert _post_rows(client, rows).status_code == 413
+    assert an.current().revision == 0
+
+
+# --- Segment filters ---
+
+def test_unknown_segment_column_is_a_bad_request(client):
+    assert client.get('/presenter/1?Planet=Earth').status_code == 400
+
+
+def test_empty_segment_is_not_found(client):
+    assert client.get('/presenter/1?Country=Atlantis').status_code == 404
+
+
+# --- /api/chart/<chart_id> ---
+
+def test_chart_revalidates_with_etag(client):
+    response = client.get('/api/chart/q1_gender')
+    assert response.status_code == 200
+    assert response.get_json()['data']
+    etag = response.headers['ETag']
+
+    again = client.get('/api/chart/q1_gender', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_chart_is_compressed_when_accepted(client):
+    plain = client.get('/api/chart/q1_gender')
+    packed = client.get('/api/chart/q1_gender', headers={'Accept-Encoding': 'gzip'})
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in packed.headers['Vary']
+    assert gzip.decompress(packed.data) == plain.data
+    assert packed.headers['ETag'] != plain.headers['ETag']
+
+
+def test_chart_etag_follows_the_data(client, frame):
+    etag = client.get('/api/chart/q1_gender').headers['ETag']
+    _post_rows(client, records(frame.iloc[:5]))
+    response = client.get('/api/chart/q1_gender', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_chart_etag_follows_the_figure_code(client, monkeypatch):
+    before = chart_cache.stats()['misses']
+    response = client.get('/api/chart/q1_gender')
+    misses = chart_cache.stats()['misses'] - before
+    monkeypatch.setattr('chart_api._figure_version', 'next-release')
+    again = client.get('/api/chart/q1_gender', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 200 and again.headers['ETag'] != response.headers['ETag']
+    assert chart_cache.stats()['misses'] - before == 2 * misses  # rendered again, not served from the cache
+
+
+def test_chart_etag_follows_the_segment(client):
+    whole = client.get('/api/chart/q1_gender').headers['ETag']
+    segment = client.get('/api/chart/q1_gender?Country=Canada').headers['ETag']
+    assert segment != whole
+
+
+def test_unknown_chart_is_not_found(client):
+    assert client.get('/api/chart/q99').status_code == 404
+
+
+def test_chart_template_is_cached_for_good(client):
+    response = client.get(f'/api/chart-template?v={template_version()}')
+    assert response.get_json() == json.loads(template_json())
+    assert 'immutable' in response.headers['Cache-Control']
+    again = client.get('/api/chart-template', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+
+# --- Instrumentation ---
+
+def test_responses_carry_server_timing(client):
+    timing = client.get('/api/chart/q1_gender').headers['Server-Timing']
+    names = [entry.split(';')[0] for entry in timing.split(', ')]
+    assert 'q1_gender.aggregation' in names
+    assert names[-1] == 'total'
+
+
+def test_metrics_count_requests(client):
+    client.get('/api/chart/q1_gender')
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'wellness_request_duration_seconds_count{route="/api/chart/<chart_id>",method="GET",status="200"}' in body
+    assert 'wellness_chart_phase_duration_seconds_count{chart="q1_gender",phase="aggregation"}' in body
+
+
+def test_slow_requests_are_profiled(app, client, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'PROFILE_SLOW_REQUESTS', 0.0)
+    monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path))
+    client.get('/api/chart/q1_gender')
+    assert [p.suffix for p in tmp_path.iterdir()] == ['.folded']
+
+
+# --- Dashboard pages ---
+
+def test_page_embeds_chart_loaders(client, pages):
+    html = client.get('/presenter/1?Country=Canada').get_data(as_text=True)
+    assert '<div id="chart-q1_gender"' in html
+    assert 'fetch("/api/chart/q1_gender?Country=Canada")' in html
+    assert f'fetch("/api/chart-template?v={template_version()}")' in html
+
+
+def test_static_pages_fetch_segments_from_the_api(app, client, pages, datasets, monkeypatch):
+    monkeypatch.setitem(app.config, 'CHART_EMBED', 'static')
+    assert 'fetch("/charts/q1_gender.json")' in client.get('/presenter/1').get_data(as_text=True)
+    assert 'fetch("/api/chart/q1_gender?Country=Canada")' in \
+        client.get('/presenter/1?Country=Canada').get_data(as_text=True)
+    assert 'fetch("/d/emea/api/chart/q1_gender")' in client.get('/d/emea/presenter/1').get_data(as_text=True)
+
+
+def test_page_inlines_charts(app, client, pages, monkeypatch):
+    monkeypatch.setitem(app.config, 'CHART_EMBED', 'inline')
+    html = client.get('/presenter/1').get_data(as_text=True)
+    assert html.count('Plotly.newPlot') == 3
+    assert 'fetch(' not in html
+
+
+def test_page_streams_charts_after_the_shell(app, client, pages, monkeypatch):
+    monkeypatch.setitem(app.config, 'CHART_EMBED', 'stream')
+    response = client.get('/presenter/1', buffered=False)
+    chunks = [chunk.decode('utf-8') for chunk in response.response]
+    response.close()
+    assert chunks[0].startswith('<html><body><h1>The HR Generalist</h1>')
+    assert chunks[0].count('class="plotly-graph-div"') == 3
+    assert 'Plotly.newPlot' not in chunks[0]
+    drawn = ''.join(chunks[1:-1])
+    for chart_id in ('q1_gender', 'q1_age', 'q3_family_history'):
+        assert f'Plotly.newPlot("chart-{chart_id}"' in drawn
+    assert chunks[-1] == '</body></html>'
+
+
+# --- Per-dataset routes ---
+
+@pytest.fixture
+def datasets(app, monkeypatch, cleaned_csv):
+    """Serves a copy of the shipped data as the 'emea' dataset, from a fresh registry."""
+    monkeypatch.setitem(app.config, 'DATASETS', {'emea': cleaned_csv})
+    monkeypatch.setattr('app._registry', None)
+    monkeypatch.setattr('app._reloader', None)
+
+
+def test_dataset_routes(client, datasets, frame):
+    response = client.get('/d/emea/api/chart/q1_gender')
+    assert response.status_code == 200
+    assert response.headers['ETag'] != client.get('/api/chart/q1_gender').headers['ETag']
+    stats = client.get('/api/datasets').get_json()
+    assert list(stats['loaded']) == ['emea'] and stats['pinned'] == ['default']
+
+
+def test_appends_go_to_the_routed_dataset(client, datasets, frame):
+    response = client.post('/d/emea/api/responses', json=records(frame.iloc[:2]),
+                           headers={'X-Admin-Token': TOKEN})
+    assert response.get_json()['n_rows'] == len(frame) + 2
+    assert an.current().revision == 0
+
+
+def test_unknown_dataset_is_not_found(client, datasets):
+    assert client.get('/d/apac/api/chart/q1_gender').status_code == 404
+    assert client.get('/d/..%2Fsecrets/api/chart/q1_gender').status_code == 404
+
+
+@pytest.fixture
+def chart_processes(app, datasets, monkeypatch):
+    """Renders inline charts in one worker process; records the charts rendered in this one."""
+    executor = ChartExecutor(max_workers=4, timeout=60.0, processes=1)
+    monkeypatch.setattr('app._executor', executor)
+    monkeypatch.setitem(app.config, 'CHART_PROCESSES', 1)
+    monkeypatch.setitem(app.config, 'CHART_EMBED', 'inline')
+    here = []
+    render = app_module._render_html
+    monkeypatch.setattr('app._render_html', lambda chart_id: here.append(chart_id) or render(chart_id))
+    yield here
+    executor.shutdown()
+
+
+def test_charts_render_in_worker_processes(client, pages, chart_processes, frame):
+    html = client.get('/d/emea/presenter/1?Gender=Female').get_data(as_text=True)
+    assert html.count('Plotly.newPlot') == 3 and chart_processes == []
+    # The workers can't see responses appended in memory: those charts render here
+    client.post('/d/emea/api/responses', json=records(frame.iloc[:2]), headers={'X-Admin-Token': TOKEN})
+    assert client.get('/d/emea/presenter/1').get_data(as_text=True).count('Plotly.newPlot') == 3
+    assert len(chart_processes) == 3
+
+# --- Hot reload ---
+
+def _reload(client, query='', token=TOKEN):
+    headers = {'X-Admin-Token': token} if token is not None else {}
+    return client.post(f'/d/emea/api/admin/reload{query}', headers=headers)
+
+
+def test_reload_swaps_in_the_refreshed_file(client, datasets, cleaned_csv, frame):
+    client.get('/d/emea/api/chart/q1_gender')
+    with open(cleaned_csv, 'ab') as fh:
+        fh.write(open(cleaned_csv, 'rb').read().splitlines(keepends=True)[1])
+    response = _reload(client, '?wait=1')
+    assert response.status_code == 200
+    assert response.get_json()['n_rows'] == len(frame) + 1
+    stats = client.get('/api/reloads').get_json()
+    assert stats['reloads'] == 1 and stats['last']['emea']['n_rows'] == len(frame) + 1
+
+
+def test_reload_needs_post_and_the_token(client, datasets):
+    assert client.get('/d/emea/api/admin/reload').status_code == 405
+    assert _reload(client, token=None).status_code == 401
+    assert _reload(client, token='wrong').status_code == 401
+
+
+def test_reload_refuses_to_drop_appended_responses(app, client, datasets, frame, monkeypatch):
+    client.post('/d/emea/api/responses', json=records(frame.iloc[:2]), headers={'X-Admin-Token': TOKEN})
+    assert _reload(client).status_code == 409
+    assert _reload(client, '?force=1').status_code == 403
+    monkeypatch.setitem(app.config, 'RELOAD_ALLOW_FORCE', True)
+    assert _reload(client, '?force=1&wait=1').get_json()['n_rows'] == len(frame)
+
+
+# --- /api/cube ---
+
+def test_cube_query(client, frame):
+    body = client.get('/api/cube?measure=treatment&by=Gender&tech_company=Yes').get_json()
+    assert body['axes'] == ['Gender', 'treatment']
+    counts = dict(zip(body['labels']['Gender'], body['counts']))
+    rows = frame[frame['tech_company'] == 'Yes']
+    assert counts['Female'] == pd.crosstab(rows['Gender'], rows['treatment']).loc['Female'].tolist()
+
+
+def test_cube_lists_its_layout(client):
+    body = client.get('/api/cube').get_json()
+    assert 'Country' in body['dimensions'] and 'work_interfere' in body['measures']
+
+
+def test_bad_cube_query(client):
+    assert client.get('/api/cube?measure=treatment&by=work_interfere').status_code == 400
+
+
+# --- Comment search ---
+
+@pytest.fixture
+def indexed(app, monkeypatch, tmp_path):
+    """Serves a freshly ingested copy of the raw export, with its comment index, as 'emea'."""
+    cleaned = str(tmp_path / 'cleaned.csv')
+    ingest.ingest(_write_raw(tmp_path / 'raw.csv', _raw_lines()), cleaned, CHUNK_ROWS)
+    monkeypatch.setitem(app.config, 'DATASETS', {'emea': cleaned})
+    monkeypatch.setattr('app._registry', None)
+    monkeypatch.setattr('app._reloader', None)
+    return open_index(cleaned)
+
+
+def test_comment_search(client, indexed):
+    rows, scores = indexed.search('work -stress')
+    body = client.get('/d/emea/api/comments?q=work -stress&limit=3&offset=1').get_json()
+    assert body['total'] == len(rows) > 4
+    assert [r['row'] for r in body['results']] == rows[1:4].tolist()
+    assert body['results'][0]['comment'] == indexed.comment(int(rows[1]))
+    assert 'Gender' in body['results'][0]['answers']
+
+
+def test_comment_search_with_segment(client, indexed):
+    everyone = client.get('/d/emea/api/comments?q=stress&limit=1000').get_json()
+    females = client.get('/d/emea/api/comments?q=stress&limit=1000&Gender=Female').get_json()
+    assert 0 < females['total'] < everyone['total']
+    assert all(r['answers']['Gender'] == 'Female' for r in females['results'])
+
+
+def test_comment_search_errors(client, indexed):
+    assert client.get('/api/comments?q=stress').status_code == 404  # the shipped data has no index
+    assert client.get('/d/emea/api/comments').status_code == 400
+    assert client.get('/d/emea/api/comments?q=stress&limit=x').status_code == 400
+    assert client.get('/d/emea/api/comments?q=stress&Planet=Earth').status_code == 400
+
+
+# --- KPI trend ---
+
+def test_trend_windows(client, indexed):
+    body = client.get('/d/emea/api/trend?width=24h').get_json()
+    assert [w['responses'] for w in body['windows']] == [611, 329, 102]
+    rolling = client.get('/d/emea/api/trend?width=6h&step=1h&start=2014-08-28').get_json()
+    assert rolling['step'] == 3600 and rolling['windows'][0]['start'] == '2014-08-28T00:00:00'
+
+
+def test_trend_single_window_and_segment(client, indexed, frame):
+    everyone = client.get('/d/emea/api/trend').get_json()
+    assert everyone['responses'] == len(frame)
+    assert everyone['treatment'] == round((frame['treatment'] == 'Yes').mean() * 100, 2)
+    females = client.get('/d/emea/api/trend?Gender=Female').get_json()
+    assert 0 < females['responses'] < everyone['responses']
+
+
+def test_trend_errors(client, indexed):
+    assert client.get('/api/trend').status_code == 404  # the shipped data has no timestamps
+    assert client.get('/d/emea/api/trend?width=soon').status_code == 400
+    assert client.get('/d/emea/api/trend?width=30m').status_code == 400
+
+
+# --- Startup ---
+
+@pytest.fixture
+def startup(app, datasets, monkeypatch, cleaned_csv):
+    """A cold app, configured to load a copy of the shipped data as its default dataset."""
+    monkeypatch.setattr('app._startup', {'state': 'cold'})
+    for key in ('DATA_PATH', 'PRELOAD', 'PRELOAD_DATASETS', 'PRELOAD_BACKGROUND'):
+        monkeypatch.setitem(app.config, key, app.config[key])
+    app.config['DATA_PATH'] = cleaned_csv
+
+
+def test_not_ready_before_startup(client, startup):
+    response = client.get('/api/ready')
+    assert response.status_code == 503 and response.get_json()['state'] == 'cold'
+
+
+def test_create_app_preloads_the_charts(client, startup, cleaned_csv, frame):
+    assert create_app({'PRELOAD_DATASETS': ['emea']}) is flask_app
+    assert an.dataset.path == cleaned_csv
+    body = client.get('/api/ready').get_json()
+    assert body['ready'] and set(body['datasets']) == {'default', 'emea'}
+    assert body['datasets']['default']['n_rows'] == len(frame)
+    assert body['datasets']['emea']['charts'] == len(an.CHARTS)
+
+    hits = chart_cache.stats()['hits']
+    assert client.get('/api/chart/q1_gender').status_code == 200
+    assert chart_cache.stats()['hits'] == hits + 1
+
+
+def test_create_app_without_preload(client, startup):
+    create_app({'PRELOAD': False, 'PRELOAD_DATASETS': ['emea']})
+    body = client.get('/api/ready').get_json()
+    assert list(body['datasets']) == ['default'] and body['datasets']['default']['charts'] == 0
+
+
+def test_failed_startup_is_not_ready(client, startup, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        create_app({'DATA_PATH': str(tmp_path / 'missing.csv')})
+    response = client.get('/api/ready')
+    assert response.status_code == 503 and response.get_json()['state'] == 'failed'
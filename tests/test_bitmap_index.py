@@ -0,0 +1,85 @@
+# File Path: employee_wellness_project/tests/test_bitmap_index.py
+# This file tests segment filters: the bitmap index selects the same rows as the
+# equivalent pandas filter, and a segment's engine aggregates over those rows only.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bitmap_index import BitmapIndex
+from conftest import records
+from crosstab_engine import CrosstabEngine
+from dataset import Dataset
+from test_crosstab_engine import PAIRS, _assert_table, _plain
+
+FILTERS = [
+    {'Country': ['United States']},
+    {'Country': ['Canada', 'United Kingdom'], 'tech_company': ['Yes']},
+    {'Gender': ['Female'], 'no_employees': ['26-100', '100-500'], 'remote_work': ['No']},
+    {'Country': ['Atlantis']},
+]
+
+
+def _expected(frame: pd.DataFrame, filters: dict[str, list[str]]) -> np.ndarray:
+    mask = np.ones(len(frame), dtype=bool)
+    for col, values in filters.items():
+        mask &= frame[col].isin(values).to_numpy()
+    return mask
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_mask_matches_pandas(frame, filters):
+    engine = CrosstabEngine(frame)
+    index = BitmapIndex(engine)
+    expected = _expected(frame, filters)
+    np.testing.assert_array_equal(index.mask(engine, filters), expected)
+    assert index.count(engine, filters) == expected.sum()
+
+
+def test_index_follows_appends(frame):
+    data = Dataset(frame.iloc[:700].reset_index(drop=True))
+    data.append(records(frame.iloc[700:]))
+    filters = FILTERS[1]
+    np.testing.assert_array_equal(data.mask(filters), _expected(frame, filters))
+
+
+@pytest.mark.parametrize('filters', FILTERS[:3])
+def test_segment_aggregates_match_pandas(frame, filters):
+    view = Dataset(frame).select(filters)
+    rows = frame[_expected(frame, filters)].reset_index(drop=True)
+    assert view.n_rows == len(rows)
+    for row, col in PAIRS:
+        _assert_table(_plain(view.engine.crosstab(row, col)), pd.crosstab(rows[row], rows[col]))
+    counts = view.engine.value_counts('Gender')
+    assert counts[counts > 0].to_dict() == rows['Gender'].value_counts().to_dict()
+    assert view.engine.histogram('Age').to_dict() == rows['Age'].value_counts().to_dict()
+    pd.testing.assert_frame_equal(view.frame, rows)
+
+
+def test_segment_key_and_empty_selection(frame):
+    data = Dataset(frame)
+    assert data.select({}) is data
+    view = data.select({'tech_company': ['Yes'], 'Country': ['Canada', 'Canada']})
+    assert view.segment_key == 'Country=Canada&tech_company=Yes'
+    assert data.select({'Country': ['Atlantis']}).n_rows == 0
+
+
+def test_view_keeps_the_version_it_was_selected_from(frame):
+    data = Dataset(frame)
+    view = data.select({'Country': ['Canada']})
+    fingerprint = view.fingerprint()
+    assert fingerprint == data.fingerprint()
+    data.append(records(frame.iloc[:3]))
+    assert view.fingerprint() == fingerprint != data.fingerprint()
+    assert data.select({'Country': ['Canada']}).fingerprint() == data.fingerprint()
+
+
+def test_unknown_filter_column_is_rejected(frame):
+    with pytest.raises(ValueError, match='cannot filter on'):
+        Dataset(frame).select({'Planet': ['Earth']})
+
+
+def test_bitsets_are_built_on_first_use(frame):
+    data = Dataset(frame)
+    data.mask({'Country': ['Canada']})
+    assert sorted(data.index._bits) == ['Country']
@@ -0,0 +1,91 @@
+# File Path: employee_wellness_project/tests/test_chart_api.py
+# This file tests the chart API helpers that build what pages embed, and that
+# slim figure JSON draws the same charts as Plotly's own.
+
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import pytest
+
+import analysis as an
+from chart_api import (TYPED_ARRAYS, chart_fragment, chart_message, default_template, figure_json, slim_figure,
+                       template_json)
+from dataset import Dataset
+
+
+def _decode(value):
+    """value with every typed array ({'dtype', 'bdata'}) replaced by the list of its numbers."""
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if 'bdata' in value:
+        array = np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype'])
+        return array.reshape([int(n) for n in str(value['shape']).split(',')]) if 'shape' in value else array
+    return {key: _decode(item) for key, item in value.items()}
+
+
+def _assert_same(slim, full, path=''):
+    """Every value of slim equals the one at the same place in full."""
+    if isinstance(slim, dict):
+        for key, value in slim.items():
+            _assert_same(value, full[key], f'{path}.{key}')
+    elif isinstance(slim, list):
+        assert len(slim) == len(full), path
+        for i, (value, expected) in enumerate(zip(slim, full)):
+            _assert_same(value, expected, f'{path}[{i}]')
+    elif isinstance(slim, np.ndarray) or isinstance(full, np.ndarray):
+        np.testing.assert_array_equal(np.asarray(slim), np.asarray(full), err_msg=path)
+    else:
+        assert slim == full, path
+
+
+@pytest.fixture(scope='module')
+def figures(frame):
+    with an.use(Dataset(frame)):
+        return {chart_id: build() for chart_id, build in an.CHARTS.items()}
+
+
+def test_slim_figures_draw_the_same_charts(figures):
+    for chart_id, fig in figures.items():
+        slim, full = json.loads(figure_json(fig)), json.loads(pio.to_json(fig))
+        assert 'template' not in slim['layout'], chart_id
+        assert len(figure_json(fig)) < len(pio.to_json(fig)) - len(template_json()), chart_id
+        _assert_same(_decode(slim), _decode(full), chart_id)
+        for trace in slim['data']:
+            assert all(value['dtype'] in TYPED_ARRAYS.values() for value in trace.values()
+                       if isinstance(value, dict) and 'bdata' in value)
+
+
+def test_narrowed_arrays_are_exact():
+    fig = go.Figure(go.Scatter(x=np.array([0.0, 1.0, 300.0]), y=np.array([0.5, 1.25, -2.0]),
+                               customdata=np.array([0.1, 0.2, 0.3])))
+    trace = slim_figure(fig)['data'][0]
+    assert (trace['x']['dtype'], trace['y']['dtype'], trace['customdata']['dtype']) == ('u2', 'f4', 'f8')
+    decoded = _decode(trace)
+    assert decoded['x'].tolist() == [0, 1, 300] and decoded['y'].tolist() == [0.5, 1.25, -2.0]
+
+
+def test_own_template_is_kept(figures):
+    fig = figures['q1_gender'].update_layout(template='plotly_dark')
+    assert slim_figure(fig)['layout']['template'] != default_template()
+
+
+def test_age_chart_does_not_grow_with_the_respondents(frame):
+    with an.use(Dataset(frame)):
+        small = json.loads(figure_json(an.CHARTS['q1_age']()))
+    with an.use(Dataset(pd.concat([frame] * 20, ignore_index=True))):
+        large = json.loads(figure_json(an.CHARTS['q1_age']()))
+    assert len(small['data'][0]['x']['bdata']) == len(large['data'][0]['x']['bdata'])
+    np.testing.assert_array_equal(_decode(large)['data'][0]['y'], _decode(small)['data'][0]['y'] * 20)
+
+
+def test_streamed_scripts_cannot_close_their_tag():
+    fragment = chart_fragment('q1', '{"title": "</script><script>alert(1)"}')
+    assert fragment.count('</script>') == 1
+    message = chart_message('q1', '<p>Not enough responses</p>')
+    assert message.count('</') == 1 and message.endswith('</script>\n')
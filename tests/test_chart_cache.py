@@ -0,0 +1,74 @@
+# File Path: employee_wellness_project/tests/test_chart_cache.py
+# This file tests the rendered-chart cache and the data file fingerprint.
+
+import os
+
+from chart_cache import ChartCache, file_fingerprint
+
+
+def _renderer(output: str, calls: list):
+    def render() -> str:
+        calls.append(output)
+        return output
+    return render
+
+
+def test_hit_after_miss():
+    cache, calls = ChartCache(maxsize=4), []
+    assert cache.get('q1', 'html', 'f1', _renderer('<div>', calls)) == '<div>'
+    assert cache.get('q1', 'html', 'f1', _renderer('other', calls)) == '<div>'
+    assert cache.get('q1', 'json', 'f1', _renderer('{}', calls)) == '{}'  # each output kind is its own entry
+    assert calls == ['<div>', '{}']
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache, calls = ChartCache(maxsize=2), []
+    cache.get('a', 'html', 'f1', _renderer('a', calls))
+    cache.get('b', 'html', 'f1', _renderer('b', calls))
+    cache.get('a', 'html', 'f1', _renderer('a', calls))  # 'b' is now the least recently used
+    cache.get('c', 'html', 'f1', _renderer('c', calls))
+    cache.get('a', 'html', 'f1', _renderer('a', calls))
+    cache.get('b', 'html', 'f1', _renderer('b', calls))
+    assert calls == ['a', 'b', 'c', 'b']
+    assert cache.stats()['evictions'] == 2
+
+
+def test_new_fingerprint_retires_the_oldest_version():
+    cache, calls = ChartCache(versions=2), []
+    cache.get('a', 'html', 'f1', _renderer('v1', calls))
+    cache.get('a', 'html', 'f2', _renderer('v2', calls))
+    assert cache.get('a', 'html', 'f1', _renderer('again', calls)) == 'v1'  # the previous version stays
+    cache.get('a', 'html', 'f3', _renderer('v3', calls))
+    assert cache.stats()['invalidations'] == 1
+    assert cache.get('a', 'html', 'f2', _renderer('again', calls)) == 'v2'
+    assert cache.get('a', 'html', 'f1', _renderer('again', calls)) == 'again'
+
+
+def test_scopes_are_versioned_separately():
+    cache, calls = ChartCache(versions=1), []
+    cache.get('a', 'html', 'x1', _renderer('x', calls), scope='x.csv')
+    cache.get('a', 'html', 'y1', _renderer('y', calls), scope='y.csv')
+    assert cache.get('a', 'html', 'x1', _renderer('again', calls), scope='x.csv') == 'x'
+    assert cache.stats()['fingerprints'] == {'x.csv': ['x1'], 'y.csv': ['y1']}
+
+
+def test_output_of_a_retired_version_is_not_stored():
+    cache, calls = ChartCache(versions=1), []
+
+    def slow_render():  # a new version shows up while this one renders
+        cache.get('b', 'html', 'f2', _renderer('new', calls))
+        return 'old'
+
+    assert cache.get('a', 'html', 'f1', slow_render) == 'old'
+    assert cache.stats()['size'] == 1
+
+
+def test_file_fingerprint_follows_content(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('a,b\n1,2\n')
+    first = file_fingerprint(str(path))
+    assert file_fingerprint(str(path)) == first
+    path.write_text('a,b\n1,3\n')
+    os.utime(path, ns=(1, 1))  # a different stamp: re-hashed
+    assert file_fingerprint(str(path)) != first
@@ -0,0 +1,63 @@
+# File Path: employee_wellness_project/tests/test_chart_executor.py
+# This file tests ChartExecutor: a page's tasks run concurrently, and a task that
+# fails or overruns the page timeout gets its fallback instead.
+
+import contextvars
+import operator
+import os
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+from chart_executor import ChartExecutor
+
+segment = contextvars.ContextVar('segment', default=None)
+
+
+@pytest.fixture
+def executor():
+    executor = ChartExecutor(max_workers=4, timeout=2.0, processes=1)
+    yield executor
+    executor.shutdown()
+
+
+def _failed(name, exc):
+    return f'{name}: {type(exc).__name__}'
+
+
+def test_tasks_run_concurrently(executor):
+    tasks = {f'chart{i}': lambda i=i: time.sleep(0.3) or i for i in range(4)}
+    start = time.perf_counter()
+    assert executor.map(tasks, _failed) == {f'chart{i}': i for i in range(4)}
+    assert time.perf_counter() - start < 0.9
+
+
+def test_failed_task_gets_the_fallback(executor):
+    results = executor.map({'ok': lambda: 1, 'broken': lambda: 1 / 0}, _failed)
+    assert results == {'ok': 1, 'broken': 'broken: ZeroDivisionError'}
+
+
+def test_slow_task_times_out(executor):
+    executor.timeout = 0.2
+    errors = {}
+    results = executor.map({'fast': lambda: 1, 'slow': lambda: time.sleep(1)},
+                           lambda name, exc: errors.setdefault(name, exc))
+    assert results['fast'] == 1
+    assert isinstance(errors['slow'], FutureTimeout)
+
+
+def test_tasks_see_the_callers_context(executor):
+    token = segment.set('Country=Canada')
+    try:
+        assert executor.map({'chart': segment.get}, _failed) == {'chart': 'Country=Canada'}
+    finally:
+        segment.reset(token)
+
+
+def test_process_pool_is_started_once(executor):
+    assert executor._procs is None
+    assert executor.run_in_process(operator.add, 2, 3) == 5
+    pool = executor._procs
+    assert executor.run_in_process(os.getpid) != os.getpid()
+    assert executor._procs is pool
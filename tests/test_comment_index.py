@@ -0,0 +1,128 @@
+# File Path: employee_wellness_project/tests/test_comment_index.py
+# This file tests the comment index against a brute-force scan of the comments:
+# the rows a query matches (words, phrases, exclusions) and their BM25 scores,
+# for an index built in one run and one grown by incremental ingest runs.
+
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingest
+from comment_index import (B, K1, CommentIndex, CommentIndexBuilder, append_segment, open_index,
+                           parse_query, stem, tokenize, write_index)
+from dataset import Dataset
+from test_ingest import CHUNK_ROWS, _raw_lines, _write_raw
+
+QUERIES = ['stress', 'mental health', 'work -stress', '"mental health"', '"health mental"',
+           'employer "mental health issues" -physical', 'Stressed', '-stress', '"', 'zzzz']
+
+
+@pytest.fixture(scope='module')
+def indexed(tmp_path_factory) -> str:
+    """A cleaned CSV ingested from the whole raw export in one run."""
+    root = tmp_path_factory.mktemp('comments')
+    cleaned = str(root / 'cleaned.csv')
+    ingest.ingest(_write_raw(root / 'raw.csv', _raw_lines()), cleaned, CHUNK_ROWS)
+    return cleaned
+
+
+@pytest.fixture(scope='module')
+def comments(indexed) -> dict[int, list[str]]:
+    """The terms of every comment, by row, read back from the index."""
+    index = open_index(indexed)
+    texts = {row: index.comment(row) for row in range(index.n_rows)}
+    return {row: tokenize(text) for row, text in texts.items() if text is not None}
+
+
+def _contains(tokens: list[str], phrase: list[str]) -> bool:
+    return any(tokens[i:i + len(phrase)] == phrase for i in range(len(tokens) - len(phrase) + 1))
+
+
+def _brute_force(comments: dict[int, list[str]], query: str) -> dict[int, float]:
+    """The BM25 score of every comment matching the query, by row."""
+    required, excluded = parse_query(query)
+    if not required:
+        return {}
+    terms = {term for group in required for term in group}
+    df = {term: sum(term in tokens for tokens in comments.values()) for term in terms}
+    average = sum(map(len, comments.values())) / len(comments)
+    scores = {}
+    for row, tokens in comments.items():
+        if all(_contains(tokens, group) for group in required) and not set(excluded) & set(tokens):
+            tf = Counter(tokens)
+            scores[row] = sum(
+                math.log(1 + (len(comments) - df[t] + 0.5) / (df[t] + 0.5))
+                * tf[t] * (K1 + 1) / (tf[t] + K1 * (1 - B + B * len(tokens) / average)) for t in terms)
+    return scores
+
+
+def _assert_search(index: CommentIndex, comments: dict[int, list[str]], query: str) -> None:
+    expected = _brute_force(comments, query)
+    rows, scores = index.search(query)
+    assert dict(zip(rows.tolist(), scores)) == pytest.approx(expected)
+    assert np.all(np.diff(scores) <= 1e-12)  # best first
+
+
+def test_stem():
+    assert [stem(w) for w in ['caresses', 'ponies', 'relational', 'stressed', 'sky']] == \
+        ['caress', 'poni', 'relat', 'stress', 'sky']
+    assert tokenize("Stressed employers, don't WORRY!") == ['stress', 'employ', 'don', 't', 'worri']
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_search_matches_brute_force(indexed, comments, query):
+    _assert_search(open_index(indexed), comments, query)
+
+
+def test_segments_search_as_one(tmp_path):
+    texts = pd.Series(['Stress at work', None, 'work work work', '   ', 'no stress here', 'mental health',
+                       'health is mental', 'stress and mental health at work'])
+    path = str(tmp_path / 'idx.comments')
+    first = CommentIndexBuilder()
+    first.add(texts[:3])
+    write_index(first, path)
+    for start, stop in [(3, 5), (5, 8)]:
+        builder = CommentIndexBuilder(first_row=start)
+        builder.add(texts[start:stop])
+        append_segment(builder, path)
+
+    index = CommentIndex(path)
+    assert (index.n_rows, index.n_comments) == (8, 6)
+    assert index.comment(1) is None and index.comment(6) == 'health is mental'
+    comments = {row: tokenize(text) for row, text in texts.dropna().items() if text.strip()}
+    for query in ['work', 'stress -mental', '"mental health"', 'mental health', 'health -is']:
+        _assert_search(index, comments, query)
+
+
+def test_incremental_ingest_matches_full(tmp_path, indexed):
+    lines = _raw_lines()
+    raw = _write_raw(tmp_path / 'raw.csv', lines[:600])
+    cleaned = str(tmp_path / 'cleaned.csv')
+    ingest.ingest(raw, cleaned, CHUNK_ROWS)
+    _write_raw(tmp_path / 'raw.csv', lines)
+    ingest.ingest(raw, cleaned, CHUNK_ROWS)
+
+    incremental, full = open_index(cleaned), open_index(indexed)
+    assert len(incremental.segments) == 2
+    for query in QUERIES:
+        rows, scores = incremental.search(query)
+        expected_rows, expected_scores = full.search(query)
+        np.testing.assert_array_equal(rows, expected_rows)
+        np.testing.assert_allclose(scores, expected_scores)
+
+
+def test_select_by_query(indexed, comments):
+    dataset = Dataset.load(indexed)
+    rows = sorted(_brute_force(comments, 'stress'))
+    view = dataset.select({'Gender': ['Female']}, query='stress')
+    females = dataset.frame['Gender'].to_numpy() == 'Female'
+    assert view.n_rows == int(females[rows].sum()) > 0
+    assert view.segment_key != dataset.select({'Gender': ['Female']}).segment_key
+
+
+def test_select_by_query_needs_an_index(cleaned_csv):
+    with pytest.raises(ValueError):
+        Dataset.load(cleaned_csv).select({}, query='stress')
@@ -0,0 +1,87 @@
+# File Path: employee_wellness_project/tests/test_count_cube.py
+# This file tests the count cube against the same counts taken with pandas, for
+# roll-ups, drill-downs and filters, and after appends.
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import records
+from count_cube import AGE_EDGES, DIMENSIONS, CountCube, band_labels
+from dataset import Dataset
+
+QUERIES = [
+    ('work_interfere', (), {}),
+    ('treatment', ('Country',), {}),
+    ('obs_consequence', ('tech_company', 'remote_work'), {}),
+    ('work_interfere', ('Gender',), {'Country': ['United States', 'Canada']}),
+    ('benefits', ('Age', 'no_employees'), {'tech_company': ['Yes'], 'Gender': ['Female']}),
+    ('family_history', ('Country', 'state', 'Gender', 'Age'), {}),
+]
+
+
+def _banded(frame: pd.DataFrame) -> pd.DataFrame:
+    bands = pd.cut(frame['Age'], [-np.inf, *AGE_EDGES, np.inf], right=False, labels=band_labels(AGE_EDGES))
+    return frame.assign(Age=bands.astype(object))
+
+
+def _expected(cube: CountCube, frame: pd.DataFrame, measure: str, by, filters) -> np.ndarray:
+    """The same counts with pandas: one axis per by dimension, the measure, then the target."""
+    rows = _banded(frame)
+    for col, values in filters.items():
+        rows = rows[rows[col].isin(values)]
+    axes = [*by, measure] if measure == cube.target else [*by, measure, cube.target]
+    rows = rows.dropna(subset=[measure, cube.target])
+    table = np.zeros([len(cube.labels(axis)) for axis in axes], dtype=np.int64)
+    codes = [cube.labels(axis).get_indexer(rows[axis].astype(object)) for axis in axes]
+    answered = np.all([c >= 0 for c in codes], axis=0)
+    np.add.at(table, tuple(c[answered] for c in codes), 1)
+    return table
+
+
+@pytest.fixture(scope='module')
+def data(frame) -> Dataset:
+    return Dataset(frame)
+
+
+@pytest.mark.parametrize('measure,by,filters', QUERIES)
+def test_counts_match_pandas(data, frame, measure, by, filters):
+    np.testing.assert_array_equal(data.cube.counts(measure, by, filters),
+                                  _expected(data.cube, frame, measure, by, filters))
+
+
+def test_every_rollup_agrees_with_the_base(data):
+    cube = data.cube
+    base = cube.counts('work_interfere', DIMENSIONS)
+    for size in (1, 2, 3):
+        for by in itertools.combinations(DIMENSIONS, size):
+            dropped = tuple(i for i, d in enumerate(DIMENSIONS) if d not in by)
+            np.testing.assert_array_equal(cube.counts('work_interfere', by), base.sum(axis=dropped))
+
+
+def test_crosstab(data, frame):
+    table = data.cube.crosstab('Country', 'treatment')
+    expected = pd.crosstab(frame['Country'], frame['treatment'])
+    np.testing.assert_array_equal(table[data.cube.labels('Country').get_indexer(expected.index)], expected)
+
+
+@pytest.mark.parametrize('change', [{}, {'Country': 'Atlantis'}])
+def test_appends_extend_the_cube(frame, change):
+    data = Dataset(frame.iloc[:900].reset_index(drop=True))
+    data.cube.counts('treatment')
+    batch = records(frame.iloc[900:])
+    batch[0] = batch[0] | change
+    data.append(batch)
+    combined = pd.DataFrame.from_records(records(frame.iloc[:900]) + batch)
+    for measure, by, filters in QUERIES:
+        np.testing.assert_array_equal(data.cube.counts(measure, by, filters),
+                                      _expected(data.cube, combined, measure, by, filters))
+
+
+def test_unknown_measure_or_dimension(data):
+    with pytest.raises(ValueError, match='unknown measure'):
+        data.cube.counts('Planet')
+    with pytest.raises(ValueError, match='not a cube dimension'):
+        data.cube.counts('treatment', ('work_interfere',))
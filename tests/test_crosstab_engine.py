@@ -0,0 +1,60 @@
+# File Path: employee_wellness_project/tests/test_crosstab_engine.py
+# This file tests CrosstabEngine against the pandas expressions it stands in for,
+# on the shipped data.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from crosstab_engine import CrosstabEngine
+
+PAIRS = [('Gender', 'treatment'), ('Country', 'treatment'), ('family_history', 'work_interfere'),
+         ('no_employees', 'remote_work'), ('care_options', 'benefits')]
+
+
+def _categorical(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame.astype({col: 'category' for col in frame.columns if frame[col].dtype == object})
+
+
+@pytest.fixture(params=['object', 'category'])
+def data(request, frame) -> pd.DataFrame:
+    """The data with object columns (as read from the CSV) and with category columns."""
+    return frame if request.param == 'object' else _categorical(frame)
+
+
+def _plain(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame.astype({col: object for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)})
+
+
+def _assert_table(result: pd.DataFrame, expected: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_names=True,
+                                  check_index_type=False, check_column_type=False)
+
+
+@pytest.mark.parametrize('row,col', PAIRS)
+@pytest.mark.parametrize('normalize', [False, 'index', 'columns', 'all'])
+def test_crosstab(data, frame, row, col, normalize):
+    expected = pd.crosstab(frame[row], frame[col], normalize=normalize)
+    _assert_table(_plain(CrosstabEngine(data).crosstab(row, col, normalize)), expected)
+
+
+def test_crosstab_with_mask(data, frame):
+    mask = (frame['tech_company'] == 'Yes').to_numpy()
+    expected = pd.crosstab(frame.loc[mask, 'Gender'], frame.loc[mask, 'treatment'])
+    _assert_table(_plain(CrosstabEngine(data).crosstab('Gender', 'treatment', mask=mask)), expected)
+
+
+def test_isin(data, frame):
+    engine = CrosstabEngine(data)
+    expected = frame['Country'].isin(['Canada', 'Germany', 'Atlantis']).to_numpy()
+    np.testing.assert_array_equal(engine.isin('Country', ['Canada', 'Germany', 'Atlantis']), expected)
+
+
+@pytest.mark.parametrize('nbins', [1, 5, 10, 40, 1000])
+def test_binned_histogram(data, frame, nbins):
+    bins = CrosstabEngine(data).binned_histogram('Age', nbins)
+    width = int(bins['end'].iloc[0] - bins['start'].iloc[0] + 1)
+    assert str(width)[0] in '125' and len(bins) <= nbins + 1
+    assert (bins['start'] % width == 0).all() and (bins['start'].diff().dropna() == width).all()
+    edges = np.r_[bins['start'], bins['end'].iloc[-1] + 1]
+    np.testing.assert_array_equal(bins['count'], np.histogram(frame['Age'].dropna(), edges)[0])
@@ -0,0 +1,66 @@
+# File Path: employee_wellness_project/tests/test_dataset.py
+# This file tests that appending responses to a Dataset keeps every stored
+# aggregate equal to recomputing it over the combined data.
+
+import pandas as pd
+import pytest
+
+from conftest import records
+from dataset import Dataset
+from test_crosstab_engine import PAIRS, _assert_table, _plain
+
+
+@pytest.fixture
+def appended(frame) -> Dataset:
+    """The first 800 rows, with the rest appended in two batches."""
+    data = Dataset(frame.iloc[:800].reset_index(drop=True))
+    data.append(records(frame.iloc[800:900]))
+    data.append(records(frame.iloc[900:]))
+    return data
+
+
+@pytest.mark.parametrize('row,col', PAIRS)
+def test_appended_tables_match_pandas(appended, frame, row, col):
+    _assert_table(_plain(appended.engine.crosstab(row, col)), pd.crosstab(frame[row], frame[col]))
+
+
+def test_appended_counts_match_pandas(appended, frame):
+    assert appended.n_rows == len(frame)
+    assert appended.engine.value_counts('Country').to_dict() == frame['Country'].value_counts().to_dict()
+    pd.testing.assert_series_equal(appended.engine.histogram('Age'),
+                                   frame['Age'].value_counts().sort_index(), check_index_type=False)
+    assert records(appended.frame) == records(frame)
+
+
+def test_append_adds_unseen_labels(frame):
+    data = Dataset(frame)
+    row = records(frame.iloc[:1])[0] | {'Country': 'Atlantis', 'treatment': 'Yes'}
+    data.append([row])
+    table = data.engine.crosstab('Country', 'treatment')
+    assert table.loc['Atlantis'].tolist() == [0, 1]
+    assert table.index.is_monotonic_increasing
+
+
+def test_append_bumps_the_fingerprint(frame):
+    data = Dataset(frame)
+    before = data.fingerprint()
+    data.append(records(frame.iloc[:3]))
+    assert data.revision == 1
+    assert data.fingerprint() != before
+
+
+@pytest.mark.parametrize('change', [{'Age': 'old'}, {'Planet': 'Earth'}])
+def test_invalid_rows_are_rejected(frame, change):
+    data = Dataset(frame)
+    row = records(frame.iloc[:1])[0] | change
+    with pytest.raises(ValueError):
+        data.append([row])
+    assert data.revision == 0 and data.n_rows == len(frame)
+
+
+def test_missing_column_is_rejected(frame):
+    data = Dataset(frame)
+    row = records(frame.iloc[:1])[0]
+    del row['Gender']
+    with pytest.raises(ValueError, match='missing columns'):
+        data.append([row])
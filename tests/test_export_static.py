@@ -0,0 +1,54 @@
+# File Path: employee_wellness_project/tests/test_export_static.py
+# This file tests the static export: every chart file is written once, and a
+# re-export only rebuilds the charts whose inputs changed.
+
+import json
+
+import pytest
+
+import analysis as an
+import export_static
+from app import app
+from chart_api import template_json
+from conftest import records
+from dataset import Dataset
+
+
+@pytest.fixture
+def export(monkeypatch, tmp_path, frame):
+    """Runs export_static.export into a scratch directory (charts only: the tree has no templates)."""
+    monkeypatch.setattr(an, 'dataset', Dataset(frame))
+    monkeypatch.setattr(export_static, 'PAGES', {})
+    for key in ('CHART_EMBED', 'STATIC_CHART_URL', 'STATIC_TEMPLATE_URL'):
+        monkeypatch.setitem(app.config, key, app.config[key])
+    return lambda **kwargs: export_static.export(str(tmp_path), workers=2, **kwargs)
+
+
+def test_export_writes_every_chart(export, tmp_path):
+    assert export() == {'built': len(an.CHARTS), 'skipped': 0, 'pages': 0}
+    manifest = json.loads((tmp_path / 'charts' / 'manifest.json').read_text())
+    assert sorted(manifest) == sorted(an.CHARTS)
+    figure = json.loads((tmp_path / 'charts' / 'q1_gender.json').read_text())
+    assert figure['data']
+    assert 'template' not in figure['layout']
+    assert (tmp_path / 'charts' / 'template.json').read_text() == template_json()
+
+
+def test_reexport_skips_unchanged_charts(export):
+    export()
+    assert export()['built'] == 0
+    assert export(force=True)['built'] == len(an.CHARTS)
+
+
+def test_new_data_rebuilds_the_charts(export, frame):
+    export()
+    before = export_static.chart_inputs('q1_gender')
+    an.append_responses(records(frame.iloc[:5]))
+    assert export_static.chart_inputs('q1_gender') != before
+    assert export()['built'] == len(an.CHARTS)
+
+
+def test_a_missing_chart_file_is_rebuilt(export, tmp_path):
+    export()
+    (tmp_path / 'charts' / 'q1_gender.json').unlink()
+    assert export()['built'] == 1
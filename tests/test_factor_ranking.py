@@ -0,0 +1,64 @@
+# File Path: employee_wellness_project/tests/test_factor_ranking.py
+# This file tests the factor ranking against the same statistics computed with
+# pandas, one (column, level) at a time.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset import Dataset
+from factor_ranking import rank_factors
+
+
+@pytest.fixture(scope='module')
+def ranking(frame) -> pd.DataFrame:
+    return rank_factors(Dataset(frame), replicates=400, min_count=0)
+
+
+def _expected(frame: pd.DataFrame, answers: pd.Series, level: str) -> dict[str, float]:
+    """One-vs-rest statistics of a level, from pandas (respondents missing either answer left out)."""
+    answered = answers.notna() & frame['treatment'].notna()
+    observed = pd.crosstab(answers[answered] == level, frame.loc[answered, 'treatment'] == 'Yes')
+    expected = np.outer(observed.sum(axis=1), observed.sum(axis=0)) / observed.to_numpy().sum()
+    rates = observed[True] / observed.sum(axis=1)
+    return {'count': observed.loc[True].sum(), 'rate': rates[True], 'rest_rate': rates[False],
+            'lift': rates[True] - rates[False], 'chi2': ((observed - expected) ** 2 / expected).to_numpy().sum()}
+
+
+def test_statistics_match_pandas(ranking, frame):
+    for row in ranking[ranking['column'] != 'Age'].itertuples():
+        expected = _expected(frame, frame[row.column].astype(object), row.level)
+        for name, value in expected.items():
+            assert getattr(row, name) == pytest.approx(value), (row.column, row.level, name)
+
+
+def test_age_is_banded(ranking, frame):
+    bands = pd.cut(frame['Age'], [-np.inf, 25, 35, 45, 55, np.inf], right=False,
+                   labels=['<25', '25-34', '35-44', '45-54', '55+']).astype(object)
+    for row in ranking[ranking['column'] == 'Age'].itertuples():
+        assert row.lift == pytest.approx(_expected(frame, bands, row.level)['lift'])
+
+
+def test_ranking_order_and_mirrors(ranking):
+    assert ranking['chi2'].is_monotonic_decreasing
+    binary = ranking[ranking['column'] == 'family_history']
+    assert binary['level'].tolist() == ['Yes'] and (binary['lift'] > 0).all()
+
+
+def test_p_values_come_from_the_replicates(ranking):
+    assert ranking['p_value'].between(2 / 401, 1).all()
+    assert (ranking.loc[ranking['chi2'] > 30, 'p_value'] == 2 / 401).all()  # no replicate crosses zero
+    assert ranking['p_value'].iloc[-5:].min() > 0.05
+
+
+def test_intervals_are_reproducible_and_cover_the_lift(ranking, frame):
+    again = rank_factors(Dataset(frame), replicates=400, min_count=0)
+    pd.testing.assert_frame_equal(again, ranking)
+    covered = (ranking['ci_low'] <= ranking['lift']) & (ranking['lift'] <= ranking['ci_high'])
+    assert covered.mean() > 0.95
+
+
+def test_min_count_and_top_n(frame):
+    ranking = rank_factors(Dataset(frame), top_n=5, replicates=50)
+    assert len(ranking) == 5
+    assert (ranking['count'] >= 30).all()
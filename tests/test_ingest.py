@@ -0,0 +1,119 @@
+# File Path: employee_wellness_project/tests/test_ingest.py
+# This file tests that ingest reproduces the shipped cleaned data, and that an
+# incremental run (or resuming an interrupted one) gives the same outputs as
+# ingesting the whole export at once.
+
+import filecmp
+
+import pytest
+
+import comment_index
+import ingest
+import snapshot
+import timeline
+from conftest import CLEANED_CSV, RAW_CSV
+
+CHUNK_ROWS = 100
+
+
+def _raw_lines() -> list[bytes]:
+    with open(RAW_CSV, 'rb') as fh:
+        return fh.read().splitlines(keepends=True)
+
+
+def _write_raw(path, lines: list[bytes]) -> str:
+    path.write_bytes(b''.join(lines))
+    return str(path)
+
+
+def _assert_same_outputs(expected: str, actual: str) -> None:
+    assert filecmp.cmp(expected, actual, shallow=False)
+    assert filecmp.cmp(timeline.timestamps_path(expected), timeline.timestamps_path(actual), shallow=False)
+    assert snapshot.is_fresh(actual)
+    assert snapshot.load_frame(actual).equals(snapshot.load_frame(expected))
+    rows = [sum(segment['n_rows'] for segment in comment_index.read_meta(comment_index.index_path(path))['segments'])
+            for path in (expected, actual)]
+    assert rows[0] == rows[1]
+
+
+@pytest.fixture
+def full_ingest(tmp_path) -> str:
+    """The cleaned CSV of the whole raw export, ingested in one run."""
+    (tmp_path / 'full').mkdir()
+    raw = _write_raw(tmp_path / 'full' / 'raw.csv', _raw_lines())
+    cleaned = str(tmp_path / 'full' / 'cleaned.csv')
+    ingest.ingest(raw, cleaned, CHUNK_ROWS)
+    return cleaned
+
+
+def test_full_ingest_reproduces_shipped_data(full_ingest):
+    assert filecmp.cmp(full_ingest, CLEANED_CSV, shallow=False)
+
+
+def test_incremental_matches_full(tmp_path, full_ingest):
+    lines = _raw_lines()
+    raw = _write_raw(tmp_path / 'raw.csv', lines[:600])
+    cleaned = str(tmp_path / 'cleaned.csv')
+    first = ingest.ingest(raw, cleaned, CHUNK_ROWS)
+    _write_raw(tmp_path / 'raw.csv', lines)
+    state = ingest.ingest(raw, cleaned, CHUNK_ROWS)
+
+    assert state['rows_written'] > first['rows_written']
+    assert 'pending' not in ingest.read_state(cleaned)
+    _assert_same_outputs(full_ingest, cleaned)
+
+
+def test_incomplete_last_line_waits_for_the_next_run(tmp_path, full_ingest):
+    data = b''.join(_raw_lines())
+    raw = tmp_path / 'raw.csv'
+    raw.write_bytes(data[:-40])  # the export is still being written
+    cleaned = str(tmp_path / 'cleaned.csv')
+    first = ingest.ingest(str(raw), cleaned, CHUNK_ROWS)
+    raw.write_bytes(data)
+    assert ingest.ingest(str(raw), cleaned, CHUNK_ROWS)['rows_read'] == first['rows_read'] + 1
+    _assert_same_outputs(full_ingest, cleaned)
+
+
+def test_rerun_without_new_rows_changes_nothing(tmp_path, full_ingest):
+    raw = _write_raw(tmp_path / 'raw.csv', _raw_lines())
+    cleaned = str(tmp_path / 'cleaned.csv')
+    first = ingest.ingest(raw, cleaned, CHUNK_ROWS)
+    assert ingest.ingest(raw, cleaned, CHUNK_ROWS) == first
+    _assert_same_outputs(full_ingest, cleaned)
+
+
+@pytest.mark.parametrize('crash_in', ['append_snapshot', 'append_timestamps', 'append_segment', 'stamp_snapshot'])
+def test_resume_after_crash_appends_nothing_twice(tmp_path, monkeypatch, full_ingest, crash_in):
+    lines = _raw_lines()
+    raw = _write_raw(tmp_path / 'raw.csv', lines[:600])
+    cleaned = str(tmp_path / 'cleaned.csv')
+    ingest.ingest(raw, cleaned, CHUNK_ROWS)
+    _write_raw(tmp_path / 'raw.csv', lines)
+
+    calls = []
+    original = getattr(ingest, crash_in)
+
+    def crash(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 2 or crash_in in ('append_segment', 'stamp_snapshot'):
+            raise KeyboardInterrupt  # the process dies mid-run
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(ingest, crash_in, crash)
+    with pytest.raises(KeyboardInterrupt):
+        ingest.ingest(raw, cleaned, CHUNK_ROWS)
+    assert 'pending' in ingest.read_state(cleaned)
+    monkeypatch.setattr(ingest, crash_in, original)
+
+    ingest.ingest(raw, cleaned, CHUNK_ROWS)
+    _assert_same_outputs(full_ingest, cleaned)
+
+
+def test_full_rebuild(tmp_path, full_ingest):
+    raw = _write_raw(tmp_path / 'raw.csv', _raw_lines())
+    cleaned = str(tmp_path / 'cleaned.csv')
+    ingest.ingest(raw, cleaned, CHUNK_ROWS)
+    with open(cleaned, 'ab') as fh:
+        fh.write(b'garbage\r\n')
+    ingest.ingest(raw, cleaned, CHUNK_ROWS, full=True)
+    _assert_same_outputs(full_ingest, cleaned)
@@ -0,0 +1,56 @@
+# File Path: employee_wellness_project/tests/test_instrumentation.py
+# This file tests the latency histograms, the per-request chart timings and the
+# sampling profiler.
+
+import time
+
+from instrumentation import (Histogram, SamplingProfiler, chart_timer, end_request, phase, server_timing,
+                             start_request)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('test_seconds', 'A test histogram.', ('route',), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 5.0):
+        histogram.observe(seconds, '/a')
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="/a"} 3' in lines
+    assert 'test_seconds_sum{route="/a"} 5.550000' in lines
+
+
+def test_chart_phases_are_reported_to_the_request():
+    token = start_request()
+    with chart_timer('q1'):
+        time.sleep(0.01)
+        phase('figure')
+    timings = dict(end_request(token))
+    assert set(timings) == {'q1.aggregation', 'q1.figure'}
+    assert timings['q1.aggregation'] >= 0.01
+
+
+def test_timings_outside_a_request_are_dropped():
+    with chart_timer('q1'):
+        phase('figure')
+    token = start_request()
+    assert end_request(token) == []
+
+
+def test_server_timing_header():
+    assert server_timing([('q1.aggregation', 0.0123), ('total', 0.5)]) == 'q1.aggregation;dur=12.3, total;dur=500.0'
+
+
+def test_profiler_samples_the_request_thread(tmp_path):
+    def busy():
+        end = time.perf_counter() + 0.1
+        while time.perf_counter() < end:
+            pass
+
+    profiler = SamplingProfiler(interval=0.002).start()
+    busy()
+    samples = profiler.stop()
+    assert any('busy (test_instrumentation.py' in stack for stack in samples)
+    profiler.dump(str(tmp_path / 'slow.folded'))
+    line = (tmp_path / 'slow.folded').read_text().splitlines()[0]
+    assert int(line.rsplit(' ', 1)[1]) > 0
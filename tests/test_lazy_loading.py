@@ -0,0 +1,83 @@
+# File Path: employee_wellness_project/tests/test_lazy_loading.py
+# This file tests the lazy-loading helpers, and that importing the app (and
+# answering the routes that don't read the data) never imports pandas or Plotly.
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from lazy_loading import lazy_import, once
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code: str) -> list[str]:
+    """Runs code in a fresh interpreter in the project directory; returns its output lines."""
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def test_once_runs_once_for_concurrent_callers():
+    calls = []
+
+    @once
+    def load():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(load())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and load.done()
+    assert all(result is results[0] for result in results)
+
+
+def test_once_runs_again_after_a_failure():
+    attempts = []
+
+    @once
+    def load():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError('disk not mounted yet')
+        return 'data'
+
+    with pytest.raises(OSError):
+        load()
+    assert not load.done()
+    assert load() == 'data' and load() == 'data' and len(attempts) == 2
+
+
+def test_lazy_import_loads_on_first_attribute():
+    sys.modules.pop('colorsys', None)
+    ran = []
+    colorsys = lazy_import('colorsys', setup=lambda: ran.append(1))
+    assert 'colorsys' not in sys.modules and not ran
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert 'colorsys' in sys.modules and ran == [1]
+    colorsys.hsv_to_rgb(0.0, 1.0, 1.0)
+    assert ran == [1]
+
+
+def test_importing_the_app_loads_no_data_libraries():
+    status, pandas, plotly = _run(
+        "import sys, app\n"
+        "response = app.app.test_client().get('/api/ready')\n"
+        "print(response.status_code, 'pandas' in sys.modules, 'plotly' in sys.modules)")
+    assert (status, pandas, plotly) == ('503', 'False', 'False')
+
+
+def test_dataset_loads_on_first_read():
+    before, rows, after = _run(
+        "import sys, analysis\n"
+        "before = 'pandas' in sys.modules\n"
+        "print(before, analysis.dataset.n_rows, 'pandas' in sys.modules)")
+    assert before == 'False' and int(rows) > 0 and after == 'True'
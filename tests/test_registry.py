@@ -0,0 +1,127 @@
+# File Path: employee_wellness_project/tests/test_registry.py
+# This file tests DatasetRegistry: datasets load once (even when requested
+# concurrently) and the least recently used are evicted beyond the memory budget,
+# which is checked again whenever a dataset grows.
+
+import threading
+import time
+
+import pytest
+
+from conftest import records
+from dataset import Dataset
+from registry import DatasetRegistry
+
+
+@pytest.fixture
+def paths(tmp_path, cleaned_csv) -> dict[str, str]:
+    """Three dataset ids, all backed by copies of the shipped data."""
+    data = open(cleaned_csv, 'rb').read()
+    out = {}
+    for dataset_id in ('a', 'b', 'c'):
+        path = tmp_path / f'{dataset_id}.csv'
+        path.write_bytes(data)
+        out[dataset_id] = str(path)
+    return out
+
+
+@pytest.fixture
+def size(cleaned_csv) -> int:
+    return Dataset.load(cleaned_csv).memory_usage()
+
+
+def test_datasets_load_once(paths, size):
+    registry = DatasetRegistry(paths.get, budget_bytes=10 * size)
+    first = registry.get('a')
+    assert registry.get('a') is first
+    assert registry.stats()['loads'] == 1
+    assert registry.stats()['loaded'] == {'a': size}
+
+
+def test_unknown_dataset(paths, size):
+    registry = DatasetRegistry(paths.get, budget_bytes=10 * size)
+    with pytest.raises(KeyError):
+        registry.get('z')
+    assert registry.stats()['loading'] == []
+
+
+def test_least_recently_used_is_evicted(paths, size):
+    registry = DatasetRegistry(paths.get, budget_bytes=int(2.5 * size))
+    a = registry.get('a')
+    registry.get('b')
+    assert registry.get('a') is a  # 'b' is now the least recently used
+    registry.get('c')
+    stats = registry.stats()
+    assert sorted(stats['loaded']) == ['a', 'c']
+    assert stats['evictions'] == 1
+    assert stats['memory_bytes'] <= stats['budget_bytes']
+
+
+def test_most_recent_dataset_stays_over_budget(paths, size):
+    registry = DatasetRegistry(paths.get, budget_bytes=size // 2)
+    registry.get('a')
+    registry.get('b')
+    assert list(registry.stats()['loaded']) == ['b']
+
+
+def test_appended_and_pinned_datasets_are_kept(paths, size, frame):
+    registry = DatasetRegistry(paths.get, budget_bytes=size // 2)
+    pinned = Dataset(frame)
+    registry.pin('default', pinned)
+    registry.get('a').append(records(frame.iloc[:1]))
+    registry.get('b')
+    assert sorted(registry.stats()['loaded']) == ['a', 'b']
+    assert registry.get('default') is pinned
+
+
+def test_datasets_are_remeasured_when_they_grow(paths, size, cleaned_csv):
+    grown = Dataset.load(cleaned_csv)
+    grown.cube
+    cube = grown.memory_usage() - size
+    assert cube > 0
+    registry = DatasetRegistry(paths.get, budget_bytes=2 * size + cube // 2)
+    a, b = registry.get('a'), registry.get('b')
+    b.cube  # built on first use: 'b' now takes size + cube, and 'a' no longer fits
+    stats = registry.stats()
+    assert stats['loaded'] == {'b': size + cube} and stats['evictions'] == 1
+    a.cube  # no longer registered: ignored
+    assert registry.stats()['loaded'] == {'b': size + cube}
+
+
+def test_concurrent_requests_share_one_load(paths, size):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_loader(path):
+        started.set()
+        release.wait(5)
+        return Dataset.load(path)
+
+    registry = DatasetRegistry(paths.get, budget_bytes=10 * size, loader=slow_loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('a'))) for _ in range(3)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while registry.stats()['coalesced'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 3 and results[0] is results[1] is results[2]
+    assert registry.stats()['loads'] == 1
+
+
+def test_failed_load_reaches_every_waiter_and_is_retried(paths, size):
+    calls = []
+
+    def broken_loader(path):
+        calls.append(path)
+        raise OSError('disk error')
+
+    registry = DatasetRegistry(paths.get, budget_bytes=10 * size, loader=broken_loader)
+    for _ in range(2):
+        with pytest.raises(OSError):
+            registry.get('a')
+    assert len(calls) == 2
@@ -0,0 +1,96 @@
+# File Path: employee_wellness_project/tests/test_reloader.py
+# This file tests the hot reloader: a refreshed file is loaded beside the old
+# version and swapped in, and appended responses are never dropped silently.
+
+import logging
+import os
+import threading
+
+import pytest
+
+from conftest import records
+from dataset import Dataset
+from registry import DatasetRegistry
+from reloader import DatasetReloader, ReloadRefused
+
+
+def _grow(path: str, lines: int = 5) -> None:
+    """Appends copies of the first data rows to a cleaned CSV, as ingest would."""
+    with open(path, 'rb') as fh:
+        rows = fh.read().splitlines(keepends=True)[1:lines + 1]
+    with open(path, 'ab') as fh:
+        fh.write(b''.join(rows))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def registry(cleaned_csv) -> DatasetRegistry:
+    registry = DatasetRegistry({'emea': cleaned_csv}.get, budget_bytes=1 << 40)
+    registry.get('emea')
+    return registry
+
+
+def _reloader(registry, **kwargs) -> DatasetReloader:
+    return DatasetReloader(registry, lambda dataset_id, path: Dataset.load(path), **kwargs)
+
+
+def test_reload_swaps_in_the_new_version(registry, cleaned_csv, frame):
+    old = registry.get('emea')
+    warmed = []
+    reloader = _reloader(registry, warm=lambda dataset_id, data: warmed.append(registry.get(dataset_id)))
+    _grow(cleaned_csv)
+    new = reloader.reload('emea').result(10)
+    assert warmed == [old]  # charts are warmed while the old version still serves
+    assert registry.get('emea') is new and new.n_rows == len(frame) + 5
+    assert old.n_rows == len(frame) and old.fingerprint() != new.fingerprint()
+    assert reloader.stats()['last']['emea']['replaced'] == old.fingerprint()
+
+
+def test_reloads_of_one_dataset_are_joined(registry):
+    release = threading.Event()
+    reloader = _reloader(registry, warm=lambda dataset_id, data: release.wait(5))
+    first = reloader.reload('emea')
+    assert reloader.reload('emea') is first
+    release.set()
+    first.result(10)
+    assert reloader.stats()['reloads'] == 1
+
+
+def test_appended_responses_need_force(registry, frame):
+    registry.get('emea').append(records(frame.iloc[:1]))
+    reloader = _reloader(registry)
+    with pytest.raises(ReloadRefused):
+        reloader.reload('emea')
+    assert reloader.reload('emea', force=True).result(10).revision == 0
+
+
+def test_failed_reload_keeps_the_old_version(registry):
+    old = registry.get('emea')
+
+    def broken(dataset_id, path):
+        raise OSError('disk error')
+
+    reloader = DatasetReloader(registry, broken)
+    with pytest.raises(OSError):
+        reloader.reload('emea').result(10)
+    assert registry.get('emea') is old and reloader.stats()['failures'] == 1
+
+
+def test_poll_waits_for_the_file_to_settle(registry, cleaned_csv):
+    reloader = _reloader(registry)
+    assert reloader.poll() == []
+    _grow(cleaned_csv)
+    assert reloader.poll() == []  # changed since the last poll: maybe still being written
+    assert reloader.poll() == ['emea']
+
+
+def test_poll_warns_once_about_a_refused_reload(registry, cleaned_csv, frame, caplog):
+    registry.get('emea').append(records(frame.iloc[:1]))
+    reloader = _reloader(registry)
+    reloader.poll()
+    _grow(cleaned_csv)
+    with caplog.at_level(logging.WARNING, logger='reloader'):
+        for _ in range(4):
+            assert reloader.poll() == []
+    assert len([r for r in caplog.records if 'not reloading' in r.getMessage()]) == 1
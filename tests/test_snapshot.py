@@ -0,0 +1,119 @@
+# File Path: employee_wellness_project/tests/test_snapshot.py
+# This file tests the columnar snapshot: it loads the same data as the CSV, a
+# stale snapshot is never used, a rebuild doesn't disturb mapped readers, and
+# concurrent builders and readers never fail.
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+from dataset import Dataset
+
+
+def _append_row(csv_path: str, frame: pd.DataFrame) -> None:
+    with open(csv_path, 'a', encoding='utf-8') as fh:
+        fh.write(','.join('' if pd.isna(value) else str(value) for value in frame.iloc[0]) + '\r\n')
+
+
+def _versions(csv_path: str) -> list[str]:
+    prefix = os.path.basename(snapshot.snapshot_path(csv_path)) + '.v'
+    return sorted(name for name in os.listdir(os.path.dirname(csv_path)) if name.startswith(prefix))
+
+
+def test_build_matches_csv(cleaned_csv, frame):
+    snapshot.build_snapshot(cleaned_csv)
+    assert snapshot.is_fresh(cleaned_csv)
+    loaded = snapshot.read_snapshot(snapshot.snapshot_path(cleaned_csv))
+    pd.testing.assert_frame_equal(loaded, snapshot.to_categorical(frame))
+    pd.testing.assert_frame_equal(snapshot.load_frame(cleaned_csv), loaded)
+
+
+def test_codes_are_narrow(cleaned_csv):
+    snapshot.build_snapshot(cleaned_csv)
+    meta = snapshot.read_meta(snapshot.snapshot_path(cleaned_csv))
+    kinds = {spec['name']: (spec['kind'], np.dtype(spec['dtype'])) for spec in meta['columns']}
+    assert kinds['Gender'] == ('category', np.dtype('<i1'))
+    assert kinds['Age'][0] == 'numeric'
+    assert snapshot.code_dtype(200) == np.dtype('<i2')
+
+
+def test_stale_or_unreadable_snapshot_falls_back_to_csv(cleaned_csv, frame):
+    path = snapshot.snapshot_path(cleaned_csv)
+    snapshot.build_snapshot(cleaned_csv)
+    _append_row(cleaned_csv, frame)
+    assert not snapshot.is_fresh(cleaned_csv)
+    loaded = snapshot.load_frame(cleaned_csv)  # load_frame doesn't rebuild
+    assert len(loaded) == len(frame) + 1 and not snapshot.is_fresh(cleaned_csv)
+    assert isinstance(loaded['Gender'].dtype, pd.CategoricalDtype)
+    assert snapshot.ensure_snapshot(cleaned_csv) and snapshot.is_fresh(cleaned_csv)
+
+    meta = os.path.join(os.path.realpath(path), 'meta.json')
+    with open(meta, encoding='utf-8') as fh:
+        broken = json.load(fh)
+    broken['columns'][0]['file'] = 'missing.bin'
+    with open(meta, 'w', encoding='utf-8') as fh:
+        json.dump(broken, fh)
+    assert len(snapshot.load_frame(cleaned_csv)) == len(frame) + 1
+
+
+def test_mapped_columns_are_not_copied(cleaned_csv):
+    snapshot.build_snapshot(cleaned_csv)
+    mapped = snapshot.load_frame(cleaned_csv, mmap=True)
+    assert mapped.equals(snapshot.load_frame(cleaned_csv))
+    assert isinstance(mapped['Gender'].array.codes, np.memmap)
+    engine = Dataset.load(cleaned_csv, mmap=True).engine
+    assert isinstance(engine.codes['Gender'], np.memmap)
+
+
+def test_swap_keeps_previous_version_and_prunes_older(cleaned_csv):
+    path = snapshot.snapshot_path(cleaned_csv)
+    snapshot.build_snapshot(cleaned_csv)
+    first = os.path.realpath(path)
+    snapshot.build_snapshot(cleaned_csv)
+    second = os.path.realpath(path)
+    assert os.path.islink(path) and second != first
+    assert os.path.isdir(first)  # a reader that resolved the link before the swap can still open it
+
+    snapshot.build_snapshot(cleaned_csv)
+    assert not os.path.exists(first)
+    assert [os.path.join(os.path.dirname(path), name) for name in _versions(cleaned_csv)] == \
+        [second, os.path.realpath(path)]
+    assert not [name for name in os.listdir(os.path.dirname(path)) if '.link-' in name or name.startswith('.snapshot-')]
+
+
+def test_mmap_reader_survives_a_swap(cleaned_csv):
+    snapshot.build_snapshot(cleaned_csv)
+    before = snapshot.load_frame(cleaned_csv, mmap=True)
+    expected = before['Gender'].value_counts()
+    snapshot.build_snapshot(cleaned_csv)
+    snapshot.build_snapshot(cleaned_csv)  # its version is removed now; the maps stay valid
+    pd.testing.assert_series_equal(before['Gender'].value_counts(), expected)
+
+
+def test_concurrent_builders_and_readers(cleaned_csv, frame):
+    errors = []
+
+    def run(fn):
+        try:
+            for _ in range(8):
+                fn()
+        except Exception as e:  # reported below, with the others
+            errors.append(e)
+
+    def read():
+        assert len(snapshot.load_frame(cleaned_csv, mmap=True)) == len(frame)
+
+    threads = [threading.Thread(target=run, args=(fn,))
+               for fn in [lambda: snapshot.build_snapshot(cleaned_csv)] * 3 + [read] * 3 +
+               [lambda: snapshot.ensure_snapshot(cleaned_csv)] * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert snapshot.is_fresh(cleaned_csv)
+    assert len(_versions(cleaned_csv)) <= 2
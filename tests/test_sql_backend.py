@@ -0,0 +1,93 @@
+# File Path: employee_wellness_project/tests/test_sql_backend.py
+# This file tests that an SQLite-backed dataset renders exactly what the in-memory
+# dataset renders: every chart and KPI, for segments, and after appends.
+
+import pandas as pd
+import pytest
+
+import analysis as an
+from chart_api import figure_json
+from conftest import records
+from dataset import Dataset
+from factor_ranking import rank_factors
+from sql_backend import SqlDataset
+
+KPIS = ('get_kpi_treatment_rate', 'get_kpi_family_history', 'get_kpi_fear_consequences')
+SEGMENTS = [{}, {'Gender': ['Female']}, {'Country': ['Canada', 'United Kingdom'], 'tech_company': ['Yes']}]
+
+
+def _render(data) -> dict:
+    """Every chart's figure JSON and every KPI, rendered from data."""
+    out = {}
+    with an.use(data):
+        for chart_id, build in an.CHARTS.items():
+            figures = build()
+            out[chart_id] = [figure_json(f) for f in (figures if isinstance(figures, tuple) else (figures,))]
+        for name in KPIS:
+            out[name] = getattr(an, name)()
+    return out
+
+
+def _assert_same_output(memory, sql) -> None:
+    expected, result = _render(memory), _render(sql)
+    assert [key for key in expected if expected[key] != result[key]] == []
+    pd.testing.assert_frame_equal(sql.frame, memory.frame)
+
+
+@pytest.fixture
+def datasets(cleaned_csv) -> tuple[Dataset, SqlDataset]:
+    return Dataset.load(cleaned_csv), SqlDataset.load(cleaned_csv)
+
+
+@pytest.mark.parametrize('filters', SEGMENTS)
+def test_segment_matches_memory(datasets, filters):
+    memory, sql = datasets
+    _assert_same_output(memory.select(filters), sql.select(filters))
+
+
+def test_factor_ranking_matches_memory(datasets):
+    memory, sql = datasets
+    filters = SEGMENTS[1]
+    pd.testing.assert_frame_equal(rank_factors(sql.select(filters)), rank_factors(memory.select(filters)))
+
+
+def test_append_matches_memory(datasets, frame):
+    memory, sql = datasets
+    new = records(frame.iloc[:5])
+    new[0] = {**new[0], 'Gender': 'Nonbinary', 'Country': 'Iceland'}  # labels not in the data yet
+    for data in (memory, sql):
+        data.append(new)
+        data.append(records(frame.iloc[5:8]))
+    assert sql.n_rows == memory.n_rows == len(frame) + 8
+    _assert_same_output(memory, sql)
+    for filters in SEGMENTS[1:]:
+        _assert_same_output(memory.select(filters), sql.select(filters))
+
+
+def test_appends_persist(datasets, cleaned_csv, frame):
+    _, sql = datasets
+    sql.append(records(frame.iloc[:3]))
+    reopened = SqlDataset.load(cleaned_csv)
+    assert reopened.n_rows == len(frame) + 3
+    assert reopened.fingerprint() == sql.fingerprint()
+
+
+@pytest.mark.parametrize('filters', SEGMENTS[:2])
+def test_engine_subset_matches_memory(datasets, filters):
+    memory, sql = (data.select(filters) for data in datasets)
+    rows = memory.mask({'tech_company': ['Yes']}).nonzero()[0][::3]
+    expected, result = memory.engine.subset(rows), sql.engine.subset(rows)
+    assert result.n_rows == expected.n_rows == len(rows)
+    pd.testing.assert_frame_equal(result.crosstab('Country', 'treatment'), expected.crosstab('Country', 'treatment'))
+    pd.testing.assert_series_equal(result.value_counts('Gender'), expected.value_counts('Gender'))
+
+
+def test_engine_append_matches_memory(datasets, frame):
+    memory, sql = datasets
+    batch = memory.prepare(records(frame.iloc[:4]))
+    batch.loc[0, 'Country'] = 'Iceland'
+    for engine in (memory.engine, sql.engine):
+        engine.append(batch)
+    pd.testing.assert_frame_equal(sql.engine.crosstab('Country', 'treatment'),
+                                  memory.engine.crosstab('Country', 'treatment'))
+    assert sql.engine.n_rows == memory.engine.n_rows == len(frame) + 4
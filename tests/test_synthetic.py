@@ -0,0 +1,49 @@
+# File Path: employee_wellness_project/tests/test_synthetic.py
+# This file tests the synthetic survey generator: its rows look like the cleaned
+# data, it is reproducible, and the CSV and snapshot outputs agree.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import snapshot
+import synthetic
+from conftest import CLEANED_CSV
+
+
+@pytest.fixture(scope='module')
+def model() -> synthetic.SurveyModel:
+    return synthetic.SurveyModel(snapshot.load_frame(CLEANED_CSV))
+
+
+def test_sample_uses_the_cleaned_vocabulary(model, frame):
+    sample = model.sample(20_000, np.random.default_rng(0))
+    assert list(sample.columns) == list(frame.columns)
+    for col in ['Gender', 'Country', 'treatment', 'work_interfere']:
+        assert set(sample[col].dropna()) <= set(frame[col].dropna())
+    assert sample['Age'].between(frame['Age'].min(), frame['Age'].max()).all()
+
+
+def test_sample_keeps_the_rates_by_treatment(model, frame):
+    sample = model.sample(50_000, np.random.default_rng(1))
+    for col in ['family_history', 'work_interfere']:
+        expected = pd.crosstab(frame[col], frame['treatment'], normalize='columns')
+        drawn = pd.crosstab(sample[col].astype(object), sample['treatment'].astype(object), normalize='columns')
+        np.testing.assert_allclose(drawn.loc[expected.index, expected.columns], expected, atol=0.02)
+
+
+def test_generate_is_reproducible(tmp_path):
+    first, second = str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv')
+    assert synthetic.generate(2_500, first, chunk_rows=1_000, source=CLEANED_CSV) == 2_500
+    synthetic.generate(2_500, second, chunk_rows=1_000, source=CLEANED_CSV)
+    assert open(first, 'rb').read() == open(second, 'rb').read()
+    assert len(pd.read_csv(first)) == 2_500
+
+
+def test_snapshot_output_matches_csv(tmp_path):
+    out = str(tmp_path / 'synthetic.csv')
+    synthetic.generate(2_500, out, fmt='both', chunk_rows=1_000, source=CLEANED_CSV)
+    assert snapshot.is_fresh(out)
+    from_csv = snapshot.to_categorical(pd.read_csv(out))
+    from_snapshot = snapshot.read_snapshot(snapshot.snapshot_path(out))
+    pd.testing.assert_frame_equal(from_snapshot.astype(object), from_csv.astype(object), check_dtype=False)
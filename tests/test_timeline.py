@@ -0,0 +1,110 @@
+# File Path: employee_wellness_project/tests/test_timeline.py
+# This file tests the KPI timeline against the same windows computed with pandas
+# from the response timestamps that ingest keeps next to the cleaned data.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis as an
+import ingest
+from dataset import Dataset
+from test_ingest import CHUNK_ROWS, _raw_lines, _write_raw
+from timeline import DAY, HOUR, KPIS, MISSING, Timeline, read_timestamps, timestamps_path
+
+
+@pytest.fixture(scope='module')
+def stamped(tmp_path_factory) -> str:
+    """A cleaned CSV ingested from the whole raw export, with its timestamps file."""
+    root = tmp_path_factory.mktemp('timeline')
+    cleaned = str(root / 'cleaned.csv')
+    ingest.ingest(_write_raw(root / 'raw.csv', _raw_lines()), cleaned, CHUNK_ROWS)
+    return cleaned
+
+
+@pytest.fixture
+def dataset(stamped) -> Dataset:
+    return Dataset.load(stamped)
+
+
+def _expected(frame: pd.DataFrame, times: np.ndarray, start: int, end: int) -> dict[str, float]:
+    """The responses and KPI rates of the rows timestamped in [start, end), with pandas."""
+    rows = frame[(times >= start) & (times < end)]
+    out = {'responses': len(rows)}
+    for kpi, (col, answer) in KPIS.items():
+        answered = rows[col].notna().sum()
+        out[kpi] = (rows[col] == answer).sum() * 100 / answered if answered else np.nan
+    return out
+
+
+def test_timestamps_follow_the_rows(stamped, frame):
+    times = read_timestamps(timestamps_path(stamped))
+    assert len(times) == len(frame) and (times != MISSING).all()
+
+
+def test_whole_timeline_matches_the_kpis(dataset):
+    timeline = dataset.timeline
+    window = timeline.window(timeline.start, timeline.end)
+    assert window['responses'] == dataset.n_rows
+    with an.use(dataset):
+        assert f"{window['treatment']:.1f}%" == an.get_kpi_treatment_rate()
+        assert f"{window['family_history']:.1f}%" == an.get_kpi_family_history()
+        assert f"{window['fear_consequences']:.1f}%" == an.get_kpi_fear_consequences()
+
+
+@pytest.mark.parametrize('width,step', [(HOUR, None), (3 * HOUR, None), (6 * HOUR, HOUR), (DAY, 2 * HOUR)])
+def test_series_matches_pandas(dataset, width, step):
+    timeline, times = dataset.timeline, dataset.times
+    series = timeline.series(width, step, timeline.start + 2 * HOUR, timeline.end)
+    assert len(series) > 1
+    for row in series.itertuples(index=False):
+        lo, hi = int(row.start.timestamp()), int(row.end.timestamp())
+        assert hi - lo <= width
+        expected = _expected(dataset.frame, times, lo, hi)
+        assert row.responses == expected['responses']
+        np.testing.assert_allclose([getattr(row, kpi) for kpi in KPIS], [expected[kpi] for kpi in KPIS])
+
+
+def test_tumbling_windows_cover_every_response(dataset):
+    series = dataset.timeline.series(DAY)
+    assert len(series) == 3  # the export spans three days
+    assert series['responses'].sum() == dataset.n_rows
+
+
+def test_bad_widths(dataset):
+    with pytest.raises(ValueError):
+        dataset.timeline.series(HOUR // 2)
+    with pytest.raises(ValueError):
+        dataset.timeline.series(DAY, step=HOUR + 1)
+
+
+def test_extend_in_any_order_matches_build(dataset):
+    times, engine = dataset.times, dataset.engine
+    built = Timeline.build(times, engine)
+    order = [slice(600, None), slice(0, 200), slice(200, 600)]  # later responses first
+    grown = Timeline()
+    for part in order:
+        grown.extend(times[part], engine, part.start)
+    assert (grown.start, grown.end) == (built.start, built.end)
+    pd.testing.assert_frame_equal(grown.series(HOUR), built.series(HOUR))
+
+
+def test_appends_extend_the_timeline(dataset, frame):
+    timeline = dataset.timeline
+    end = timeline.end
+    rows = frame.iloc[:3].assign(Timestamp=['2030-01-01 10:00', None, '2030-01-02 09:30'])
+    dataset.append(rows.astype(object).where(rows.notna(), None).to_dict('records'))
+    assert dataset.timeline is timeline and timeline.end > end
+    assert timeline.window(end, timeline.end)['responses'] == 3
+    assert timeline.window(int(pd.Timestamp('2030-01-01').timestamp()), timeline.end)['responses'] == 2
+    assert len(dataset.times) == dataset.n_rows
+
+
+def test_segments_have_their_own_timeline(dataset):
+    view = dataset.select({'Gender': ['Female']})
+    timeline = view.timeline
+    assert timeline.window(timeline.start, timeline.end)['responses'] == view.n_rows
+
+
+def test_data_without_timestamps(cleaned_csv):
+    assert Dataset.load(cleaned_csv).timeline is None
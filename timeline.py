@@ -0,0 +1,271 @@
+# File Path: employee_wellness_project/timeline.py
+# This file contains the time-bucketed KPI aggregates behind the trend chart.
+#
+# The cleaned data has no Timestamp column, so ingest.py keeps the responses'
+# timestamps in a sidecar file next to the cleaned CSV, <cleaned>.timestamps:
+# one little-endian int64 (seconds since the epoch) per cleaned row, in row
+# order, appended to by every incremental ingest. Rows without a readable
+# timestamp hold MISSING.
+#
+# A Timeline folds responses into fixed-width buckets (an hour by default) and
+# keeps, per bucket, the number of responses and, for each KPI, the number of
+# respondents who answered the question and who answered 'Yes' - plus running
+# (prefix) sums of all of them. Any window that starts and ends on a bucket
+# boundary is then answered with two lookups, however long it is, so tumbling
+# and rolling series cost O(windows) rather than O(rows). New responses are
+# added to their bucket and the prefix sums are patched from that bucket on,
+# which is O(1) for responses that arrive in time order.
+
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from crosstab_engine import CrosstabEngine
+
+# Timestamp of a row whose time is unknown (the int64 value of NaT)
+MISSING = np.iinfo(np.int64).min
+
+# Format of the raw export's Timestamp column, e.g. '8/27/2014 11:29'
+TIMESTAMP_FORMAT = '%m/%d/%Y %H:%M'
+
+BUCKET_SECONDS = 3600
+
+# KPI name -> (column, answer counted); the rates behind analysis.get_kpi_*
+KPIS = {
+    'treatment': ('treatment', 'Yes'),
+    'family_history': ('family_history', 'Yes'),
+    'fear_consequences': ('mental_health_consequence', 'Yes'),
+}
+
+# Window widths the trend chart picks from, in seconds
+HOUR, DAY = 3600, 86400
+NICE_WIDTHS = (HOUR, 2 * HOUR, 3 * HOUR, 6 * HOUR, 12 * HOUR, DAY, 2 * DAY, 7 * DAY, 14 * DAY,
+               30 * DAY, 91 * DAY, 182 * DAY, 365 * DAY)
+
+
+# -------------------------------------------------------------------- #
+# --- RESPONSE TIMESTAMPS ---
+# -------------------------------------------------------------------- #
+
+def timestamps_path(cleaned_path: str) -> str:
+    """Returns the file holding the response timestamps of a cleaned CSV."""
+    return os.path.splitext(cleaned_path)[0] + '.timestamps'
+
+
+def to_seconds(values: pd.Series, fmt: str = TIMESTAMP_FORMAT) -> np.ndarray:
+    """
+    Epoch seconds of timestamp strings in the given format; MISSING where
+    unreadable. Times without a UTC offset (as in the raw export) are taken as UTC.
+    """
+    times = pd.to_datetime(values, format=fmt, errors='coerce', utc=True).dt.tz_convert(None)
+    return times.to_numpy(dtype='datetime64[s]').view(np.int64)
+
+
+def response_times(batch: pd.DataFrame) -> np.ndarray:
+    """
+    Epoch seconds of a batch of responses posted to the app: their 'Timestamp'
+    (any format pandas recognizes) or, where there is none, the time of arrival.
+    Raises ValueError for a timestamp that can't be read.
+    """
+    now = np.full(len(batch), int(time.time()), dtype=np.int64)
+    if 'Timestamp' not in batch:
+        return now
+    given = batch['Timestamp'].reset_index(drop=True)
+    seconds = to_seconds(given.where(given.notna(), None), fmt='mixed')
+    unreadable = (seconds == MISSING) & given.notna().to_numpy()
+    if unreadable.any():
+        raise ValueError(f"unreadable Timestamp: {given[unreadable].iloc[0]!r}")
+    return np.where(seconds == MISSING, now, seconds)
+
+
+def append_timestamps(path: str, seconds: np.ndarray) -> None:
+    with open(path, 'ab') as fh:
+        fh.write(np.asarray(seconds, dtype='<i8').tobytes())
+
+
+def read_timestamps(path: str) -> np.ndarray | None:
+    """Reads a timestamps file; None if there is none."""
+    try:
+        return np.fromfile(path, dtype='<i8').astype(np.int64, copy=False)
+    except FileNotFoundError:
+        return None
+
+
+# -------------------------------------------------------------------- #
+# --- TIMELINE ---
+# -------------------------------------------------------------------- #
+
+class Timeline:
+    """
+    Per-bucket response and KPI counts with prefix sums (see the top of this file).
+
+    Counts are kept in one (1 + 2 * n_kpis, n_buckets) array: row 0 counts the
+    responses, then each KPI has a row of respondents who answered it and a row
+    of those who answered 'Yes'. Bucket i covers [(origin + i) * bucket_seconds,
+    (origin + i + 1) * bucket_seconds). Buffers grow geometrically, so adding
+    responses to the end of the timeline is amortized O(batch).
+    """
+
+    def __init__(self, bucket_seconds: int = BUCKET_SECONDS, kpis: dict[str, tuple[str, str]] = KPIS):
+        self.bucket_seconds = bucket_seconds
+        self.kpis = dict(kpis)
+        self.origin = 0
+        self.n_buckets = 0
+        self.n_rows = 0
+        self.undated = 0
+        n_counts = 1 + 2 * len(self.kpis)
+        self._counts = np.zeros((n_counts, 0), dtype=np.int64)
+        self._cum = np.zeros((n_counts, 1), dtype=np.int64)  # _cum[:, i] = counts of buckets < i
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, seconds: np.ndarray, engine: CrosstabEngine, bucket_seconds: int = BUCKET_SECONDS) -> 'Timeline':
+        """Builds the timeline of an engine's rows, given each row's timestamp."""
+        timeline = cls(bucket_seconds)
+        timeline.extend(seconds, engine)
+        return timeline
+
+    # --- Adding responses ---
+
+    def _hits(self, engine: CrosstabEngine, first_row: int, n: int) -> np.ndarray:
+        """The answered / 'Yes' flags of rows first_row.. of an engine, one row per count."""
+        flags = np.zeros((2 * len(self.kpis), n), dtype=bool)
+        for i, (col, answer) in enumerate(self.kpis.values()):
+            if col not in engine.codes:
+                continue
+            codes = engine.codes[col][first_row:first_row + n]
+            flags[2 * i] = codes >= 0
+            if answer in engine.labels[col]:
+                flags[2 * i + 1] = codes == engine.labels[col].get_loc(answer)
+        return flags
+
+    def extend(self, seconds: np.ndarray, engine: CrosstabEngine, first_row: int = 0) -> None:
+        """Adds the engine's rows first_row..first_row + len(seconds), timestamped by seconds."""
+        flags = self._hits(engine, first_row, len(seconds))
+        with self._lock:
+            self.n_rows += len(seconds)
+            dated = seconds != MISSING
+            self.undated += int(len(seconds) - dated.sum())
+            if not dated.any():
+                return
+            buckets = seconds[dated] // self.bucket_seconds
+            first, last = int(buckets.min()), int(buckets.max())
+            self._cover(first, last)
+            start, span = first - self.origin, last - first + 1
+            local = buckets - first
+            added = np.vstack([np.bincount(local, minlength=span),
+                               *(np.bincount(local[f], minlength=span) for f in flags[:, dated])])
+            self._counts[:, start:start + span] += added
+            # Patch the prefix sums from the first bucket touched
+            end = self.n_buckets
+            self._cum[:, start + 1:end + 1] = (self._cum[:, start:start + 1]
+                                                + np.cumsum(self._counts[:, start:end], axis=1))
+
+    def _cover(self, first: int, last: int) -> None:
+        """Makes room for the buckets first..last (absolute bucket numbers)."""
+        if self.n_buckets == 0:
+            self.origin = first
+        if first < self.origin:
+            pad = self.origin - first
+            self._counts = np.pad(self._counts[:, :self.n_buckets], ((0, 0), (pad, 0)))
+            self._cum = np.pad(self._cum[:, :self.n_buckets + 1], ((0, 0), (pad, 0)))
+            self.origin, self.n_buckets = first, self.n_buckets + pad
+        needed = last - self.origin + 1
+        if needed > self._counts.shape[1]:
+            size = max(2 * self._counts.shape[1], needed, 64)
+            self._counts = np.pad(self._counts[:, :self.n_buckets], ((0, 0), (0, size - self.n_buckets)))
+            self._cum = np.pad(self._cum[:, :self.n_buckets + 1], ((0, 0), (0, size - self.n_buckets)))
+        if needed > self.n_buckets:
+            self._cum[:, self.n_buckets + 1:needed + 1] = self._cum[:, self.n_buckets:self.n_buckets + 1]
+            self.n_buckets = needed
+
+    # --- Queries ---
+
+    @property
+    def start(self) -> int:
+        """Epoch seconds at which the first bucket starts."""
+        return self.origin * self.bucket_seconds
+
+    @property
+    def end(self) -> int:
+        """Epoch seconds at which the last bucket ends."""
+        return (self.origin + self.n_buckets) * self.bucket_seconds
+
+    def _position(self, seconds: np.ndarray) -> np.ndarray:
+        """Index into the prefix sums of the bucket boundaries at or after the given times."""
+        buckets = -(-np.asarray(seconds, dtype=np.int64) // self.bucket_seconds)
+        return np.clip(buckets - self.origin, 0, self.n_buckets)
+
+    def _rates(self, sums: np.ndarray) -> dict[str, np.ndarray]:
+        out = {'responses': sums[0]}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for i, kpi in enumerate(self.kpis):
+                answered, yes = sums[1 + 2 * i], sums[2 + 2 * i]
+                out[kpi] = np.where(answered > 0, yes * 100 / np.maximum(answered, 1), np.nan)
+        return out
+
+    def window(self, start: int, end: int) -> dict[str, float]:
+        """
+        Responses and KPI rates (in %) of the responses timestamped in
+        [start, end), in epoch seconds; the bounds are rounded up to bucket
+        boundaries. Answered from the prefix sums in O(1).
+        """
+        with self._lock:
+            a, b = self._position(np.array([start, end]))
+            sums = self._cum[:, b] - self._cum[:, a]
+        rates = self._rates(sums)
+        return {name: int(value) if name == 'responses' else float(value) for name, value in rates.items()}
+
+    def series(self, width: int, step: int | None = None, start: int | None = None,
+               end: int | None = None) -> pd.DataFrame:
+        """
+        Responses and KPI rates (in %) per window of width seconds, in epoch
+        seconds between start and end (default: the whole timeline).
+        Without a step the windows are tumbling: back to back, aligned to
+        multiples of width since the epoch (a day runs midnight to midnight,
+        UTC). With a step they are rolling: one window ending at every multiple
+        of step, covering the width seconds before it. Widths and steps are
+        whole buckets; the first and last windows are cut to the range.
+        """
+        step = step or width
+        if width < self.bucket_seconds or width % self.bucket_seconds or step % self.bucket_seconds:
+            raise ValueError(f"window widths and steps must be multiples of {self.bucket_seconds}s")
+        with self._lock:
+            lo = self.start if start is None else max(start, self.start)
+            hi = self.end if end is None else min(end, self.end)
+            if hi <= lo:
+                ends = np.zeros(0, dtype=np.int64)
+            else:
+                ends = np.arange(lo // step * step + step, hi + step, step, dtype=np.int64)
+            starts = np.maximum(ends - width, lo)
+            ends = np.minimum(ends, hi)
+            sums = self._cum[:, self._position(ends)] - self._cum[:, self._position(starts)]
+        frame = pd.DataFrame({'start': pd.to_datetime(starts, unit='s'), 'end': pd.to_datetime(ends, unit='s'),
+                              **self._rates(sums)})
+        return frame
+
+    def nice_width(self, points: int) -> int:
+        """The smallest of NICE_WIDTHS that splits the timeline into at most about points windows."""
+        span = max(self.end - self.start, self.bucket_seconds)
+        for width in NICE_WIDTHS:
+            if width >= self.bucket_seconds and span / width <= points:
+                return width
+        return NICE_WIDTHS[-1]
+
+    @property
+    def nbytes(self) -> int:
+        return self._counts.nbytes + self._cum.nbytes
+
+    def stats(self) -> dict:
+        return {
+            'start': pd.Timestamp(self.start, unit='s').isoformat() if self.n_buckets else None,
+            'end': pd.Timestamp(self.end, unit='s').isoformat() if self.n_buckets else None,
+            'bucket_seconds': self.bucket_seconds,
+            'buckets': self.n_buckets,
+            'rows': self.n_rows,
+            'undated_rows': self.undated,
+            'kpis': {kpi: list(spec) for kpi, spec in self.kpis.items()},
+        }